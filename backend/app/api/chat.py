@@ -1,177 +1,583 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from ..db.database import get_db
-from ..db import crud
-from .rag import retrieve_top_doctors
-from ..core import utils
+from fastapi import APIRouter, Response
+from fastapi.responses import StreamingResponse
+from .rag import aretrieve, akeyword_search_doctors, normalize_query
+from ..core import intent, utils
+from ..core.cache import SingleFlight, create_cache
+from ..core.llm import get_llm, build_messages, llm_latency
+from ..core.observability import Counter, Trace, activate, get_logger, span
 from pydantic import BaseModel
 import os
-from dotenv import load_dotenv
+import asyncio
+import hashlib
 import json
+import time
 
-from langchain_groq import ChatGroq  # ✅ use Groq instead of OpenAI
+router = APIRouter()
+log = get_logger(__name__)
 
-load_dotenv()
+# Per-request time budgets (seconds) and a cap on concurrent upstream LLM calls
+RETRIEVAL_TIMEOUT = float(os.getenv("RETRIEVAL_TIMEOUT", "5"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "10"))
+LLM_STREAM_IDLE_TIMEOUT = float(os.getenv("LLM_STREAM_IDLE_TIMEOUT", "5"))
+CHAT_MAX_CONCURRENCY = int(os.getenv("CHAT_MAX_CONCURRENCY", "64"))
 
-router = APIRouter()
+# Latency SLO mode: each chat request gets CHAT_DEADLINE seconds end to end (0 = off, only
+# LLM_REQUEST_TIMEOUT applies). An LLM answer still missing at the deadline is cancelled and
+# the template answer sent instead; a stream must produce its first token by then.
+CHAT_DEADLINE = float(os.getenv("CHAT_DEADLINE", "0"))
+# Hedging: a call still unanswered after the recent LLM_HEDGE_PERCENTILE latency gets a second,
+# identical request; the first answer wins and the other request is cancelled
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.1"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))  # latency history needed before hedging
+
+_llm_slots: asyncio.Semaphore = None
+
+# Full-answer cache: (normalized query, ranked doctor ids, their card content) -> LLM answer.
+# Only LLM answers are stored; template fallbacks are free and would pin an outage reply.
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", os.getenv("QUERY_CACHE_BACKEND", "memory"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "5000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "900"))  # 0 disables the cache
+_response_cache = create_cache(RESPONSE_CACHE_BACKEND, "medbot:answers", RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+# Concurrent identical requests share one in-flight LLM call
+_llm_calls = SingleFlight()
+
+# Related health articles returned with each answer (0 = none); they reuse the doctor search's query vector
+CHAT_ARTICLES = int(os.getenv("CHAT_ARTICLES", "3"))
+
+# Clear-cut intents (greetings, doctor searches with a known speciality) are answered from templates
+INTENT_SKIP_LLM = os.getenv("INTENT_SKIP_LLM", "1") == "1"
+
+# {"debug": true} in a chat request returns its per-stage timings; CHAT_DEBUG=0 ignores the flag
+CHAT_DEBUG = os.getenv("CHAT_DEBUG", "1") == "1"
+CHAT_ANSWERS = Counter(
+    "medbot_chat_answers_total",
+    "Chat answers by source (llm, rules, template, deadline, emergency, empty) and cache status",
+    ("source", "cache"),
+)
+LLM_DEADLINE_HITS = Counter(
+    "medbot_llm_deadline_total", "LLM answers abandoned at the chat deadline and replaced by a template", ("endpoint",)
+)
+LLM_HEDGES = Counter("medbot_llm_hedges_total", "Hedged LLM calls by the request that answered", ("winner",))
+LLM_SKIPPED = Counter("medbot_llm_skipped_total", "Chat answers given without calling the LLM, by reason", ("reason",))
+
+
+def _get_llm_slots():
+    global _llm_slots
+    if _llm_slots is None:
+        _llm_slots = asyncio.Semaphore(CHAT_MAX_CONCURRENCY)
+    return _llm_slots
 
-# Load Groq API key
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
 class ChatRequest(BaseModel):
     message: str
+    debug: bool = False
 
-@router.post("/chat")
-def chat(request: ChatRequest, db: Session = Depends(get_db)):
-    user_message = request.message.strip()
-    if not user_message:
-        return {"response": "Please provide a valid message.", "doctors": []}
 
+GREETING_RESPONSE = (
+    "Hello! I can help you find doctors by speciality, symptom, city or fee, and answer general "
+    "health questions. What can I help you with today?"
+)
+
+THANKS_RESPONSE = "You're welcome! Let me know if you need anything else."
+
+# Intents answered from a template when INTENT_SKIP_LLM is on
+CANNED_RESPONSES = {"greeting": GREETING_RESPONSE, "thanks": THANKS_RESPONSE}
+
+TECHNICAL_DIFFICULTIES = (
+    "I'm experiencing technical difficulties. Please try again later or contact your "
+    "healthcare provider directly for urgent medical concerns."
+)
+
+
+async def _invoke(llm, prompt: str) -> str:
+    # Waiting for a slot counts against the same timeout as the call itself
+    with span("llm_queue"):
+        await _get_llm_slots().acquire()
+    started = time.perf_counter()
     try:
-        # 1️⃣ Retrieve top doctors via pipeline (with fallback to keyword search)
-        doctors = retrieve_top_doctors(user_message, db)
-        print(f"Found {len(doctors)} doctors for query: {user_message}")
+        with span("llm"):
+            response = await llm.ainvoke(build_messages(prompt))
+    except asyncio.CancelledError:
+        llm_latency.add(time.perf_counter() - started)  # lost a hedge or hit a deadline: at least this slow
+        raise
+    finally:
+        _get_llm_slots().release()
+    llm_latency.add(time.perf_counter() - started)
+    return response.content.strip()
+
+
+def hedge_delay():
+    """Seconds to wait before hedging an LLM call, or None when hedging is off or has no history yet."""
+    if not LLM_HEDGE or len(llm_latency) < LLM_HEDGE_MIN_SAMPLES:
+        return None
+    return max(LLM_HEDGE_MIN_DELAY, llm_latency.percentile(LLM_HEDGE_PERCENTILE))
+
+
+async def _ask_llm(prompt: str):
+    llm = get_llm()
+    if llm is None:
+        return None
+    delay = hedge_delay()
+    if delay is None:
+        return await _invoke(llm, prompt)
+
+    calls = [asyncio.ensure_future(_invoke(llm, prompt))]
+    try:
+        done, _ = await asyncio.wait(calls, timeout=delay)
+        if not done:
+            calls.append(asyncio.ensure_future(_invoke(llm, prompt)))
+        pending = set(calls)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for call in sorted(done, key=calls.index):
+                if call.exception() is None:
+                    if len(calls) > 1:
+                        LLM_HEDGES.inc(winner="primary" if call is calls[0] else "hedge")
+                    return call.result()
+        if len(calls) > 1:
+            LLM_HEDGES.inc(winner="none")
+        return calls[0].result()  # every request failed: raise the primary's error
+    finally:
+        for call in calls:
+            call.cancel()  # the loser, or both when the caller gave up
+
+
+def response_cache_key(user_message: str, doctor_ids: list, doctors_meta: list) -> str:
+    """Same question + same ranked doctors (with unchanged cards) => same prompt => same answer."""
+    cards = json.dumps(doctors_meta, sort_keys=True, default=str)
+    ids = ",".join(str(i) for i in doctor_ids)
+    return hashlib.sha1(f"{normalize_query(user_message)}|{ids}|{cards}".encode("utf-8")).hexdigest()
+
 
-        # 2️⃣ Convert doctor objects to structured data
-        doctors_meta = []
-        doctors_for_frontend = []
+async def _cached_answer(context, timeout: float = None):
+    """
+    LLM answer for a prepared context, returned with its cache status:
+    HIT (stored answer), SHARED (joined an identical in-flight call),
+    MISS (called the LLM) or BYPASS (cache disabled). Raises asyncio.TimeoutError
+    when no answer arrives within `timeout` (default LLM_REQUEST_TIMEOUT).
+    """
+    timeout = LLM_REQUEST_TIMEOUT if timeout is None else timeout
+    if RESPONSE_CACHE_TTL <= 0:
+        if timeout <= 0:
+            raise asyncio.TimeoutError()
+        return await asyncio.wait_for(_ask_llm(context["prompt"]), timeout), "BYPASS"
+
+    key = context["cache_key"]
+    cached = _response_cache.get(key)
+    if cached is not None:
+        return cached["response"], "HIT"
+    if timeout <= 0:
+        raise asyncio.TimeoutError()
+
+    async def call():
+        # The timeout lives inside the shared call, so late joiners only wait for what is left of it
+        answer = await asyncio.wait_for(_ask_llm(context["prompt"]), LLM_REQUEST_TIMEOUT)
+        if answer:
+            _response_cache.set(key, {"response": answer})
+        return answer
+
+    # Our own deadline may be shorter than the shared call's; the call is cancelled once nobody waits
+    answer, shared = await asyncio.wait_for(_llm_calls.do(key, call), timeout)
+    return answer, "SHARED" if shared else "MISS"
+
+
+def _llm_budget(started: float) -> float:
+    """Seconds left for the LLM in a request that started at `started` (time.perf_counter)."""
+    if CHAT_DEADLINE <= 0:
+        return LLM_REQUEST_TIMEOUT
+    return min(LLM_REQUEST_TIMEOUT, started + CHAT_DEADLINE - time.perf_counter())
+
+
+def _confident(extraction, doctors) -> bool:
+    """
+    A doctor search the template answers as well as the LLM would: one speciality (named
+    outright, or the only one the symptoms point to) and every doctor found has it.
+    """
+    if not extraction.clear or not doctors:
+        return False
+    if not extraction.explicit and len(extraction.specialities) != 1:
+        return False
+    return all(d.speciality in extraction.specialities for d in doctors)
+
+
+def cache_stats() -> dict:
+    return {**_response_cache.stats(), "single_flight_shared": _llm_calls.shared}
+
+
+def _frontend_doctor(d):
+    return {
+        "name": d.name,
+        "speciality": d.speciality,
+        "location": d.location,
+        "fee": getattr(d, 'fee', 'Contact for fee')
+    }
+
+
+async def _prepare_context(user_message: str):
+    """
+    Intent detection + retrieval + prompt, shared by the JSON and streaming endpoints.
+    `answer` is set when the intent is clear enough to reply without the LLM.
+    """
+    # 1️⃣ One pass for intent, speciality, city and fee constraints
+    with span("intent"):
+        extraction = intent.extract(user_message)
+
+    if extraction.intent in CANNED_RESPONSES and INTENT_SKIP_LLM:
+        LLM_SKIPPED.inc(reason=extraction.intent)
+        return {
+            "doctors_meta": [], "doctors": [], "articles": [], "is_doctor_search": False, "city": None,
+            "intent": extraction.intent, "cache_key": None, "prompt": None,
+            "answer": CANNED_RESPONSES[extraction.intent],
+        }
+
+    # Retrieve top doctors via pipeline (pre-filtered by the extraction, keyword search fallback),
+    # plus related articles from the same query vector
+    with span("retrieve"):
+        doctors, articles = await asyncio.wait_for(
+            aretrieve(user_message, extraction=extraction, articles=CHAT_ARTICLES), RETRIEVAL_TIMEOUT
+        )
+    log.debug("retrieved doctors", extra={"found": len(doctors), "query": user_message})
+
+    # 2️⃣ Convert doctor objects to structured data
+    doctors_meta = []
+    doctors_for_frontend = []
+
+    if doctors:
+        for d in doctors:
+            doctors_meta.append({
+                "name": d.name, 
+                "speciality": d.speciality, 
+                "location": d.location,
+                "fee": getattr(d, 'fee', 'Contact for fee'),
+                "keywords": getattr(d, 'keywords', '')
+            })
+            doctors_for_frontend.append(_frontend_doctor(d))
+
+    # 3️⃣ Doctor search unless the extractor saw a health question (or nothing and no doctors matched)
+    is_doctor_search = extraction.intent == "doctor_search" or (extraction.intent == "other" and len(doctors) > 0)
+
+    # ✅ Updated prompt for better responses
+    if is_doctor_search and doctors_meta:
+        prompt = f"""
+        User Query: {user_message}
+        
+        I found {len(doctors_meta)} healthcare providers. Please provide a brief, friendly response that:
+        1. Acknowledges the user's request
+        2. Mentions the number and type of doctors found
+        3. Keeps it short since doctor cards will be displayed separately
+        4. Does NOT list individual doctor names or details
         
-        if doctors:
-            for d in doctors:
-                doctors_meta.append({
-                    "name": d.name, 
-                    "speciality": d.speciality, 
-                    "location": d.location,
-                    "fee": getattr(d, 'fee', 'Contact for fee'),
-                    "keywords": getattr(d, 'keywords', '')
-                })
-                
-                doctors_for_frontend.append({
-                    "name": d.name,
-                    "speciality": d.speciality,
-                    "location": d.location,
-                    "fee": getattr(d, 'fee', 'Contact for fee')
-                })
-
-        # 3️⃣ Determine if this is a doctor search query
-        query_lower = user_message.lower()
-        is_doctor_search = any(word in query_lower for word in [
-            'doctor', 'physician', 'specialist', 'cardiologist', 'gynae', 
-            'dermatologist', 'neurologist', 'find', 'need', 'looking for',
-            'heart', 'skin', 'bone', 'eye', 'brain', 'child', 'women', 'cardio',
-            'ortho', 'pediatric', 'ent', 'surgeon', 'dentist', 'psychiatrist',
-            'urologist', 'oncologist', 'radiologist', 'anesthesiologist'
-        ]) or len(doctors) > 0  # ✅ If we found doctors, it's likely a doctor search
-
-        # 4️⃣ Try Groq API, fallback to template response if it fails
-        groq_response = None
+        Example: "I've found {len(doctors_meta)} cardiologists in your area. Please review their profiles below and contact them directly for appointments."
+        """
+    else:
+        prompt = utils.build_prompt(user_message, doctors_meta)
+
+    answer = None
+    if INTENT_SKIP_LLM and _confident(extraction, doctors):
+        LLM_SKIPPED.inc(reason="confident")
+        answer = generate_template_response(user_message, doctors_meta, True, extraction.city)
+
+    return {
+        "doctors_meta": doctors_meta,
+        "cache_key": response_cache_key(user_message, [d.id for d in doctors], doctors_meta),
+        # ✅ Only include doctors if it's a doctor search
+        "doctors": doctors_for_frontend if is_doctor_search else [],
+        "articles": articles,
+        "is_doctor_search": is_doctor_search,
+        "city": extraction.city,
+        "intent": extraction.intent,
+        "prompt": prompt,
+        "answer": answer,
+    }
+
+
+async def _emergency_payload(user_message: str):
+    try:
+        fallback_doctors = await asyncio.wait_for(
+            akeyword_search_doctors(user_message, 3), RETRIEVAL_TIMEOUT
+        )
+        if fallback_doctors:
+            answer = "I found some healthcare providers that might help. Please contact them directly for appointments."
+            return {
+                "response": answer,
+                "doctors": [_frontend_doctor(doc) for doc in fallback_doctors],
+                "articles": [],
+            }
+    except Exception as e:
+        log.error("emergency keyword search failed", extra={"error": str(e)})
+    return {"response": TECHNICAL_DIFFICULTIES, "doctors": [], "articles": []}
+
+
+async def _answer(user_message: str, started: float = None):
+    """The /chat pipeline. Returns (payload, cache status, answer source)."""
+    started = started or time.perf_counter()
+    if not user_message:
+        return {"response": "Please provide a valid message.", "doctors": [], "articles": []}, "BYPASS", "empty"
+
+    try:
+        context = await _prepare_context(user_message)
+        if context["answer"]:
+            return {"response": context["answer"], "doctors": context["doctors"], "articles": context["articles"]}, "BYPASS", "rules"
+
+        # 4️⃣ Try Groq API (or the response cache) within what is left of the deadline,
+        # fallback to template response if it fails or runs out of time
+        groq_response, cache_status, fallback = None, "MISS", "template"
+        budget = _llm_budget(started)
         try:
-            if GROQ_API_KEY and GROQ_API_KEY.strip():
-                llm = ChatGroq(
-                    groq_api_key=GROQ_API_KEY,
-                    model="llama-3.1-8b-instant",
-                    temperature=0.3,
-                    max_tokens=200
-                )
-
-                # ✅ Updated prompt for better responses
-                if is_doctor_search and doctors_meta:
-                    prompt = f"""
-                    User Query: {user_message}
-                    
-                    I found {len(doctors_meta)} healthcare providers. Please provide a brief, friendly response that:
-                    1. Acknowledges the user's request
-                    2. Mentions the number and type of doctors found
-                    3. Keeps it short since doctor cards will be displayed separately
-                    4. Does NOT list individual doctor names or details
-                    
-                    Example: "I've found {len(doctors_meta)} cardiologists in your area. Please review their profiles below and contact them directly for appointments."
-                    """
-                else:
-                    prompt = utils.build_prompt(user_message, doctors_meta)
-
-                response = llm.invoke([
-                    {
-                        "role": "system", 
-                        "content": "You are Med-Bot, a friendly AI medical assistant. When doctors are found, keep responses brief since doctor cards will be displayed. Never list individual doctor details - just mention the count and specialty."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ])
-                groq_response = response.content.strip()
-                
+            groq_response, cache_status = await _cached_answer(context, budget)
+        except asyncio.TimeoutError:
+            if budget < LLM_REQUEST_TIMEOUT:
+                LLM_DEADLINE_HITS.inc(endpoint="chat")
+                fallback = "deadline"
+                log.info("llm deadline reached, answering from template", extra={"deadline_s": CHAT_DEADLINE})
+            else:
+                log.warning("llm call timed out", extra={"timeout_s": LLM_REQUEST_TIMEOUT})
         except Exception as groq_error:
-            print(f"Groq API error: {groq_error}")
-            groq_response = None
+            log.error("llm call failed", extra={"error": str(groq_error)})
 
         # 5️⃣ Generate response - use Groq if available, otherwise template
         if groq_response:
-            answer = groq_response
+            answer, source = groq_response, "llm"
         else:
-            answer = generate_template_response(user_message, doctors_meta, is_doctor_search)
+            answer, source = generate_template_response(
+                user_message, context["doctors_meta"], context["is_doctor_search"], context["city"]
+            ), fallback
 
         # 6️⃣ Return response with doctors array for frontend
-        # ✅ Always return doctors if they were found and it's a doctor search
-        response_payload = {
-            "response": answer,
-            "doctors": doctors_for_frontend if (is_doctor_search and doctors_for_frontend) else []
-        }
-
-        # ✅ Log full JSON in console
-        print("📝 Response JSON:", json.dumps(response_payload, indent=2))
-        
-        return response_payload
+        return {"response": answer, "doctors": context["doctors"], "articles": context["articles"]}, cache_status, source
 
     except Exception as e:
-        print(f"General error in chat endpoint: {e}")
-        
-        # Emergency fallback
+        log.error("chat pipeline failed", extra={"error": str(e)})
+        return await _emergency_payload(user_message), "BYPASS", "emergency"
+
+
+@router.post("/chat")
+async def chat(request: ChatRequest, response: Response):
+    trace = Trace("chat")
+    with activate(trace):
+        payload, cache_status, source = await _answer(request.message.strip(), trace.started)
+        elapsed = trace.finish()
+        log.info("chat answered", extra={
+            "source": source, "cache": cache_status, "doctors": len(payload["doctors"]),
+            "ms": round(elapsed * 1000, 1),
+        })
+    CHAT_ANSWERS.inc(source=source, cache=cache_status)
+    response.headers["X-Cache"] = cache_status
+    response.headers["X-Trace-Id"] = trace.id
+    if request.debug and CHAT_DEBUG:
+        payload["debug"] = {**trace.timings(), "cache": cache_status, "source": source}
+    return payload
+
+
+# ----------------------------
+# Streaming (server-sent events)
+# ----------------------------
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_llm(prompt: str, trace: Trace = None, first_token_timeout: float = None):
+    """Yield LLM tokens; the first token must arrive within `first_token_timeout` (LLM_REQUEST_TIMEOUT)."""
+    llm = get_llm()
+    if llm is None:
+        return
+    # As in _invoke, waiting for a slot counts against the first-token timeout
+    timeout = LLM_REQUEST_TIMEOUT if first_token_timeout is None else first_token_timeout
+    deadline = time.perf_counter() + timeout
+    with span("llm_queue", trace):
+        await asyncio.wait_for(_get_llm_slots().acquire(), timeout)
+    try:
+        with span("llm", trace):
+            stream = llm.astream(build_messages(prompt)).__aiter__()
+            timeout = deadline - time.perf_counter()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), max(timeout, 0))
+                except StopAsyncIteration:
+                    return
+                timeout = LLM_STREAM_IDLE_TIMEOUT
+                if chunk.content:
+                    yield chunk.content
+    finally:
+        _get_llm_slots().release()
+
+
+async def _shared_stream(context, trace: Trace, budget: float):
+    """
+    Stream a cache miss through the same single-flight key as _cached_answer: the
+    first caller streams the LLM's tokens and stores the answer, callers arriving
+    meanwhile (JSON or streaming) wait for that answer. Yields (token, shared);
+    a caller that joined gets the whole answer as one token.
+    """
+    key = context["cache_key"]
+    tokens = asyncio.Queue()
+
+    async def call():
+        parts = []
         try:
-            from .rag import keyword_search_doctors
-            fallback_doctors = keyword_search_doctors(user_message, db, 3)
-            
-            if fallback_doctors:
-                fallback_doctors_frontend = [
-                    {
-                        "name": doc.name,
-                        "speciality": doc.speciality,
-                        "location": doc.location,
-                        "fee": getattr(doc, 'fee', 'Contact for fee')
-                    }
-                    for doc in fallback_doctors
-                ]
-                
-                answer = "I found some healthcare providers that might help. Please contact them directly for appointments."
-                return {
-                    "response": answer,
-                    "doctors": fallback_doctors_frontend
-                }
+            async for token in _stream_llm(context["prompt"], trace, budget):
+                parts.append(token)
+                tokens.put_nowait(token)
+        finally:
+            tokens.put_nowait(None)
+        answer = "".join(parts).strip()
+        if answer:
+            _response_cache.set(key, {"response": answer})
+        return answer
+
+    flight = asyncio.ensure_future(_llm_calls.do(key, call))
+    # Someone else's call was joined: `call` never runs, so end the token loop here
+    flight.add_done_callback(lambda _: tokens.put_nowait(None))
+    try:
+        # Same limits as _stream_llm: `budget` for the first token (or a joined call's answer), then idle gaps
+        timeout = budget
+        while (token := await asyncio.wait_for(tokens.get(), timeout)) is not None:
+            timeout = LLM_STREAM_IDLE_TIMEOUT
+            yield token, False
+        answer, shared = await flight
+        if shared and answer:
+            yield answer, True
+    finally:
+        flight.cancel()  # leaves the call running for anyone else waiting on it
+
+
+async def _chat_events(user_message: str, context, cache_status: str, cached_answer: str = None,
+                       trace: Trace = None, debug: bool = False):
+    # The trace is re-activated around each awaited step only: a context var must not be left set across yields
+    trace = trace or Trace("chat_stream")
+    fallback = "template"
+
+    def done(payload: dict, source: str) -> str:
+        with activate(trace):
+            elapsed = trace.finish()
+            log.info("chat streamed", extra={
+                "source": source, "cache": cache_status, "doctors": len(payload["doctors"]),
+                "ms": round(elapsed * 1000, 1),
+            })
+        CHAT_ANSWERS.inc(source=source, cache=cache_status)
+        if debug:
+            payload = {**payload, "debug": {**trace.timings(), "cache": cache_status, "source": source}}
+        return _sse("done", payload)
+
+    if context is None:
+        with activate(trace):
+            payload = await _emergency_payload(user_message)
+        yield _sse("doctors", {"doctors": payload["doctors"]})
+        yield _sse("token", {"text": payload["response"]})
+        yield done(payload, "emergency")
+        return
+
+    # Doctor cards (and articles) go out as soon as retrieval finishes, before any LLM latency
+    yield _sse("doctors", {"doctors": context["doctors"]})
+    if context["articles"]:
+        yield _sse("articles", {"articles": context["articles"]})
+
+    if context["answer"]:
+        yield _sse("token", {"text": context["answer"]})
+        yield done({"response": context["answer"], "doctors": context["doctors"], "articles": context["articles"]}, "rules")
+        return
+
+    parts = []
+    budget = _llm_budget(trace.started)
+    try:
+        if cache_status in ("HIT", "SHARED"):
+            # Stored or in-flight answer: sent as a single chunk
+            answer = cached_answer
+            if cache_status == "SHARED":
+                with activate(trace):
+                    answer, _ = await _cached_answer(context, budget)
+            if answer:
+                parts.append(answer)
+                yield _sse("token", {"text": answer})
+        else:
+            if budget <= 0:
+                raise asyncio.TimeoutError()
+            if cache_status == "MISS":
+                # Identical requests arriving while this streams join it instead of calling the LLM again
+                tokens = _shared_stream(context, trace, budget)
             else:
-                return {
-                    "response": "I'm experiencing technical difficulties. Please try again later or contact your healthcare provider directly for urgent medical concerns.",
-                    "doctors": []
-                }
-        except:
-            return {
-                "response": "I'm experiencing technical difficulties. Please try again later or contact your healthcare provider directly for urgent medical concerns.",
-                "doctors": []
-            }
+                tokens = ((token, False) async for token in _stream_llm(context["prompt"], trace, budget))
+            async for token, shared in tokens:
+                if shared:
+                    cache_status = "SHARED"  # an identical call started between the header and here
+                parts.append(token)
+                yield _sse("token", {"text": token})
+    except asyncio.TimeoutError:
+        if not parts and budget < LLM_REQUEST_TIMEOUT:
+            LLM_DEADLINE_HITS.inc(endpoint="chat_stream")
+            fallback = "deadline"
+            log.info("llm deadline reached, answering from template", extra={"deadline_s": CHAT_DEADLINE, "trace_id": trace.id})
+        else:
+            log.warning("llm stream timed out", extra={"tokens": len(parts), "trace_id": trace.id})
+    except Exception as groq_error:
+        log.error("llm stream failed", extra={"error": str(groq_error), "trace_id": trace.id})
+
+    answer, source = "".join(parts).strip(), "llm"
+    if not answer:
+        # Non-streaming fallback: the template answer is sent as a single chunk
+        answer, source = generate_template_response(
+            user_message, context["doctors_meta"], context["is_doctor_search"], context["city"]
+        ), fallback
+        yield _sse("token", {"text": answer})
 
+    yield done({"response": answer, "doctors": context["doctors"], "articles": context["articles"]}, source)
 
-def generate_template_response(query: str, doctors_meta: list, is_doctor_search: bool) -> str:
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Same pipeline as /chat, streamed as server-sent events:
+    `doctors` (once), `articles` (once, when any were found), `token` (repeated),
+    then `done` with the full answer.
+    Retrieval runs before the response starts so X-Cache can be sent as a header.
+    """
+    user_message = request.message.strip()
+    trace = Trace("chat_stream")
+    cache_status, cached = "BYPASS", None
+    if not user_message:
+        events = iter([
+            _sse("doctors", {"doctors": []}),
+            _sse("done", {"response": "Please provide a valid message.", "doctors": [], "articles": []}),
+        ])
+    else:
+        with activate(trace):
+            try:
+                context = await _prepare_context(user_message)
+            except Exception as e:
+                log.error("chat pipeline failed", extra={"error": str(e)})
+                context = None
+        if context is not None and not context["answer"] and RESPONSE_CACHE_TTL > 0:
+            cached = _response_cache.get(context["cache_key"])
+            if cached is not None:
+                cache_status = "HIT"
+            elif _llm_calls.in_flight(context["cache_key"]):
+                cache_status = "SHARED"
+            else:
+                cache_status = "MISS"
+        events = _chat_events(
+            user_message, context, cache_status, cached and cached["response"],
+            trace=trace, debug=request.debug and CHAT_DEBUG,
+        )
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache", "X-Accel-Buffering": "no",
+            "X-Cache": cache_status, "X-Trace-Id": trace.id,
+        },
+    )
+
+
+def generate_template_response(query: str, doctors_meta: list, is_doctor_search: bool, city: str = None) -> str:
     """Generate a template response when Groq API is not available"""
     
     if is_doctor_search and doctors_meta:
         specialty = doctors_meta[0]['speciality'].lower()
-        location_hint = ""
-        
-        # Extract location from query if mentioned
-        for word in ['rawalpindi', 'islamabad', 'karachi', 'lahore', 'peshawar', 'quetta']:
-            if word in query.lower():
-                location_hint = f" in {word.title()}"
-                break
+        # City found by the intent extractor, if any
+        location_hint = f" in {city.title()}" if city else ""
         
         if len(doctors_meta) == 1:
             response = f"I've found 1 {specialty} specialist{location_hint} for you. Please review their profile below and contact them directly for an appointment."
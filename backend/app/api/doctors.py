@@ -1,60 +1,191 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from ..db.database import get_db
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from ..db.database import SessionLocal, async_enabled, async_session
 from ..db import crud
 from ..db.models import Doctor
-from typing import List, Optional
+from ..core import catalog
+from typing import Optional
+import anyio
+import hashlib
+import json
+import os
 
 router = APIRouter()
 
+# Columns a client may ask for with ?fields=; the long free-text ones are opt-in
+DOCTOR_FIELDS = (
+    "id", "name", "designation", "speciality", "location", "fee",
+    "keywords", "symptom_to_speciality", "disease_examples", "updated_at",
+)
+DEFAULT_FIELDS = ("id", "name", "designation", "speciality", "location", "fee", "keywords")
+DOCTORS_MAX_PAGE = int(os.getenv("DOCTORS_MAX_PAGE", "500"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+
+def _parse_fields(fields: Optional[str]) -> list:
+    """`?fields=name,fee` (id is always included), `?fields=all`, or the default projection."""
+    if not fields:
+        return list(DEFAULT_FIELDS)
+    if fields == "all":
+        return list(DOCTOR_FIELDS)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in DOCTOR_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [f for f in dict.fromkeys(requested) if f != "id"]
+
+
+def _columns(fields: list):
+    return [getattr(Doctor, f) for f in fields]
+
+
+def _jsonable(row, fields: list) -> dict:
+    item = {f: row[f] for f in fields}
+    if item.get("updated_at") is not None:
+        item["updated_at"] = item["updated_at"].isoformat()
+    return item
+
+
+def _with_session(func, *args):
+    db = SessionLocal()
+    try:
+        return func(db, *args)
+    finally:
+        db.close()
+
+
+async def _query(func, afunc, *args):
+    """
+    `afunc(db, *args)` on the async engine, or the sync `func(db, *args)` on a
+    worker thread with its own session when the async driver is off (DB_ASYNC=0).
+    """
+    if not async_enabled():
+        return await anyio.to_thread.run_sync(_with_session, func, *args)
+    async with async_session() as db:
+        return await afunc(db, *args)
+
+
+async def _asignature(db):
+    return await db.run_sync(catalog.table_signature)
+
+
+async def _table_signature(request: Request):
+    """
+    (row count, max updated_at) of the doctors table. The catalog snapshot's copy
+    is only used while its watcher is NOTIFY-driven: a polled snapshot lags up to
+    CATALOG_POLL_INTERVAL (and differs per worker), so otherwise this is one
+    count/max query.
+    """
+    snapshot = catalog.catalog
+    watcher = getattr(request.app.state, "catalog_watcher", None)
+    if snapshot is not None and watcher is not None and watcher.listening:
+        return snapshot.signature
+    return await _query(catalog.table_signature, _asignature)
+
+
+def _etag(signature, *params) -> str:
+    digest = hashlib.sha1(json.dumps([signature, params], default=str).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [tag.strip() for tag in header.split(",")]
+
+
 # ----------------------------
-# 1️⃣ Get all doctors
+# 1️⃣ List doctors (keyset pagination, field selection, conditional GET)
 # ----------------------------
-@router.get("/doctors", response_model=List[dict])
-def get_all_doctors(db: Session = Depends(get_db)):
-    doctors = db.query(Doctor).all()
-    return [
-        {
-            "id": d.id,
-            "name": d.name,
-            "speciality": d.speciality,
-            "location": d.location,
-            "fee": d.fee,
-            "keywords": d.keywords,
-            "symptom_to_speciality": d.symptom_to_speciality,
-            "disease_examples": d.disease_examples
-        }
-        for d in doctors
-    ]
+@router.get("/doctors")
+async def list_doctors(
+    request: Request,
+    after: Optional[int] = Query(None, ge=0, description="Keyset cursor: return doctors with id greater than this"),
+    limit: int = Query(50, ge=1, le=DOCTORS_MAX_PAGE),
+    fields: Optional[str] = Query(None, description="Comma-separated columns, or 'all'"),
+    speciality: Optional[str] = Query(None, description="Filter by speciality"),
+    location: Optional[str] = Query(None, description="Filter by location"),
+):
+    """
+    One page of doctors in id order. The next page's cursor is returned in the
+    X-Next-Cursor and Link headers; the body stays a plain JSON array.
+    The ETag changes whenever the doctors table does.
+    """
+    selected = _parse_fields(fields)
+    etag = _etag(await _table_signature(request), "list", after, limit, selected, speciality, location)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    # One extra row tells us whether there is a next page without a COUNT
+    rows = await _query(
+        crud.list_doctors, crud.alist_doctors, _columns(selected), after, limit + 1, speciality, location
+    )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        cursor = rows[-1]["id"]
+        headers["X-Next-Cursor"] = str(cursor)
+        headers["Link"] = f'<{request.url.include_query_params(after=cursor)}>; rel="next"'
+    return JSONResponse([_jsonable(row, selected) for row in rows], headers=headers)
+
 
 # ----------------------------
 # 2️⃣ Search doctors by keyword or speciality
 # ----------------------------
-@router.get("/doctors/search", response_model=List[dict])
-def search_doctors(
+@router.get("/doctors/search")
+async def search_doctors(
     keyword: Optional[str] = Query(None, description="Keyword to search doctors"),
     speciality: Optional[str] = Query(None, description="Filter by speciality"),
-    db: Session = Depends(get_db)
+    location: Optional[str] = Query(None, description="Filter by location"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    fields: Optional[str] = Query(None, description="Comma-separated columns, or 'all'"),
 ):
-    query = db.query(Doctor)
-    
-    if keyword:
-        query = query.filter(Doctor.keywords.ilike(f"%{keyword}%"))
-    if speciality:
-        query = query.filter(Doctor.speciality.ilike(f"%{speciality}%"))
-    
-    results = query.all()
-    
-    return [
-        {
-            "id": d.id,
-            "name": d.name,
-            "speciality": d.speciality,
-            "location": d.location,
-            "fee": d.fee,
-            "keywords": d.keywords,
-            "symptom_to_speciality": d.symptom_to_speciality,
-            "disease_examples": d.disease_examples
-        }
-        for d in results
-    ]
+    # ✅ Ranked full-text search (ts_rank) + trigram-indexed filters, paginated
+    selected = _parse_fields(fields)
+    results = await _query(crud.search_doctors, crud.asearch_doctors, keyword, speciality, location, limit, offset)
+    return JSONResponse([_jsonable({f: getattr(d, f) for f in selected}, selected) for d in results])
+
+
+# ----------------------------
+# 3️⃣ Export every doctor as NDJSON, streamed from a server-side cursor
+# ----------------------------
+@router.get("/doctors/export")
+async def export_doctors(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated columns, or 'all'"),
+    speciality: Optional[str] = Query(None, description="Filter by speciality"),
+    location: Optional[str] = Query(None, description="Filter by location"),
+):
+    """
+    One JSON object per line. Rows are fetched EXPORT_BATCH_SIZE at a time, so
+    memory stays flat however large the table is.
+    """
+    selected = _parse_fields(fields)
+    etag = _etag(await _table_signature(request), "export", selected, speciality, location)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    def encode(batch) -> str:
+        return "".join(json.dumps(_jsonable(row, selected)) + "\n" for row in batch)
+
+    # The session lives as long as the stream, not the request handler
+    async def alines():
+        async with async_session() as db:
+            async for batch in crud.astream_doctors(db, _columns(selected), EXPORT_BATCH_SIZE, speciality, location):
+                yield encode(batch)
+
+    def lines():
+        # Sync iterators are pulled on worker threads by StreamingResponse
+        db = SessionLocal()
+        try:
+            for batch in crud.stream_doctors(db, _columns(selected), EXPORT_BATCH_SIZE, speciality, location):
+                yield encode(batch)
+        finally:
+            db.close()
+
+    headers["Content-Disposition"] = 'attachment; filename="doctors.ndjson"'
+    body = alines() if async_enabled() else lines()
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
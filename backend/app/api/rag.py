@@ -1,165 +1,712 @@
-from langchain.vectorstores import FAISS
-from langchain.docstore.document import Document
 from sqlalchemy.orm import Session
-from app.db.models import Doctor
-from app.core.embeddings import embeddings
+from app.db.models import Blog, Doctor
+from app.db.database import SessionLocal, async_enabled, async_session
+from app.db import crud
+from app.core.embeddings import embedding_model_id, get_embeddings, peek_embeddings
+from app.core.vector_index import INDEX_TYPE, VectorIndex, min_rows
+from app.core.row_store import RowStore
+from app.core.cache import create_cache
+from app.core import catalog as doctor_catalog
+from app.core.hybrid import KeywordIndex, reciprocal_rank_fusion
+from app.core.partitions import CityPartitions
+from app.core import intent
+from app.core.observability import get_logger, span
 import os
-from sqlalchemy import or_
+import re
+import hashlib
+import threading
+import anyio
+from sqlalchemy import func, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+
+log = get_logger(__name__)
 
 # Path to persist FAISS index
 FAISS_INDEX_PATH = "faiss_index"
 
-# In-memory vectorstore
-vectorstore: FAISS = None
+# In-memory vectorstore (replaced wholesale on every sync, never mutated in place)
+vectorstore: VectorIndex = None
+# BM25 index over the same rows, rebuilt whenever a new vectorstore is published
+keyword_index: KeywordIndex = None
+# Exact per-city sub-indexes cut from the same index, for queries that name a city
+city_partitions: CityPartitions = None
+_sync_lock = threading.Lock()
+
+# Hybrid retrieval: candidates fetched from each ranker before reciprocal-rank fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+# A city query with fewer than k matches is topped up from this many candidates
+# ranked across every city (same speciality/fee filters). 0 = only in-city results.
+CITY_FALLBACK_K = int(os.getenv("CITY_FALLBACK_K", "20"))
+
+# Worker threads reserved for retrieval (embedding + FAISS + DB), separate from FastAPI's default pool
+RETRIEVAL_MAX_THREADS = int(os.getenv("RETRIEVAL_MAX_THREADS", "8"))
+_retrieval_limiter: anyio.CapacityLimiter = None
+
+# Query caches: (embedding model, normalized text) -> query vector, and (index version, k, text) -> ranked doctor ids
+QUERY_CACHE_BACKEND = os.getenv("QUERY_CACHE_BACKEND", "memory")  # memory | redis
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "10000"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+_vector_cache = create_cache(QUERY_CACHE_BACKEND, "medbot:qvec", QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+_result_cache = create_cache(QUERY_CACHE_BACKEND, "medbot:qids", QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+
+# Health articles (blogs table): a second index, searched with the doctor query's vector
+BLOG_INDEX_PATH = "faiss_index_blogs"
+BLOG_POLL_INTERVAL = float(os.getenv("BLOG_POLL_INTERVAL", "60"))  # 0 = only sync at startup
+# Squared L2 between unit vectors is 2 - 2*cosine: 1.2 keeps articles with cosine >= 0.4
+BLOG_MAX_DISTANCE = float(os.getenv("BLOG_MAX_DISTANCE", "1.2"))
+blogstore: VectorIndex = None
+_blog_lock = threading.Lock()
+_blog_signature = None  # blogs table signature the published article index reflects
+
+
+def doctor_text(d) -> str:
+    return (
+        f"Speciality: {d.speciality or ''}. "
+        f"Keywords: {d.keywords or ''}. "
+        f"Symptoms: {d.symptom_to_speciality or ''}. "
+        f"Diseases: {d.disease_examples or ''}. "
+        f"Location: {d.location or ''}"
+    )
+
+
+def doctor_row(d, text: str = None) -> dict:
+    """Manifest entry for one doctor: content hash, updated_at and card metadata."""
+    text = text if text is not None else doctor_text(d)
+    fee = getattr(d, 'fee', None)
+    digest = hashlib.sha1(f"{text}|{d.name}|{fee}".encode("utf-8")).hexdigest()
+    return {
+        "hash": digest,
+        "updated_at": d.updated_at.isoformat() if d.updated_at else None,
+        "name": d.name,
+        "speciality": d.speciality,
+        "location": d.location,
+        "fee": fee,
+        "keywords": d.keywords,
+        "symptoms": d.symptom_to_speciality,
+        "diseases": d.disease_examples,
+    }
+
+
+def _publish(store: VectorIndex):
+    global vectorstore, keyword_index, city_partitions
+    keywords = KeywordIndex(store.rows)
+    partitions = CityPartitions.build(store, keywords)
+    keyword_index, city_partitions = keywords, partitions
+    vectorstore = store
+
 
 # ----------------------------
-# 1️⃣ Build FAISS vectorstore
+# 1️⃣ Build / sync FAISS vectorstore
 # ----------------------------
+def load_vectorstore():
+    """
+    Publish the persisted index (memory-mapped) without touching the embedding
+    model or the database. Keyword ranking can serve from it straight away.
+    """
+    if vectorstore is not None:
+        return vectorstore
+    try:
+        loaded = VectorIndex.load(FAISS_INDEX_PATH)
+        if loaded is not None:
+            _publish(loaded)
+            log.info("loaded vectorstore", extra={"version": loaded.version, "rows": len(loaded)})
+    except Exception as e:
+        log.warning("could not load existing vectorstore, rebuilding", extra={"error": str(e)})
+    return vectorstore
+
+
+def reload_vectorstore():
+    """Publish the generation CURRENT now points at (written by the index writer worker)."""
+    with _sync_lock:
+        loaded = VectorIndex.load(FAISS_INDEX_PATH)
+        if loaded is None or (vectorstore is not None and loaded.version == vectorstore.version):
+            return vectorstore
+        _publish(loaded)
+    log.info("reloaded vectorstore", extra={"version": loaded.version, "rows": len(loaded)})
+    return loaded
+
+
 def build_vectorstore(db: Session, persist: bool = True):
-    global vectorstore
+    """Load the persisted index (if any) and bring it up to date with the doctors table."""
+    with span("build_vectorstore"):
+        if persist:
+            load_vectorstore()
 
-    if embeddings is None:
-        print("❌ Embeddings not available, skipping vectorstore build")
-        return None
+        if get_embeddings() is None:
+            log.error("embeddings not available, skipping vectorstore sync")
+            return vectorstore
 
-    # Load from disk if available
-    if persist and os.path.exists(FAISS_INDEX_PATH):
         try:
-            vectorstore = FAISS.load_local(FAISS_INDEX_PATH, embeddings, allow_dangerous_deserialization=True)
-            print("✅ Loaded existing FAISS vectorstore")
-            return vectorstore
+            # Startup pays for a full hash check so edits that did not bump updated_at are caught too
+            sync_vectorstore(db, persist, full=True)
         except Exception as e:
-            print(f"⚠️ Could not load existing vectorstore: {e}")
+            log.exception("error syncing vectorstore", extra={"error": str(e)})
 
-    try:
-        doctors = db.query(Doctor).all()
-        print(f"📋 Found {len(doctors)} doctors in database")
-
-        if not doctors:
-            print("⚠️ No doctors found in database")
-            return None
-
-        docs = [
-            Document(
-                page_content=f"Speciality: {d.speciality or ''}. "
-                             f"Keywords: {d.keywords or ''}. "
-                             f"Symptoms: {d.symptom_to_speciality or ''}. "
-                             f"Diseases: {d.disease_examples or ''}. "
-                             f"Location: {d.location or ''}",
-                metadata={
-                    "id": d.id,
-                    "name": d.name,
-                    "speciality": d.speciality,
-                    "location": d.location,
-                    "fee": getattr(d, 'fee', None)
-                }
-            )
-            for d in doctors
-        ]
+    if vectorstore is not None and len(vectorstore) == 0:
+        log.warning("no doctors found in database")
+    return vectorstore
 
-        vectorstore = FAISS.from_documents(docs, embeddings)
-        print("✅ Built new FAISS vectorstore")
 
-        if persist:
-            vectorstore.save_local(FAISS_INDEX_PATH)
-            print("💾 Saved vectorstore to disk")
+def sync_vectorstore(db: Session, persist: bool = True, full: bool = False):
+    """
+    Incrementally apply added, changed and deleted doctors to the index.
+    `updated_at` narrows the candidates (every row when `full`); the content hash
+    decides what gets re-embedded. Returns {"added", "updated", "deleted"} counts.
+    Everything is re-embedded when the index was built by another embedding backend;
+    a change of INDEX_TYPE retrains the index from its stored vectors.
+    """
+    with _sync_lock:
+        current = vectorstore
+        model = embedding_model_id()
+        stale = current is not None and current.model not in (None, model)
+        if stale:
+            log.warning("index was embedded with another model, re-embedding", extra={"index_model": current.model, "model": model})
+        # New index type, or an auto-sized IVF index outgrew its lists. PQ codes are lossy,
+        # so those are rebuilt from fresh embeddings rather than from the stored codes.
+        reshape = current is not None and not stale and (
+            (current.kind != INDEX_TYPE and len(current) >= min_rows(INDEX_TYPE)) or current.needs_retrain()
+        )
+        if reshape and current.kind == "ivf-pq":
+            log.warning("rebuilding index with a new type, re-embedding", extra={"from": current.kind, "to": INDEX_TYPE})
+            stale, reshape = True, False
+        with span("sync.scan"):
+            stamps = {
+                doc_id: (updated_at.isoformat() if updated_at else None)
+                for doc_id, updated_at in db.query(Doctor.id, Doctor.updated_at)
+            }
+            known = current.rows if current is not None else RowStore()
 
-        return vectorstore
+            deleted = [doc_id for doc_id in known if doc_id not in stamps]
+            candidates = [
+                doc_id for doc_id, stamp in stamps.items()
+                if full or stale or doc_id not in known or stamp is None or known.field(doc_id, "updated_at") != stamp
+            ]
 
-    except Exception as e:
-        print(f"❌ Error building vectorstore: {e}")
-        vectorstore = None
-        return None
+            changed, touched = [], {}
+            for start in range(0, len(candidates), 1000):
+                batch = candidates[start:start + 1000]
+                for d in db.query(Doctor).filter(Doctor.id.in_(batch)):
+                    text = doctor_text(d)
+                    row = doctor_row(d, text)
+                    previous = known.get(d.id)
+                    if previous is not None and previous["hash"] == row["hash"] and not stale:
+                        if previous != row:
+                            touched[d.id] = row  # bookkeeping changed only, no re-embed
+                    else:
+                        changed.append((d.id, text, row))
+
+        stats = {
+            "added": sum(1 for doc_id, _, _ in changed if doc_id not in known),
+            "updated": sum(1 for doc_id, _, _ in changed if doc_id in known),
+            "deleted": len(deleted),
+        }
+        if current is not None and not (changed or deleted or touched or reshape or stale):
+            return stats
+
+        with span("sync.embed"):
+            vectors = get_embeddings().embed_documents([text for _, text, _ in changed]) if changed else []
+        if current is None or stale:
+            if not vectors and current is None:
+                return stats
+            updated = VectorIndex.empty(len(vectors[0]) if vectors else current.dim, model, INDEX_TYPE)
+        else:
+            updated = current.copy()
+            if reshape:
+                updated.rebuild(INDEX_TYPE)
+                log.info("rebuilt vectorstore", extra={"index_type": updated.kind, "rows": len(updated)})
+
+        updated.remove(deleted)
+        updated.upsert([doc_id for doc_id, _, _ in changed], vectors, [row for _, _, row in changed])
+        updated.rows.update(touched)
+        updated.model = model
+
+        if persist:
+            with span("sync.save"):
+                updated.save(FAISS_INDEX_PATH)
+            log.info("saved vectorstore", extra={"version": updated.version})
+
+        _publish(updated)
+        _result_cache.clear()  # cached rankings belong to the previous index version
+        log.info("synced vectorstore", extra={**stats, "rows": len(updated)})
+        return stats
 
 
 # ----------------------------
 # 2️⃣ Semantic search
 # ----------------------------
+def normalize_query(query: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", query.lower()))
+
+
+def embed_query_cached(query: str):
+    # Keyed by model/backend too: a shared (Redis) cache must not hand out another encoder's vectors
+    key = f"{embedding_model_id()}:{normalize_query(query)}"
+    vector = _vector_cache.get(key)
+    if vector is None:
+        embeddings = peek_embeddings()
+        if embeddings is None:
+            # Still warming up: never make a request wait for the model load
+            raise RuntimeError("embedding model not loaded yet")
+        vector = embeddings.embed_query(query)
+        _vector_cache.set(key, list(vector))
+    return vector
+
+
+def search_doctor_ids(query: str, k: int = 5, extraction: intent.Extraction = None, vector=None):
+    """
+    Hybrid ranking: FAISS and BM25 candidates, both restricted index-side by the
+    speciality/city/fee filters extracted from the query, merged by reciprocal-rank
+    fusion. A city with its own partition is searched there instead of the
+    national index; one with fewer than k matches is topped up from the other
+    cities. Cached per index version. `vector` skips embedding the query again.
+    """
+    store, keywords, partitions = vectorstore, keyword_index, city_partitions
+    if store is None:
+        return []
+    key = f"{store.version}:{k}:{normalize_query(query)}"
+    ids = _result_cache.get(key)
+    if ids is not None:
+        return ids
+
+    with span("filters"):
+        filters = (extraction or intent.extract(query)).filters()
+        mask = keywords.filter_mask(filters) if keywords is not None else None
+        if mask is not None and not mask.any() and "specialities" in filters:
+            # No such specialist in that city / fee range: keep the location and fee constraints
+            filters = {f: v for f, v in filters.items() if f != "specialities"}
+            mask = keywords.filter_mask(filters)
+        if mask is not None and not mask.any():
+            filters, mask = {}, None  # nothing satisfies the filters; rank the whole catalog instead
+        city = filters.get("city")
+        if partitions is None or partitions.store is not store or city not in partitions:
+            city = None  # no partition for it (or it belongs to another index version)
+
+    if vector is None:
+        try:
+            with span("embed"):
+                vector = embed_query_cached(query)
+        except Exception as e:
+            log.warning("vector search failed, using keyword ranking only", extra={"error": str(e)})
+
+    ids, complete = _hybrid_rank(query, store, keywords, vector, mask, k, partitions if city else None, filters)
+    if "city" in filters and len(ids) < k and CITY_FALLBACK_K > 0 and keywords is not None:
+        with span("city_fallback"):
+            wider = {f: v for f, v in filters.items() if f != "city"}
+            wider_mask = keywords.filter_mask(wider)
+            if wider_mask is not None and not wider_mask.any():
+                wider_mask = None
+            candidates, _ = _hybrid_rank(query, store, keywords, vector, wider_mask, CITY_FALLBACK_K)
+            seen = set(ids)
+            ids += [doc_id for doc_id in candidates if doc_id not in seen][:k - len(ids)]
+    if complete:
+        _result_cache.set(key, ids)  # keyword-only rankings (e.g. during warm-up) are not cached
+    return ids
+
+
+def _hybrid_rank(query, store, keywords, vector, mask, k, partitions=None, filters=None):
+    """
+    (ids, complete): the FAISS and BM25 rankings within `mask` (inside the city
+    partition when given) fused; complete is False when there was no vector ranking.
+    """
+    candidates = max(HYBRID_CANDIDATES, k)
+    rankings = []
+    if vector is not None:
+        try:
+            with span("vector_search"):
+                if partitions is not None:
+                    # The partition already is the city; only other filters need a selector
+                    allowed = keywords.allowed_ids(mask) if set(filters) != {"city"} else None
+                    hits = partitions.search(filters["city"], vector, candidates, allowed)
+                else:
+                    allowed = keywords.allowed_ids(mask) if keywords is not None else None
+                    hits = store.search(vector, candidates, allowed)
+                rankings.append([doc_id for doc_id, _ in hits])
+        except Exception as e:
+            log.warning("vector search failed, using keyword ranking only", extra={"error": str(e)})
+    complete = bool(rankings)
+    if keywords is not None:
+        with span("keyword_rank"):
+            rankings.append([doc_id for doc_id, _ in keywords.search(query, candidates, mask)])
+    return reciprocal_rank_fusion(rankings, k=RRF_K, limit=k), complete
+
+
+def rank(query: str, k: int = 5, extraction: intent.Extraction = None, articles: int = 0):
+    """
+    (doctor ids, up to `articles` related articles) from one query embedding:
+    the vector computed for the doctor search also probes the article index.
+    """
+    vector = None
+    if articles > 0 and blogstore is not None:
+        try:
+            with span("embed"):
+                vector = embed_query_cached(query)
+        except Exception as e:
+            log.warning("query embedding failed, no article suggestions", extra={"error": str(e)})
+    return search_doctor_ids(query, k, extraction, vector), search_articles(vector, articles)
+
+
+def cache_stats() -> dict:
+    return {
+        "index_version": vectorstore.version if vectorstore is not None else None,
+        "query_vectors": _vector_cache.stats(),
+        "results": _result_cache.stats(),
+    }
+
+
 def retrieve_doctors(query: str, k: int = 5):
     if vectorstore is None:
-        print("⚠️ Vectorstore not available")
+        log.warning("vectorstore not available")
         return []
 
     try:
-        results = vectorstore.similarity_search(query, k=k)
-        return [r.metadata for r in results]
+        store = vectorstore
+        fields = ("name", "speciality", "location", "fee")
+        return [
+            {"id": doc_id, **{f: store.rows[doc_id][f] for f in fields}}
+            for doc_id in search_doctor_ids(query, k) if doc_id in store.rows
+        ]
     except Exception as e:
-        print(f"❌ Error in semantic search: {e}")
+        log.error("semantic search failed", extra={"error": str(e)})
         return []
 
 
 # ----------------------------
 # 3️⃣ Retrieval pipeline
 # ----------------------------
-def retrieve_top_doctors(query: str, db: Session, top_k: int = 5):
-    global vectorstore
+def retrieve_top_doctors(query: str, db: Session, top_k: int = 5, extraction: intent.Extraction = None):
+    # The index is loaded by the startup warm-up (app.core.warmup), never inline on a request
+    extraction = extraction or intent.extract(query)
+    if vectorstore is not None:
+        try:
+            top_ids = search_doctor_ids(query, top_k, extraction)
+            if top_ids:
+                with span("hydrate"):
+                    doctors = hydrate_doctors(top_ids, db)
+                if doctors:
+                    log.info("hybrid search", extra={"found": len(doctors)})
+                    return doctors
+        except Exception as e:
+            log.warning("hybrid search failed", extra={"error": str(e)})
 
-    if vectorstore is None and embeddings is not None:
-        build_vectorstore(db)
+    log.info("falling back to keyword search")
+    return keyword_search_doctors(query, db, top_k, extraction)
 
+
+def hydrate_doctors(ids: list, db: Session):
+    """Doctor rows for ranked ids, in rank order. Served from the catalog snapshot when loaded."""
+    snapshot = doctor_catalog.catalog
+    if snapshot is not None:
+        doctors = snapshot.get_many(ids)
+        if len(doctors) == len(ids):
+            return doctors
+    # Snapshot missing or behind the index: one round trip, re-sorted into rank order
+    by_id = {d.id: d for d in crud.get_doctors_by_ids(db, ids)}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def _run_with_session(func, query: str, limit: int, extraction: intent.Extraction = None):
+    db = SessionLocal()
+    try:
+        return func(query, db, limit, extraction)
+    finally:
+        db.close()
+
+
+def _get_limiter():
+    global _retrieval_limiter
+    if _retrieval_limiter is None:
+        _retrieval_limiter = anyio.CapacityLimiter(RETRIEVAL_MAX_THREADS)
+    return _retrieval_limiter
+
+
+async def aretrieve(query: str, top_k: int = 5, extraction: intent.Extraction = None, articles: int = 0):
+    """
+    Async retrieval pipeline, returning (doctors, articles). Ranking (embedding +
+    FAISS) runs on the retrieval threads; database reads go through the async
+    engine, so a chat waiting on Postgres holds a pooled connection but no thread.
+    """
+    extraction = extraction or intent.extract(query)
+    if not async_enabled():
+        doctors = await anyio.to_thread.run_sync(
+            _run_with_session, retrieve_top_doctors, query, top_k, extraction, limiter=_get_limiter()
+        )
+        # The doctor search just cached this query's vector, so this is one more index probe
+        found = await anyio.to_thread.run_sync(related_articles, query, articles, limiter=_get_limiter())
+        return doctors, found
+
+    found = []
     if vectorstore is not None:
         try:
-            top_metadata = vectorstore.similarity_search(query, k=top_k)
-            if top_metadata:
-                top_ids = [m.metadata["id"] for m in top_metadata]
-                from ..db import crud
-                doctors = crud.get_doctors_by_ids(db, top_ids) if top_ids else []
+            top_ids, found = await anyio.to_thread.run_sync(
+                rank, query, top_k, extraction, articles, limiter=_get_limiter()
+            )
+            if top_ids:
+                with span("hydrate"):
+                    doctors = await ahydrate_doctors(top_ids)
                 if doctors:
-                    print(f"✅ Found {len(doctors)} doctors via semantic search")
-                    return doctors
+                    log.info("hybrid search", extra={"found": len(doctors), "articles": len(found)})
+                    return doctors, found
         except Exception as e:
-            print(f"⚠️ Semantic search failed: {e}")
+            log.warning("hybrid search failed", extra={"error": str(e)})
+
+    log.info("falling back to keyword search")
+    return await akeyword_search_doctors(query, top_k, extraction), found
+
+
+async def aretrieve_top_doctors(query: str, top_k: int = 5, extraction: intent.Extraction = None):
+    doctors, _ = await aretrieve(query, top_k, extraction)
+    return doctors
+
+
+async def ahydrate_doctors(ids: list):
+    """hydrate_doctors() with the database fallback on the async engine."""
+    snapshot = doctor_catalog.catalog
+    if snapshot is not None:
+        doctors = snapshot.get_many(ids)
+        if len(doctors) == len(ids):
+            return doctors
+    async with async_session() as db:
+        by_id = {d.id: d for d in await crud.aget_doctors_by_ids(db, ids)}
+    return [by_id[i] for i in ids if i in by_id]
 
-    print("🔎 Falling back to keyword search")
-    return keyword_search_doctors(query, db, top_k)
+
+async def akeyword_search_doctors(query: str, limit: int = 5, extraction: intent.Extraction = None):
+    """Async keyword search on the async engine (own session), or a retrieval thread without one."""
+    extraction = extraction or intent.extract(query)
+    if not async_enabled():
+        return await anyio.to_thread.run_sync(
+            _run_with_session, keyword_search_doctors, query, limit, extraction, limiter=_get_limiter()
+        )
+    try:
+        query_lower = query.lower().strip()
+        with span("keyword_search"):
+            async with async_session() as db:
+                full_text = await crud.asupports_full_text(db)
+                doctors = (await db.scalars(keyword_search_stmt(query_lower, limit, full_text, extraction))).all()
+        log.info("keyword search", extra={"found": len(doctors)})
+        return doctors
+    except Exception as e:
+        log.error("keyword search failed", extra={"error": str(e)})
+        return []
 
 
 # ----------------------------
 # 4️⃣ Keyword search fallback
 # ----------------------------
-def keyword_search_doctors(query: str, db: Session, limit: int = 5):
+def keyword_search_stmt(query_lower: str, limit: int, full_text: bool, extraction: intent.Extraction):
+    """Extracted specialities (and city) first, then ranked full-text (Postgres) or a plain ILIKE scan."""
+    if extraction.specialities:
+        # Exact speciality values from the extractor's vocabulary
+        stmt = select(Doctor).where(Doctor.speciality.in_(sorted(extraction.specialities)))
+        if extraction.city:
+            stmt = stmt.where(Doctor.location.ilike(f"%{extraction.city}%"))
+        if extraction.max_fee is not None:
+            stmt = stmt.where(Doctor.fee <= extraction.max_fee)
+        if extraction.min_fee is not None:
+            stmt = stmt.where(Doctor.fee >= extraction.min_fee)
+        return stmt.order_by(Doctor.id).limit(limit)
+    if full_text:
+        # Fallback: ranked full-text search over the weighted tsvector
+        return crud.search_doctors_stmt(text=query_lower, location=extraction.city, limit=limit, full_text=True)
+    # Fallback: general keyword search
+    return select(Doctor).where(
+        or_(
+            Doctor.name.ilike(f"%{query_lower}%"),
+            Doctor.speciality.ilike(f"%{query_lower}%"),
+            Doctor.keywords.ilike(f"%{query_lower}%"),
+            Doctor.location.ilike(f"%{query_lower}%")
+        )
+    ).limit(limit)
+
+
+def keyword_search_doctors(query: str, db: Session, limit: int = 5, extraction: intent.Extraction = None):
     try:
         query_lower = query.lower().strip()
-        print(f"🔎 Searching for: '{query_lower}'")
-
-        # Basic specialty mapping
-        specialty_mapping = {
-            'heart': 'cardiology',
-            'cardio': 'cardiology',
-            'gynae': 'gynecology',
-            'skin': 'dermatology',
-            'bone': 'orthopedics',
-            'eye': 'ophthalmology',
-            'brain': 'neurology',
-            'child': 'pediatrics',
-            'general': 'general medicine'
+        extraction = extraction or intent.extract(query)
+        log.debug("keyword search", extra={"query": query_lower})
+        with span("keyword_search"):
+            doctors = db.scalars(
+                keyword_search_stmt(query_lower, limit, crud.supports_full_text(db), extraction)
+            ).all()
+        log.info("keyword search", extra={"found": len(doctors)})
+        return doctors
+
+    except Exception as e:
+        log.error("keyword search failed", extra={"error": str(e)})
+        return []
+
+
+# ----------------------------
+# 5️⃣ Health article index
+# ----------------------------
+# Titles and descriptions of the articles app.ingest.blogs stores in `blogs`,
+# kept as index generations under BLOG_INDEX_PATH by the same writer worker as
+# the doctor index. It is synced incrementally like the doctors (new and edited
+# rows embedded, deleted rows dropped) and only ever searched with a vector the
+# doctor search already computed.
+def blog_text(b) -> str:
+    return f"{b.title or ''}. {b.description or ''}"
+
+
+def blog_row(b, text: str = None) -> dict:
+    text = text if text is not None else blog_text(b)
+    return {
+        "hash": hashlib.sha1(f"{text}|{b.url}".encode("utf-8")).hexdigest(),
+        "updated_at": b.updated_at.isoformat() if b.updated_at else None,
+        "title": b.title,
+        "url": b.url,
+        "source": b.source,
+        "published_at": b.published_at.isoformat() if b.published_at else None,
+    }
+
+
+def blog_signature(db: Session):
+    count, latest = db.query(func.count(Blog.id), func.max(Blog.updated_at)).one()
+    return count, latest.isoformat() if latest else None
+
+
+def blog_index_stale(db: Session) -> bool:
+    """True when the blogs table changed since the article index was last synced."""
+    try:
+        return blog_signature(db) != _blog_signature
+    except SQLAlchemyError:
+        db.rollback()
+        return False  # no blogs table yet (migration 0004)
+
+
+def load_blog_index():
+    global blogstore
+    if blogstore is not None:
+        return blogstore
+    try:
+        loaded = VectorIndex.load(BLOG_INDEX_PATH)
+        if loaded is not None:
+            blogstore = loaded
+            log.info("loaded article index", extra={"version": loaded.version, "rows": len(loaded)})
+    except Exception as e:
+        log.warning("could not load article index, rebuilding", extra={"error": str(e)})
+    return blogstore
+
+
+def reload_blog_index():
+    """Publish the article generation the writer worker made current."""
+    global blogstore
+    with _blog_lock:
+        loaded = VectorIndex.load(BLOG_INDEX_PATH)
+        if loaded is None or (blogstore is not None and loaded.version == blogstore.version):
+            return blogstore
+        blogstore = loaded
+    log.info("reloaded article index", extra={"version": loaded.version, "rows": len(loaded)})
+    return loaded
+
+
+def build_blog_index(db: Session, persist: bool = True):
+    """Load the persisted article index and bring it up to date with the blogs table."""
+    with span("build_blog_index"):
+        if persist:
+            load_blog_index()
+        if get_embeddings() is None:
+            return blogstore
+        try:
+            sync_blog_index(db, persist, full=True)
+        except SQLAlchemyError as e:
+            db.rollback()
+            log.info("blogs table not available, no article index", extra={"error": str(e)})
+        except Exception as e:
+            log.exception("error syncing article index", extra={"error": str(e)})
+    return blogstore
+
+
+def sync_blog_index(db: Session, persist: bool = True, full: bool = False):
+    """
+    Embed new and changed articles and drop deleted ones; same rules as
+    sync_vectorstore(). Returns {"added", "updated", "deleted"} counts.
+    """
+    global blogstore, _blog_signature
+    with _blog_lock:
+        current = blogstore
+        model = embedding_model_id()
+        stale = current is not None and current.model not in (None, model)
+        with span("blogs.scan"):
+            signature = blog_signature(db)
+            stamps = {
+                blog_id: (updated_at.isoformat() if updated_at else None)
+                for blog_id, updated_at in db.query(Blog.id, Blog.updated_at)
+            }
+            known = current.rows if current is not None else RowStore()
+
+            deleted = [blog_id for blog_id in known if blog_id not in stamps]
+            candidates = [
+                blog_id for blog_id, stamp in stamps.items()
+                if full or stale or blog_id not in known or stamp is None or known.field(blog_id, "updated_at") != stamp
+            ]
+
+            changed, touched = [], {}
+            for start in range(0, len(candidates), 1000):
+                for b in db.query(Blog).filter(Blog.id.in_(candidates[start:start + 1000])):
+                    text = blog_text(b)
+                    row = blog_row(b, text)
+                    previous = known.get(b.id)
+                    if previous is not None and previous["hash"] == row["hash"] and not stale:
+                        if previous != row:
+                            touched[b.id] = row
+                    else:
+                        changed.append((b.id, text, row))
+
+        stats = {
+            "added": sum(1 for blog_id, _, _ in changed if blog_id not in known),
+            "updated": sum(1 for blog_id, _, _ in changed if blog_id in known),
+            "deleted": len(deleted),
         }
+        if current is not None and not (changed or deleted or touched or stale):
+            _blog_signature = signature
+            return stats
 
-        # Match specialty keywords
-        specialty_queries = [s for k, s in specialty_mapping.items() if k in query_lower]
+        with span("blogs.embed"):
+            vectors = get_embeddings().embed_documents([text for _, text, _ in changed]) if changed else []
+        if current is None or stale:
+            if not vectors and current is None:
+                _blog_signature = signature
+                return stats
+            updated = VectorIndex.empty(len(vectors[0]) if vectors else current.dim, model)
+        else:
+            updated = current.copy()
 
-        doctors_query = db.query(Doctor)
+        updated.remove(deleted)
+        updated.upsert([blog_id for blog_id, _, _ in changed], vectors, [row for _, _, row in changed])
+        updated.rows.update(touched)
+        updated.model = model
 
-        if specialty_queries:
-            doctors_query = doctors_query.filter(
-                or_(*[Doctor.speciality.ilike(f"%{s}%") for s in specialty_queries])
-            )
+        if persist:
+            with span("blogs.save"):
+                updated.save(BLOG_INDEX_PATH)
 
-        # Fallback: general keyword search
-        if not specialty_queries:
-            doctors_query = doctors_query.filter(
-                or_(
-                    Doctor.name.ilike(f"%{query_lower}%"),
-                    Doctor.speciality.ilike(f"%{query_lower}%"),
-                    Doctor.keywords.ilike(f"%{query_lower}%"),
-                    Doctor.location.ilike(f"%{query_lower}%")
-                )
-            )
+        blogstore, _blog_signature = updated, signature
+        log.info("synced article index", extra={**stats, "rows": len(updated)})
+        return stats
+
+
+def search_articles(vector, k: int = 3):
+    """Articles nearest to an already computed query vector, within BLOG_MAX_DISTANCE."""
+    store = blogstore
+    if store is None or vector is None or k <= 0:
+        return []
+    with span("article_search"):
+        hits = store.search(vector, k)
+    fields = ("title", "url", "source", "published_at")
+    return [
+        {"id": blog_id, **{f: store.rows[blog_id][f] for f in fields}}
+        for blog_id, distance in hits if distance <= BLOG_MAX_DISTANCE and blog_id in store.rows
+    ]
 
-        doctors = doctors_query.limit(limit).all()
-        print(f"✅ Keyword search found {len(doctors)} doctors")
-        return doctors
 
+def related_articles(query: str, k: int = 3):
+    """search_articles() for a query whose vector is (normally) already in the query cache."""
+    if k <= 0 or blogstore is None:
+        return []
+    try:
+        return search_articles(embed_query_cached(query), k)
     except Exception as e:
-        print(f"❌ Keyword search error: {e}")
+        log.warning("article search failed", extra={"error": str(e)})
         return []
@@ -0,0 +1,193 @@
+# ----------------------------
+# Small caches shared by the retrieval and chat pipelines
+# ----------------------------
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.observability import get_logger
+
+log = get_logger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class TTLCache:
+    """Thread-safe LRU cache with a per-entry TTL and hit/miss counters."""
+
+    backend = "memory"
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class RedisCache:
+    """
+    JSON-valued cache in Redis so every uvicorn worker shares the same entries.
+    Entries expire by TTL; LRU eviction is left to Redis (maxmemory-policy allkeys-lru).
+    Hit/miss counters are per process.
+    """
+
+    backend = "redis"
+
+    def __init__(self, prefix: str, ttl: float = 3600, url: str = REDIS_URL):
+        import redis  # optional: only needed for the shared backend
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.2)
+        self.client.ping()
+        self.prefix = prefix
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, key) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key):
+        try:
+            raw = self.client.get(self._key(key))
+        except Exception:
+            self.errors += 1
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key, value):
+        try:
+            self.client.set(self._key(key), json.dumps(value), ex=max(1, int(self.ttl)))
+        except Exception:
+            self.errors += 1
+
+    def clear(self):
+        # Keys carry the index version, so stale entries simply stop being read and expire
+        pass
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "errors": self.errors,
+        }
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one: the first caller runs
+    `fn()`, everyone arriving while it is in flight awaits the same result.
+    Per process and per event loop. A waiter giving up (cancelled, or its own
+    timeout) leaves the call running for the others; once every waiter has
+    given up the call itself is cancelled.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._waiters = {}
+        self.shared = 0
+
+    def in_flight(self, key) -> bool:
+        return key in self._calls
+
+    async def do(self, key, fn):
+        """Return (result, shared): shared is True when another caller's call was joined."""
+        task = self._calls.get(key)
+        shared = task is not None
+        if shared:
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done: self._finished(key, done))
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task), shared
+        except asyncio.CancelledError:
+            if self._calls.get(key) is task and self._waiters[key] == 1 and not task.done():
+                task.cancel()  # nobody is left to use the answer
+            raise
+        finally:
+            if self._calls.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _finished(self, key, task):
+        if self._calls.get(key) is task:
+            self._calls.pop(key, None)
+            self._waiters.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved here in case every waiter gave up
+
+
+def create_cache(backend: str, prefix: str, maxsize: int, ttl: float):
+    """Build the configured cache, falling back to in-memory if Redis is unreachable."""
+    if backend == "redis":
+        try:
+            cache = RedisCache(prefix, ttl)
+            log.info("using redis cache", extra={"prefix": prefix})
+            return cache
+        except Exception as e:
+            log.warning("redis cache unavailable, using in-memory cache", extra={"prefix": prefix, "error": str(e)})
+    return TTLCache(maxsize, ttl)
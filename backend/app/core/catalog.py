@@ -0,0 +1,169 @@
+# ----------------------------
+# Read-only in-memory snapshot of the doctors table
+# ----------------------------
+# Chat requests resolve ranked doctor ids against this snapshot instead of
+# querying Postgres. A watcher thread replaces the snapshot when the table
+# changes: Postgres LISTEN/NOTIFY (trigger from migration 0003) wakes it
+# immediately, and a cheap count/max(updated_at) poll catches everything else.
+import os
+import select
+import threading
+
+from sqlalchemy import func
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal, engine
+from app.core.observability import get_logger
+from app.db.models import Doctor
+
+log = get_logger(__name__)
+
+CATALOG_POLL_INTERVAL = float(os.getenv("CATALOG_POLL_INTERVAL", "30"))
+CATALOG_LISTEN = os.getenv("CATALOG_LISTEN", "1") == "1"
+NOTIFY_CHANNEL = "doctors_changed"
+
+FIELDS = (
+    "id", "name", "designation", "speciality", "location", "fee",
+    "keywords", "symptom_to_speciality", "disease_examples", "updated_at",
+)
+
+
+class DoctorRecord:
+    """Read-only doctor row, attribute-compatible with the Doctor model."""
+
+    __slots__ = FIELDS
+
+    def __init__(self, *values):
+        for field, value in zip(FIELDS, values):
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DoctorRecord is read-only")
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in FIELDS}
+
+
+class DoctorCatalog:
+    """Snapshot of every doctor keyed by id."""
+
+    def __init__(self, records: dict, signature):
+        self._records = records
+        self.signature = signature
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, doctor_id: int):
+        return self._records.get(doctor_id)
+
+    def get_many(self, ids):
+        """Records for `ids` in the given (rank) order, skipping unknown ids."""
+        records = self._records
+        return [records[i] for i in ids if i in records]
+
+    def records(self):
+        return self._records.values()
+
+
+catalog: DoctorCatalog = None
+_refresh_lock = threading.Lock()
+
+
+def table_signature(db: Session):
+    """(row count, latest updated_at): changes whenever a row is added, edited or deleted."""
+    count, latest = db.query(func.count(Doctor.id), func.max(Doctor.updated_at)).one()
+    return count, latest.isoformat() if latest else None
+
+
+def load_catalog(db: Session) -> DoctorCatalog:
+    """Replace the process-wide snapshot with a fresh copy of the table."""
+    global catalog
+    with _refresh_lock:
+        signature = table_signature(db)
+        columns = [getattr(Doctor, field) for field in FIELDS]
+        records = {row[0]: DoctorRecord(*row) for row in db.query(*columns).yield_per(5000)}
+        catalog = DoctorCatalog(records, signature)
+    log.info("loaded doctor catalog", extra={"rows": len(records)})
+    return catalog
+
+
+# ----------------------------
+# Change watcher
+# ----------------------------
+def _catalog_stale(db: Session) -> bool:
+    return catalog is None or table_signature(db) != catalog.signature
+
+
+class CatalogWatcher(threading.Thread):
+    """
+    Background thread that calls `on_change(db)` after the doctors table changes.
+    Wakes on NOTIFY doctors_changed when available, otherwise every poll interval.
+    Another table can be watched by passing `is_stale(db)` (and usually listen=False).
+    """
+
+    def __init__(self, on_change, interval: float = CATALOG_POLL_INTERVAL, listen: bool = CATALOG_LISTEN,
+                 is_stale=None, name: str = "catalog-watcher"):
+        super().__init__(name=name, daemon=True)
+        self.on_change = on_change
+        self.is_stale = is_stale or _catalog_stale
+        self.interval = interval
+        self.listen = listen and engine.dialect.name == "postgresql"
+        self._stopped = threading.Event()
+        self._conn = None
+
+    @property
+    def listening(self) -> bool:
+        """True while a LISTEN connection is up, i.e. the snapshot follows changes within moments."""
+        return self._conn is not None
+
+    def stop(self):
+        self._stopped.set()
+
+    def _connect(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        dsn = make_url(engine.url).set(drivername="postgresql").render_as_string(hide_password=False)
+        conn = psycopg2.connect(dsn)
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        conn.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+        return conn
+
+    def _wait(self):
+        """Sleep until the next poll, returning early on a NOTIFY."""
+        if not self.listen:
+            self._stopped.wait(self.interval)
+            return
+        try:
+            if self._conn is None:
+                self._conn = self._connect()
+            if select.select([self._conn], [], [], self.interval)[0]:
+                self._conn.poll()
+                self._conn.notifies.clear()
+        except Exception as e:
+            log.warning("LISTEN failed, polling only", extra={"channel": NOTIFY_CHANNEL, "error": str(e)})
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass  # already broken; a fresh connection is opened on the next wait
+            self._conn = None
+            self._stopped.wait(self.interval)
+
+    def run(self):
+        while not self._stopped.is_set():
+            self._wait()
+            if self._stopped.is_set():
+                break
+            db = SessionLocal()
+            try:
+                if self.is_stale(db):
+                    self.on_change(db)
+            except Exception as e:
+                log.warning("catalog refresh failed", extra={"watcher": self.name, "error": str(e)})
+            finally:
+                db.close()
+        if self._conn is not None:
+            self._conn.close()
@@ -0,0 +1,77 @@
+# ----------------------------
+# Shared embedding worker for multi-process deployments
+# ----------------------------
+# One process owns the model; uvicorn workers talk to it over a unix socket
+# (EMBEDDING_SOCKET, see RemoteEmbeddings). Single-text requests go through the
+# micro-batcher, so concurrent queries from every worker share forward passes.
+#
+#   python -m app.core.embedding_server --socket /tmp/medbot-embed.sock
+#   EMBEDDING_SOCKET=/tmp/medbot-embed.sock uvicorn app.main:app --workers 4
+#
+# Frames: uint32 length + JSON header, uint32 length + payload (float32 vectors).
+import argparse
+import os
+import socketserver
+
+import numpy as np
+
+from app.core import embeddings as embedding_module
+from app.core.observability import get_logger
+
+log = get_logger("app.core.embedding_server")
+
+
+class EmbeddingHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        model = self.server.model
+        while True:
+            try:
+                request, _ = embedding_module.recv_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                if request.get("op") == "info":
+                    embedding_module.send_frame(self.request, {"model": self.server.model_id})
+                    continue
+                texts = request["texts"]
+                vectors = [model.embed_query(texts[0])] if len(texts) == 1 else model.embed_documents(texts)
+                data = np.asarray(vectors, dtype=np.float32)
+                embedding_module.send_frame(self.request, {"count": data.shape[0], "dim": data.shape[1]}, data.tobytes())
+            except Exception as e:
+                embedding_module.send_frame(self.request, {"error": str(e)})
+
+
+class EmbeddingServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, model, model_id: str):
+        if os.path.exists(path):
+            os.unlink(path)  # stale socket from a previous run
+        super().__init__(path, EmbeddingHandler)
+        os.chmod(path, 0o660)
+        self.model = model
+        self.model_id = model_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve embeddings to local uvicorn workers")
+    parser.add_argument("--socket", default=embedding_module.EMBEDDING_SOCKET or "/tmp/medbot-embed.sock")
+    args = parser.parse_args()
+
+    embedding_module.EMBEDDING_SOCKET = None  # this process loads the model itself
+    model = embedding_module.get_embeddings()
+    if model is None:
+        raise SystemExit("Embedding model failed to load")
+    model.embed_query("warm up")
+
+    server = EmbeddingServer(args.socket, model, embedding_module.embedding_model_id())
+    log.info("embedding server listening", extra={"socket": args.socket, "model": server.model_id})
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,358 @@
-from langchain_huggingface import HuggingFaceEmbeddings
+import asyncio
+import hashlib
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import Future
 
-# Initialize HuggingFace embeddings
-try:
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2"
+import numpy as np
+
+from app.core.observability import get_logger
+
+log = get_logger(__name__)
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Inference backend: torch (sentence-transformers), onnx (ONNX Runtime fp32) or
+# onnx-int8 (dynamically quantized weights). Check parity first with
+# benchmarks/embed_backends.py before switching a deployment.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+# Local model.onnx / tokenizer.json; fetched from the Hugging Face hub when unset
+EMBEDDING_ONNX_PATH = os.getenv("EMBEDDING_ONNX_PATH")
+EMBEDDING_TOKENIZER_PATH = os.getenv("EMBEDDING_TOKENIZER_PATH")
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.expanduser("~/.cache/medbot"))
+EMBEDDING_MAX_LENGTH = int(os.getenv("EMBEDDING_MAX_LENGTH", "256"))  # MiniLM's max_seq_length
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # ONNX Runtime intra-op threads, 0 = all cores
+# Unix socket of a shared embedding worker (python -m app.core.embedding_server). When set,
+# uvicorn workers send texts there instead of each loading its own copy of the model.
+EMBEDDING_SOCKET = os.getenv("EMBEDDING_SOCKET")
+EMBEDDING_SOCKET_TIMEOUT = float(os.getenv("EMBEDDING_SOCKET_TIMEOUT", "30"))
+
+# Micro-batching: concurrent embed_query calls are coalesced into one encode() batch
+EMBEDDING_BATCHING = os.getenv("EMBEDDING_BATCHING", "1") == "1"
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "3"))
+EMBED_DOC_BATCH_SIZE = int(os.getenv("EMBED_DOC_BATCH_SIZE", "64"))
+
+
+class BatchingEmbeddings:
+    """
+    Wraps a LangChain embeddings object. Queries submitted from many threads are
+    collected for up to `max_wait_ms` (or until `max_batch_size`) and encoded in
+    a single forward pass by one background worker.
+    """
+
+    def __init__(self, base, max_batch_size: int = 32, max_wait_ms: float = 3, doc_batch_size: int = 64):
+        self.base = base
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.doc_batch_size = max(1, doc_batch_size)
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+        self.batches = 0
+        self.batched_queries = 0
+
+    # ----------------------------
+    # Query path (micro-batched)
+    # ----------------------------
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed_query(self, text: str):
+        return self.submit(text).result()
+
+    async def aembed_query(self, text: str):
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            pending = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+            try:
+                vectors = self.base.embed_documents([text for text, _ in pending])
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.batched_queries += len(pending)
+            for (_, future), vector in zip(pending, vectors):
+                future.set_result(vector)
+
+    # ----------------------------
+    # Document path (index builds)
+    # ----------------------------
+    def embed_documents(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.doc_batch_size):
+            vectors.extend(self.base.embed_documents(texts[start:start + self.doc_batch_size]))
+        return vectors
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "queries": self.batched_queries,
+            "avg_batch_size": round(self.batched_queries / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+class OnnxEmbeddings:
+    """
+    The same MiniLM model on ONNX Runtime: tokenizer.json + model.onnx, followed
+    by the mean pooling and L2 normalisation sentence-transformers applies.
+    Drop-in for HuggingFaceEmbeddings (embed_query / embed_documents).
+    """
+
+    def __init__(self, model_path: str, tokenizer_path: str, max_length: int = 256,
+                 threads: int = 0, batch_size: int = 64):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length)
+        pad_id = self.tokenizer.token_to_id("[PAD]") or 0
+        self.tokenizer.enable_padding(pad_id=pad_id, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        outputs = [o.name for o in self.session.get_outputs()]
+        self.output_name = "last_hidden_state" if "last_hidden_state" in outputs else outputs[0]
+        self.batch_size = max(1, batch_size)
+
+    def _encode(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        feed = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feed["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run([self.output_name], feed)[0]  # (batch, tokens, dim)
+
+        weights = mask[:, :, None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.tolist()
+
+    def embed_documents(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._encode(list(texts[start:start + self.batch_size])))
+        return vectors
+
+    def embed_query(self, text: str):
+        return self._encode([text])[0]
+
+
+def _onnx_files():
+    if EMBEDDING_ONNX_PATH and EMBEDDING_TOKENIZER_PATH:
+        return EMBEDDING_ONNX_PATH, EMBEDDING_TOKENIZER_PATH
+    from huggingface_hub import hf_hub_download
+
+    return (
+        EMBEDDING_ONNX_PATH or hf_hub_download(MODEL_NAME, "onnx/model.onnx"),
+        EMBEDDING_TOKENIZER_PATH or hf_hub_download(MODEL_NAME, "tokenizer.json"),
     )
-    print("✅ HuggingFace embeddings loaded successfully")
-except Exception as e:
-    print(f"❌ Error loading HuggingFace embeddings: {e}")
-    embeddings = None
+
+
+def quantize_model(model_path: str) -> str:
+    """Int8 dynamic quantization of `model_path`, cached in EMBEDDING_CACHE_DIR."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    source = os.path.realpath(model_path)
+    key = hashlib.sha1(f"{source}:{os.path.getsize(source)}".encode("utf-8")).hexdigest()[:12]
+    target = os.path.join(EMBEDDING_CACHE_DIR, f"model-{key}-int8.onnx")
+    if not os.path.exists(target):
+        os.makedirs(EMBEDDING_CACHE_DIR, exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        quantize_dynamic(source, tmp, weight_type=QuantType.QInt8)
+        os.replace(tmp, target)  # several workers may quantize at once; last rename wins
+        log.info("quantized embedding model to int8", extra={"path": target})
+    return target
+
+
+def load_backend(name: str = EMBEDDING_BACKEND, doc_batch_size: int = EMBED_DOC_BATCH_SIZE):
+    """Build the unwrapped embedding model for one of EMBEDDING_BACKENDS."""
+    if name == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        return HuggingFaceEmbeddings(
+            model_name=MODEL_NAME,
+            encode_kwargs={"batch_size": doc_batch_size, "normalize_embeddings": True},
+        )
+    if name in ("onnx", "onnx-int8"):
+        model_path, tokenizer_path = _onnx_files()
+        if name == "onnx-int8":
+            model_path = quantize_model(model_path)
+        return OnnxEmbeddings(
+            model_path, tokenizer_path, EMBEDDING_MAX_LENGTH, EMBEDDING_THREADS, doc_batch_size
+        )
+    raise ValueError(f"Unknown EMBEDDING_BACKEND {name!r}, expected one of {', '.join(EMBEDDING_BACKENDS)}")
+
+
+def embedding_model_id() -> str:
+    """Identifies which model/backend produced a set of vectors (stored with the index)."""
+    if EMBEDDING_SOCKET:
+        return get_embeddings().model_id
+    return f"{MODEL_NAME}@{EMBEDDING_BACKEND}"
+
+
+# ----------------------------
+# Client for the shared embedding worker
+# ----------------------------
+FRAME = struct.Struct("<I")
+
+
+def send_frame(sock, header: dict, payload: bytes = b""):
+    body = json.dumps(header).encode("utf-8")
+    sock.sendall(FRAME.pack(len(body)) + body + FRAME.pack(len(payload)) + payload)
+
+
+def _read_exact(sock, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("embedding socket closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock):
+    """(header dict, payload bytes) for one frame written by send_frame."""
+    header = json.loads(_read_exact(sock, FRAME.unpack(_read_exact(sock, FRAME.size))[0]))
+    payload = _read_exact(sock, FRAME.unpack(_read_exact(sock, FRAME.size))[0])
+    return header, payload
+
+
+class RemoteEmbeddings:
+    """
+    embed_query / embed_documents over a unix socket to the embedding server.
+    One connection per thread; reconnects once if the server restarted.
+    """
+
+    def __init__(self, path: str, timeout: float = EMBEDDING_SOCKET_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._model_id = None
+
+    def _connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            self._local.sock = sock
+        return sock
+
+    def _call(self, header: dict):
+        for attempt in range(2):
+            sock = self._connection()
+            try:
+                send_frame(sock, header)
+                reply, payload = recv_frame(sock)
+                break
+            except (ConnectionError, BrokenPipeError, socket.timeout):
+                sock.close()
+                self._local.sock = None
+                if attempt:
+                    raise
+        if "error" in reply:
+            raise RuntimeError(f"embedding server: {reply['error']}")
+        return reply, payload
+
+    @property
+    def model_id(self) -> str:
+        if self._model_id is None:
+            self._model_id = self._call({"op": "info"})[0]["model"]
+        return self._model_id
+
+    def embed_documents(self, texts):
+        if not texts:
+            return []
+        reply, payload = self._call({"op": "embed", "texts": list(texts)})
+        return np.frombuffer(payload, dtype=np.float32).reshape(reply["count"], reply["dim"]).tolist()
+
+    def embed_query(self, text: str):
+        return self.embed_documents([text])[0]
+
+
+# ----------------------------
+# Lazy model loading
+# ----------------------------
+# Importing sentence-transformers pulls in torch, so nothing is loaded until the
+# first get_embeddings() call (normally the background warm-up, see app.core.warmup).
+_load_lock = threading.Lock()
+_loaded = False
+base_embeddings = None
+embeddings = None
+
+
+def get_embeddings():
+    """Return the (batching) embeddings, loading the model on first call. None if it failed."""
+    global _loaded, base_embeddings, embeddings
+    if _loaded:
+        return embeddings
+    with _load_lock:
+        if _loaded:
+            return embeddings
+        try:
+            if EMBEDDING_SOCKET:
+                # The server owns the model (and micro-batches across all workers)
+                embeddings = base_embeddings = RemoteEmbeddings(EMBEDDING_SOCKET)
+                log.info("using embedding server", extra={"socket": EMBEDDING_SOCKET})
+            else:
+                base_embeddings = load_backend(EMBEDDING_BACKEND)
+                if EMBEDDING_BATCHING:
+                    embeddings = BatchingEmbeddings(
+                        base_embeddings,
+                        max_batch_size=EMBED_BATCH_MAX_SIZE,
+                        max_wait_ms=EMBED_BATCH_MAX_WAIT_MS,
+                        doc_batch_size=EMBED_DOC_BATCH_SIZE,
+                    )
+                else:
+                    embeddings = base_embeddings
+                log.info("embeddings loaded", extra={"backend": EMBEDDING_BACKEND})
+        except Exception as e:
+            log.error("error loading embeddings", extra={"backend": EMBEDDING_BACKEND, "error": str(e)})
+            base_embeddings = None
+            embeddings = None
+        _loaded = True
+    return embeddings
+
+
+def get_base_embeddings():
+    """The unwrapped model (no micro-batching), loading it if needed."""
+    get_embeddings()
+    return base_embeddings
+
+
+def peek_embeddings():
+    """The embeddings if already loaded, else None. Never blocks on a model load."""
+    return embeddings if _loaded else None
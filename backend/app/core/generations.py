@@ -0,0 +1,115 @@
+# ----------------------------
+# Index generations shared by several uvicorn workers
+# ----------------------------
+# Exactly one process, the holder of an flock on <index dir>/.writer.lock,
+# embeds changes and writes new generations. Every worker follows the CURRENT
+# pointer and loads the generation it names. rows.bin is always memory-mapped,
+# and so are flat/HNSW vectors in index.faiss when FAISS_MMAP is on and faiss
+# has IO_FLAG_MMAP_IFC: those pages are shared through the page cache. IVF
+# inverted lists (and any index read without IFC) are a private heap copy in
+# each worker; benchmarks/multiworker.py reports per-worker PSS/USS to show
+# which case a deployment is in. If the writer dies its lock is released
+# and the next worker to poll takes over. `kill -HUP <worker>` forces a check.
+import fcntl
+import os
+import signal
+import threading
+
+from app.core.observability import get_logger
+from app.core.vector_index import read_current_generation
+
+INDEX_ROLE = os.getenv("INDEX_ROLE", "auto")  # auto (flock election) | writer | reader
+INDEX_RELOAD_INTERVAL = float(os.getenv("INDEX_RELOAD_INTERVAL", "1"))
+LOCK_FILE = ".writer.lock"
+
+log = get_logger(__name__)
+
+
+class WriterLock:
+    """Advisory, process-lifetime lock deciding which worker writes index generations."""
+
+    def __init__(self, root: str, role: str = INDEX_ROLE):
+        self.path = os.path.join(root, LOCK_FILE)
+        self.role = role
+        self._fd = None
+
+    @property
+    def held(self) -> bool:
+        return self.role == "writer" or self._fd is not None
+
+    def try_acquire(self, blocking: bool = False) -> bool:
+        if self.role != "auto" or self._fd is not None:
+            return self.held
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())  # for humans: who is writing
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+writer_lock: WriterLock = None
+
+
+def is_writer() -> bool:
+    """True unless a lock was set up and another process holds it (single-process runs always write)."""
+    return writer_lock is None or writer_lock.held
+
+
+class GenerationWatcher(threading.Thread):
+    """
+    Polls CURRENT and calls `on_generation(name)` when it names a generation other
+    than `current_version()`. Given `on_promote`, also retries the writer lock and
+    calls it if this worker takes it over (one watcher per process should).
+    """
+
+    def __init__(self, root: str, current_version, on_generation, on_promote=None,
+                 interval: float = INDEX_RELOAD_INTERVAL):
+        super().__init__(name="generation-watcher", daemon=True)
+        self.root = root
+        self.current_version = current_version
+        self.on_generation = on_generation
+        self.on_promote = on_promote
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def install_signal_handler(self):
+        """SIGHUP triggers an immediate check (only possible from the main thread)."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGHUP, lambda *_: self.wake())
+
+    def run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                if self.on_promote is not None and writer_lock is not None and not writer_lock.held \
+                        and writer_lock.try_acquire():
+                    log.info("took over as index writer", extra={"pid": os.getpid()})
+                    self.on_promote()
+                name = read_current_generation(self.root)
+                if name is not None and name != self.current_version():
+                    self.on_generation(name)
+            except Exception as e:
+                log.warning("index generation check failed", extra={"error": str(e)})
@@ -0,0 +1,125 @@
+# ----------------------------
+# In-process keyword (BM25) index and rank fusion for hybrid retrieval
+# ----------------------------
+import re
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "for", "i", "in", "is", "me", "my", "near", "need", "of",
+    "on", "or", "please", "the", "to", "with", "find", "looking", "doctor", "doctors",
+    "specialist", "specialists", "have", "has", "am", "some", "any", "best", "good",
+}
+
+
+def _stem(token: str) -> str:
+    # Fold simple plurals so "cardiologists" matches "cardiologist"
+    if len(token) > 4 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str):
+    return [_stem(t) for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+class KeywordIndex:
+    """
+    BM25 over speciality, keywords, symptom_to_speciality and disease_examples,
+    with location tokens, specialities and fees kept alongside so filters
+    (from app.core.intent) are applied before scoring rather than after.
+    """
+
+    def __init__(self, rows: dict, k1: float = 1.5, b: float = 0.75):
+        self.ids = np.fromiter(rows.keys(), dtype=np.int64, count=len(rows))
+        self.fees = np.array(
+            [row.get("fee") if row.get("fee") is not None else -1 for row in rows.values()],
+            dtype=np.int64,
+        )
+        count = len(self.ids)
+
+        term_postings = {}
+        location_postings = {}
+        self.speciality_codes = {}
+        self.speciality_ids = np.zeros(count, dtype=np.int32)
+        lengths = np.zeros(count, dtype=np.float32)
+        for pos, row in enumerate(rows.values()):
+            speciality = row.get("speciality")
+            self.speciality_ids[pos] = self.speciality_codes.setdefault(speciality, len(self.speciality_codes))
+            text = " ".join(
+                row.get(field) or "" for field in ("speciality", "keywords", "symptoms", "diseases")
+            )
+            tokens = tokenize(text)
+            lengths[pos] = len(tokens)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                term_postings.setdefault(token, []).append((pos, tf))
+            for token in set(TOKEN_RE.findall((row.get("location") or "").lower())):
+                location_postings.setdefault(token, []).append(pos)
+
+        avg_length = float(lengths.mean()) if count else 0.0
+        self.postings = {}
+        for token, entries in term_postings.items():
+            positions = np.fromiter((p for p, _ in entries), dtype=np.int64, count=len(entries))
+            tf = np.fromiter((t for _, t in entries), dtype=np.float32, count=len(entries))
+            idf = np.log(1 + (count - len(entries) + 0.5) / (len(entries) + 0.5))
+            norm = k1 * (1 - b + b * lengths[positions] / (avg_length or 1.0))
+            # BM25 term weight is static per (term, doctor), so precompute it once
+            self.postings[token] = (positions, (idf * tf * (k1 + 1) / (tf + norm)).astype(np.float32))
+        self.locations = {
+            token: np.asarray(positions, dtype=np.int64) for token, positions in location_postings.items()
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def filter_mask(self, filters: dict):
+        """Boolean mask over doctors satisfying the filters, or None when unfiltered."""
+        if not filters:
+            return None
+        mask = np.ones(len(self.ids), dtype=bool)
+        if "city" in filters:
+            city_mask = np.zeros(len(self.ids), dtype=bool)
+            city_mask[self.locations.get(filters["city"], np.empty(0, dtype=np.int64))] = True
+            mask &= city_mask
+        if "max_fee" in filters:
+            mask &= (self.fees >= 0) & (self.fees <= filters["max_fee"])
+        if "min_fee" in filters:
+            mask &= self.fees >= filters["min_fee"]
+        if "specialities" in filters:
+            codes = [self.speciality_codes[s] for s in filters["specialities"] if s in self.speciality_codes]
+            mask &= np.isin(self.speciality_ids, codes)
+        return mask
+
+    def allowed_ids(self, mask):
+        return None if mask is None else self.ids[mask]
+
+    def search(self, query: str, k: int = 20, mask=None):
+        """Return [(doctor_id, bm25_score)] best first, restricted to `mask`."""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for token in set(tokenize(query)):
+            posting = self.postings.get(token)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+        if mask is not None:
+            scores[~mask] = 0.0
+        hits = np.flatnonzero(scores)
+        if len(hits) == 0:
+            return []
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(int(self.ids[pos]), float(scores[pos])) for pos in hits]
+
+
+def reciprocal_rank_fusion(rankings, k: int = 60, limit: int = 5):
+    """Fuse several ranked id lists: score(d) = sum(1 / (k + rank))."""
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return [doc_id for doc_id, _ in sorted(fused.items(), key=lambda item: -item[1])[:limit]]
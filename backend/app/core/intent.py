@@ -0,0 +1,309 @@
+# ----------------------------
+# Rule-based intent and entity extraction for chat routing
+# ----------------------------
+# One Aho-Corasick pass over the query's tokens finds every known phrase:
+# intent cues, speciality names and aliases, keyword/symptom/disease phrases
+# taken from the doctors table, cities and fee cues. Matching is on whole
+# (plural-folded) tokens, so "ent" no longer fires inside "patient".
+#
+# The vocabulary is rebuilt from the catalog snapshot whenever it is reloaded
+# (rebuild_extractor); until then a static seed vocabulary is used.
+import threading
+from collections import Counter
+
+from app.core.hybrid import TOKEN_RE, _stem
+
+INTENT_PHRASES = {
+    # Strong cues name a provider; weak ones only say the user wants something
+    "doctor_search": [
+        "doctor", "dr", "physician", "specialist", "surgeon", "consultant", "clinic", "hospital",
+        "appointment", "book", "near me",
+    ],
+    "doctor_search_weak": ["find", "need", "looking for", "search", "recommend", "suggest", "refer"],
+    "health_info": [
+        "what is", "what are", "what causes", "symptom of", "sign of", "cause of", "causes",
+        "treatment for", "treatment of", "how to", "how do", "how can", "why", "cure", "prevent",
+        "side effect", "is it normal",
+    ],
+    "greeting": [
+        "hi", "hello", "hey", "salam", "assalam o alaikum", "assalamualaikum", "aoa",
+        "good morning", "good evening",
+    ],
+    "thanks": ["thanks", "thank you", "thankyou", "thx", "shukriya", "jazakallah"],
+}
+
+# Everyday words and conditions -> prefixes of speciality tokens they point to (a hint, never a filter)
+SPECIALITY_ALIASES = {
+    "heart": ["cardio"], "cardio": ["cardio"], "cardiac": ["cardio"],
+    "gynae": ["gyn"], "gyne": ["gyn"], "women": ["gyn"], "pregnancy": ["gyn"], "pregnant": ["gyn"],
+    "skin": ["skin", "dermat"], "hair": ["dermat", "skin"],
+    "bone": ["ortho"], "joint": ["ortho"], "fracture": ["ortho"],
+    "eye": ["ophthal", "eye"], "vision": ["ophthal", "eye"],
+    "brain": ["neuro"], "nerve": ["neuro"],
+    "child": ["pediatr", "paediatr", "child"], "children": ["pediatr", "paediatr", "child"],
+    "kid": ["pediatr", "paediatr", "child"], "baby": ["pediatr", "paediatr", "child"],
+    "teeth": ["dent"], "tooth": ["dent"], "dental": ["dent"],
+    "ent": ["ent"], "ear": ["ent"], "nose": ["ent"], "throat": ["ent"],
+    "kidney": ["nephro", "uro"], "urine": ["uro"],
+    "diabetes": ["diabet", "endocrin"], "sugar": ["diabet", "endocrin"],
+    "mental": ["psychiatr", "psycholog"], "cancer": ["oncolog"], "stomach": ["gastro"],
+    "lung": ["pulmon"], "general": ["general"],
+}
+
+CITIES = [
+    "karachi", "lahore", "rawalpindi", "islamabad", "peshawar", "quetta", "hyderabad",
+    "multan", "faisalabad", "sialkot", "gujranwala", "abbottabad",
+]
+
+FEE_CUES = {
+    "max_fee": ["under", "below", "less than", "max", "maximum", "upto", "up to", "within", "not more than"],
+    "min_fee": ["above", "over", "more than", "min", "minimum", "at least"],
+}
+CURRENCY_TOKENS = {"rs", "pkr", "rupee"}
+
+# A keyword/symptom phrase names a speciality when at least this share of the doctors listing it have it
+SYMPTOM_SHARE = 0.2
+# Location suffixes seen at least this often are treated as cities
+MIN_CITY_COUNT = 3
+
+
+def normalize_tokens(text: str):
+    return [_stem(t) for t in TOKEN_RE.findall((text or "").lower())]
+
+
+class TokenMatcher:
+    """Aho-Corasick automaton over token sequences: finds every phrase in one left-to-right pass."""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+    def add(self, tokens, payload):
+        node = 0
+        for token in tokens:
+            nxt = self._goto[node].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][token] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(tokens), payload))
+
+    def build(self):
+        """Compute failure links breadth-first and merge the outputs they lead to."""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for token, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(token, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+        return self
+
+    def scan(self, tokens):
+        """Yield (start, end, payload) for every phrase occurrence; end is exclusive."""
+        node = 0
+        for i, token in enumerate(tokens):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for length, payload in self._out[node]:
+                yield i + 1 - length, i + 1, payload
+
+
+class Extraction:
+    """Intent and entities found in one query."""
+
+    __slots__ = ("intent", "specialities", "explicit", "city", "min_fee", "max_fee", "terms")
+
+    def __init__(self):
+        self.intent = "other"  # doctor_search | health_info | thanks | greeting | other
+        self.specialities = frozenset()  # speciality values as stored in the doctors table
+        self.explicit = False  # specialities named outright ("cardiologist"), not inferred from a symptom
+        self.city = None
+        self.min_fee = None
+        self.max_fee = None
+        self.terms = []  # matched phrases, for debugging
+
+    @property
+    def clear(self) -> bool:
+        """A doctor search with a known speciality: the reply can be templated without the LLM."""
+        return self.intent == "doctor_search" and bool(self.specialities)
+
+    def filters(self) -> dict:
+        """Constraints retrieval can pre-filter on. Inferred specialities are only a ranking hint."""
+        filters = {}
+        if self.city:
+            filters["city"] = self.city
+        if self.max_fee is not None:
+            filters["max_fee"] = self.max_fee
+        if self.min_fee is not None:
+            filters["min_fee"] = self.min_fee
+        if self.explicit and self.specialities:
+            filters["specialities"] = self.specialities
+        return filters
+
+    def to_dict(self) -> dict:
+        return {
+            "intent": self.intent,
+            "specialities": sorted(self.specialities),
+            "explicit": self.explicit,
+            "city": self.city,
+            "min_fee": self.min_fee,
+            "max_fee": self.max_fee,
+            "terms": self.terms,
+        }
+
+
+def _fee_after(tokens, end: int):
+    """Amount following a fee cue ("under rs 2,000" -> 2000), or None."""
+    i = end
+    while i < len(tokens) and tokens[i] in CURRENCY_TOKENS:
+        i += 1
+    if i >= len(tokens):
+        return None
+    digits, thousands = tokens[i], tokens[i + 1:i + 2] == ["k"]
+    if digits.endswith("k") and digits[:-1].isdigit():
+        digits, thousands = digits[:-1], True  # "3k"
+    if not digits.isdigit():
+        return None
+    if len(digits) <= 3 and i + 1 < len(tokens) and len(tokens[i + 1]) == 3 and tokens[i + 1].isdigit():
+        digits += tokens[i + 1]  # thousands separator split the number
+    if thousands:
+        digits += "000"
+    return int(digits) if 3 <= len(digits) <= 6 else None
+
+
+class IntentExtractor:
+    def __init__(self, records=()):
+        self.matcher = TokenMatcher()
+        for intent, phrases in INTENT_PHRASES.items():
+            for phrase in phrases:
+                self.matcher.add(normalize_tokens(phrase), ("intent", intent))
+        for field, phrases in FEE_CUES.items():
+            for phrase in phrases:
+                self.matcher.add(normalize_tokens(phrase), ("fee", field))
+
+        specialities = Counter()
+        phrase_specialities = {}  # (kind, tokens) -> Counter of specialities
+        city_counts = Counter()
+        for record in records:
+            speciality = (record.speciality or "").strip()
+            if speciality:
+                specialities[speciality] += 1
+                for part in speciality.split("|"):
+                    self._count(phrase_specialities, "speciality", part, speciality)
+            for field, kind in (("keywords", "speciality"), ("symptom_to_speciality", "symptom"),
+                                ("disease_examples", "symptom")):
+                for part in _split_phrases(getattr(record, field, None)):
+                    if speciality:
+                        self._count(phrase_specialities, kind, part, speciality)
+            suffix = (record.location or "").rstrip(" ,.").rsplit(",", 1)[-1].strip().lower()
+            if suffix and len(TOKEN_RE.findall(suffix)) == 1:
+                city_counts[suffix] += 1
+
+        for (kind, tokens), counts in phrase_specialities.items():
+            if kind == "symptom":
+                total = sum(counts.values())
+                values = [s for s, n in counts.items() if n / total >= SYMPTOM_SHARE]
+            else:
+                values = list(counts)
+            self.matcher.add(list(tokens), (kind, frozenset(values)))
+
+        speciality_tokens = {s: set(normalize_tokens(s)) for s in specialities}
+        for alias, prefixes in SPECIALITY_ALIASES.items():
+            values = frozenset(
+                s for s, tokens in speciality_tokens.items()
+                if any(t.startswith(p) for t in tokens for p in prefixes)
+            )
+            if values:
+                self.matcher.add(normalize_tokens(alias), ("symptom", values))
+
+        cities = set(CITIES) | {c for c, n in city_counts.items() if n >= MIN_CITY_COUNT and not c.isdigit()}
+        for city in cities:
+            self.matcher.add(normalize_tokens(city), ("city", city))
+        self.cities = cities
+        self.matcher.build()
+
+    @staticmethod
+    def _count(phrase_specialities, kind, phrase, speciality):
+        tokens = tuple(normalize_tokens(phrase))
+        if tokens and not (len(tokens) == 1 and tokens[0] in _GENERIC_TOKENS):
+            phrase_specialities.setdefault((kind, tokens), Counter())[speciality] += 1
+
+    def extract(self, query: str) -> Extraction:
+        tokens = normalize_tokens(query)
+        result = Extraction()
+        intents = set()
+        explicit, inferred = [], []  # (length, values) of speciality matches
+        for start, end, (kind, value) in self.matcher.scan(tokens):
+            if kind == "intent":
+                intents.add(value)
+            elif kind == "fee":
+                amount = _fee_after(tokens, end)
+                if amount is not None:
+                    setattr(result, value, amount)
+            elif kind == "city":
+                result.city = result.city or value
+            elif kind == "speciality":
+                explicit.append((end - start, value))
+            elif kind == "symptom":
+                inferred.append((end - start, value))
+            else:
+                continue
+            result.terms.append(" ".join(tokens[start:end]))
+
+        if explicit:
+            # The longest named speciality wins ("general surgeon" over "surgeon")
+            longest = max(length for length, _ in explicit)
+            result.specialities = frozenset().union(*(v for n, v in explicit if n == longest))
+            result.explicit = True
+        elif inferred:
+            longest = max(length for length, _ in inferred)
+            result.specialities = frozenset().union(*(v for n, v in inferred if n == longest))
+
+        has_constraints = result.city is not None or result.max_fee is not None or result.min_fee is not None
+        if "doctor_search" in intents or result.explicit or has_constraints:
+            result.intent = "doctor_search"
+        elif "health_info" in intents:
+            result.intent = "health_info"
+        elif "doctor_search_weak" in intents or result.specialities:
+            result.intent = "doctor_search"  # includes bare symptoms ("skin rash and itching")
+        elif "thanks" in intents:
+            result.intent = "thanks"  # "hi, thanks!" is an acknowledgement, not a new conversation
+        elif "greeting" in intents:
+            result.intent = "greeting"
+        return result
+
+
+# Single words from the data that say nothing about the speciality on their own
+_GENERIC_TOKENS = {"doctor", "specialist", "surgeon", "consultant", "physician", "general", "medical", "pain"}
+
+
+def _split_phrases(text: str):
+    if not text:
+        return []
+    return [part.strip() for chunk in text.split(";") for part in chunk.split(",") if part.strip()]
+
+
+_extractor = IntentExtractor()
+_lock = threading.Lock()
+
+
+def rebuild_extractor(snapshot) -> IntentExtractor:
+    """Rebuild the vocabulary from a catalog snapshot (app.core.catalog) and publish it."""
+    global _extractor
+    extractor = IntentExtractor(snapshot.records() if snapshot is not None else ())
+    with _lock:
+        _extractor = extractor
+    return extractor
+
+
+def extract(query: str) -> Extraction:
+    return _extractor.extract(query)
@@ -0,0 +1,121 @@
+# ----------------------------
+# Shared Groq LLM client for Med-Bot
+# ----------------------------
+import os
+import threading
+from collections import deque
+import httpx
+from dotenv import load_dotenv
+from app.core.observability import get_logger
+
+load_dotenv()
+log = get_logger(__name__)
+
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# Override the Groq endpoint, e.g. to point at benchmarks/stub_llm.py during load tests
+GROQ_API_BASE = os.getenv("GROQ_API_BASE")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "15"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+
+# Recent upstream call latencies kept for percentile estimates (hedging delay)
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "500"))
+
+SYSTEM_PROMPT = (
+    "You are Med-Bot, a friendly AI medical assistant. When doctors are found, keep responses "
+    "brief since doctor cards will be displayed. Never list individual doctor details - just "
+    "mention the count and specialty."
+)
+
+_http_client: httpx.AsyncClient = None
+_llm = None  # ChatGroq; langchain is imported on first use to keep app import fast
+_llm_lock = threading.Lock()
+
+
+def llm_enabled() -> bool:
+    return bool(GROQ_API_KEY and GROQ_API_KEY.strip())
+
+
+def get_llm():
+    """
+    Return the process-wide ChatGroq client, creating it on first use.
+    All requests share one pooled, keep-alive HTTP connection pool.
+    """
+    global _http_client, _llm
+
+    if _llm is not None or not llm_enabled():
+        return _llm
+
+    with _llm_lock:
+        if _llm is not None:
+            return _llm
+        from langchain_groq import ChatGroq
+
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+        )
+
+        options = {"base_url": GROQ_API_BASE} if GROQ_API_BASE else {}
+        _llm = ChatGroq(
+            groq_api_key=GROQ_API_KEY,
+            model=GROQ_MODEL,
+            temperature=0.3,
+            max_tokens=200,
+            max_retries=0,  # the chat endpoint owns timeouts and falls back to templates
+            http_async_client=_http_client,
+            **options,
+        )
+        log.info("groq client ready", extra={"pool": LLM_MAX_CONNECTIONS, "keepalive": LLM_MAX_KEEPALIVE})
+    return _llm
+
+
+class LatencyWindow:
+    """The last `size` call latencies (seconds), for percentile estimates. Thread-safe."""
+
+    def __init__(self, size: int = LLM_LATENCY_WINDOW):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float):
+        """Nearest-rank percentile of the window, or None while it is empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, max(0, int(round(pct / 100 * len(samples))) - 1))]
+
+
+# Time from sending a completion request to its answer, queueing excluded
+llm_latency = LatencyWindow()
+
+
+def build_messages(prompt: str):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+async def close_llm():
+    """Release pooled connections on shutdown."""
+    global _http_client, _llm
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _llm = None
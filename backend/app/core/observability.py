@@ -0,0 +1,260 @@
+# ----------------------------
+# Request tracing, per-stage latency histograms and structured logging
+# ----------------------------
+# `span("embed")` times a block into the medbot_stage_seconds histogram and,
+# inside a request, into that request's Trace (chat returns it when asked with
+# "debug": true). /metrics renders every metric in the Prometheus text format;
+# values are per process, so scrape each worker.
+#
+# Logs are one JSON object per line (LOG_FORMAT=text for a terminal). Records
+# below WARNING that belong to a request are only kept for a LOG_SAMPLE_RATE
+# fraction of requests; warnings, errors and anything outside a request always are.
+import contextvars
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json | text
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+# Seconds; covers a cached FAISS lookup (sub-ms) up to a slow LLM call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+# ----------------------------
+# Metrics
+# ----------------------------
+def _label_text(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with fixed label names, safe to observe from any thread."""
+
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, tuple(labels), tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = {key: list(values) for key, values in sorted(self._series.items())}
+        for key, values in series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                yield f"{self.name}_bucket{_label_text(self.labels + ('le',), key + (bound,))} {cumulative}"
+            yield f"{self.name}_bucket{_label_text(self.labels + ('le',), key + ('+Inf',))} {values[-1]}"
+            yield f"{self.name}_sum{_label_text(self.labels, key)} {values[-2]:.6f}"
+            yield f"{self.name}_count{_label_text(self.labels, key)} {values[-1]}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_label_text(self.labels, key)} {value}"
+
+
+class Gauge:
+    """Read at scrape time from `collect()`, which returns {label values tuple: value}."""
+
+    def __init__(self, name: str, help: str, labels, collect):
+        self.name, self.help, self.labels, self.collect = name, help, tuple(labels), collect
+        REGISTRY.append(self)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        try:
+            values = sorted(self.collect().items())
+        except Exception:
+            return  # a gauge whose source is not up yet is simply absent
+        for key, value in values:
+            yield f"{self.name}{_label_text(self.labels, key)} {value}"
+
+
+REGISTRY = []
+
+STAGE_SECONDS = Histogram(
+    "medbot_stage_seconds", "Time spent in one pipeline stage (embed, vector_search, hydrate, llm, ...)", ("stage",)
+)
+REQUEST_SECONDS = Histogram("medbot_request_seconds", "End-to-end request latency", ("endpoint",))
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+# ----------------------------
+# Tracing
+# ----------------------------
+class Trace:
+    """Stage timings of one request. Repeated stages are summed."""
+
+    def __init__(self, name: str, sampled: bool = None):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.sampled = random.random() < LOG_SAMPLE_RATE if sampled is None else sampled
+        self.started = time.perf_counter()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def finish(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        REQUEST_SECONDS.observe(elapsed, endpoint=self.name)
+        return elapsed
+
+    def timings(self) -> dict:
+        with self._lock:
+            stages = {stage: round(seconds * 1000, 2) for stage, seconds in self.stages.items()}
+        return {
+            "trace_id": self.id,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "stages_ms": stages,
+        }
+
+
+_current_trace = contextvars.ContextVar("medbot_trace", default=None)
+
+
+def current_trace() -> Trace:
+    return _current_trace.get()
+
+
+@contextmanager
+def activate(trace: Trace):
+    """Make `trace` current here and in worker threads started from here (anyio copies contextvars)."""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(stage: str, trace: Trace = None):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        trace = trace or _current_trace.get()
+        if trace is not None:
+            trace.add(stage, elapsed)
+
+
+# ----------------------------
+# Logging
+# ----------------------------
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def _fields(record) -> dict:
+    """Everything passed through `extra=` on the logging call."""
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_FIELDS}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        trace = _current_trace.get()
+        if trace is not None:
+            entry["trace_id"] = trace.id
+        entry.update(_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record) -> str:
+        line = super().format(record)
+        fields = _fields(record)
+        return line + "".join(f" {k}={v}" for k, v in fields.items()) if fields else line
+
+
+class SamplingFilter(logging.Filter):
+    def filter(self, record) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        trace = _current_trace.get()
+        return trace is None or trace.sampled
+
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure_logging():
+    """Attach the structured handler to the `app` logger (once)."""
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+        handler.addFilter(SamplingFilter())
+        logger = logging.getLogger("app")
+        logger.addHandler(handler)
+        logger.setLevel(LOG_LEVEL)
+        logger.propagate = False  # uvicorn's root handlers would print every record twice
+        _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    configure_logging()
+    return logging.getLogger(name)
@@ -0,0 +1,95 @@
+# ----------------------------
+# Per-city vector sub-indexes for city-scoped queries
+# ----------------------------
+# A query naming a city used to search the national index through an
+# IDSelector: FAISS still walks every vector (and the selector, a hash set of
+# the city's ids, is rebuilt per query), and on HNSW / IVF a selective filter
+# loses recall because the graph or the probed lists run out of in-city
+# neighbours. A partition is an exact (flat) copy of one city's vectors, cut
+# from the published index, so those queries only scan their own city.
+#
+# Cities are the single-word location suffixes app.core.intent also extracts;
+# membership is the same location-token match the keyword filter uses, so a
+# partition holds exactly the doctors the city filter would allow. Small
+# cities stay on the filtered global search, where the selector is cheap.
+import os
+from collections import Counter
+
+import faiss
+import numpy as np
+
+from app.core.hybrid import TOKEN_RE, KeywordIndex
+from app.core.observability import get_logger
+
+log = get_logger(__name__)
+
+CITY_PARTITIONS = os.getenv("CITY_PARTITIONS", "1") == "1"
+PARTITION_MIN_ROWS = int(os.getenv("PARTITION_MIN_ROWS", "200"))
+# An exact scan of a huge city costs more than an approximate (HNSW/IVF) global
+# search; those cities keep the filtered global search. 0 = no limit.
+PARTITION_MAX_ROWS = int(os.getenv("PARTITION_MAX_ROWS", "50000"))
+
+
+def city_of(location: str):
+    """Single-word city suffix of a location ("DHA Phase 5, Lahore" -> "lahore"), or None."""
+    suffix = (location or "").rstrip(" ,.").rsplit(",", 1)[-1].strip().lower()
+    tokens = TOKEN_RE.findall(suffix)
+    return tokens[0] if len(tokens) == 1 and not tokens[0].isdigit() else None
+
+
+class CityPartitions:
+    """Flat sub-indexes, one per large enough city, over one published VectorIndex."""
+
+    def __init__(self, store, keywords: KeywordIndex, min_rows: int = PARTITION_MIN_ROWS,
+                 max_rows: int = PARTITION_MAX_ROWS):
+        self.store = store  # partitions are only valid alongside this exact index
+        self.indexes = {}
+        counts = Counter(city_of(row.get("location")) for row in store.rows.values())
+        counts.pop(None, None)
+        for city, count in counts.most_common():
+            positions = keywords.locations.get(city)
+            if count < min_rows or positions is None:
+                continue
+            if max_rows and len(positions) > max_rows and store.kind != "flat":
+                continue
+            ids = keywords.ids[positions]
+            vectors = store.vectors(ids)
+            if vectors is None:
+                return  # PQ codes only: no exact vectors to copy, filtered global search it is
+            index = faiss.IndexIDMap2(faiss.IndexFlatL2(store.dim))
+            index.add_with_ids(np.ascontiguousarray(vectors, dtype=np.float32), ids)
+            self.indexes[city] = index
+
+    @classmethod
+    def build(cls, store, keywords: KeywordIndex):
+        """Partitions for `store`, or None when disabled or nothing qualifies."""
+        if not CITY_PARTITIONS or store is None or keywords is None:
+            return None
+        try:
+            partitions = cls(store, keywords)
+        except Exception as e:
+            log.warning("could not build city partitions", extra={"error": str(e)})
+            return None
+        if partitions.indexes:
+            log.info("built city partitions", extra=partitions.stats())
+        return partitions if partitions.indexes else None
+
+    def __contains__(self, city) -> bool:
+        return city in self.indexes
+
+    def search(self, city: str, vector, k: int = 5, allowed_ids=None):
+        """[(doctor_id, distance)] nearest first within `city`, optionally restricted further."""
+        index = self.indexes[city]
+        query = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        if allowed_ids is None:
+            distances, ids = index.search(query, min(k, index.ntotal))
+        else:
+            if len(allowed_ids) == 0:
+                return []
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(np.asarray(allowed_ids, dtype=np.int64)))
+            distances, ids = index.search(query, min(k, len(allowed_ids), index.ntotal), params=params)
+        return [(int(i), float(d)) for i, d in zip(ids[0], distances[0]) if i != -1]
+
+    def stats(self) -> dict:
+        sizes = {city: index.ntotal for city, index in self.indexes.items()}
+        return {"cities": len(sizes), "rows": sum(sizes.values()), "largest": max(sizes.values(), default=0)}
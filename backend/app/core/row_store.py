@@ -0,0 +1,243 @@
+# ----------------------------
+# Columnar, memory-mapped metadata for the vector index
+# ----------------------------
+# rows.bin layout (little endian):
+#
+#   magic "MEDBOTRW" | uint32 format | uint32 header length | JSON header
+#   header: {"format", "version", "model", "dim", "rows", "columns": {name: {...}}}
+#   column blocks (offsets relative to the first 8-byte boundary after the header):
+#     id                int64[rows], sorted ascending
+#     int columns       int64[rows] (INT_NULL for None)
+#     float columns     float64[rows] (NaN for None)
+#     str columns       uint64 offsets[rows + 1] + uint8 null mask[rows] + utf-8 blob
+#
+# Readers np.memmap the file, so opening it is O(1) and every worker process
+# shares the same page-cache pages. Nothing is unpickled.
+import json
+import mmap
+import os
+import struct
+from collections.abc import Mapping, MutableMapping
+
+import numpy as np
+
+MAGIC = b"MEDBOTRW"
+FORMAT_VERSION = 1
+INT_NULL = int(np.iinfo(np.int64).min)
+_PREFIX = struct.Struct("<8sII")
+
+
+def _align(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def _column_type(values) -> str:
+    present = [v for v in values if v is not None]
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return "int"
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return "float"
+    return "str"
+
+
+def _encode_column(values):
+    kind = _column_type(values)
+    if kind == "int":
+        return kind, [np.array([INT_NULL if v is None else v for v in values], dtype=np.int64).tobytes()]
+    if kind == "float":
+        return kind, [np.array([np.nan if v is None else v for v in values], dtype=np.float64).tobytes()]
+    encoded = [b"" if v is None else str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    nulls = np.array([v is None for v in values], dtype=np.uint8)
+    return kind, [offsets.tobytes(), nulls.tobytes(), b"".join(encoded)]
+
+
+def write_rows(path: str, rows: Mapping, header: dict = None):
+    """Write `rows` ({id: {column: value}}) to `path`; `header` adds version/model/dim fields."""
+    ids = np.array(sorted(rows), dtype=np.int64)
+    records = [rows[int(i)] for i in ids]
+    names = list(dict.fromkeys(name for record in records for name in record))
+
+    columns = [("id", "int", [ids.tobytes()])]
+    columns += [(name, *_encode_column([r.get(name) for r in records])) for name in names]
+
+    meta = {**(header or {}), "format": FORMAT_VERSION, "rows": len(ids), "columns": {}}
+    position = 0
+    for name, kind, parts in columns:
+        starts = []
+        for part in parts:
+            starts.append(position)
+            position = _align(position + len(part))
+        meta["columns"][name] = {"type": kind, "offsets": starts}
+    header_bytes = json.dumps(meta, separators=(",", ":"), default=str).encode("utf-8")
+    base = _align(_PREFIX.size + len(header_bytes))
+
+    with open(path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, _, parts in columns:
+            for part, start in zip(parts, meta["columns"][name]["offsets"]):
+                f.write(b"\0" * (base + start - f.tell()))
+                f.write(part)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class RowFile(Mapping):
+    """Read-only {id: row dict} view over a memory-mapped rows.bin. Rows are decoded on access."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            magic, version, header_length = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a row store file")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"{path} has row store format {version}, expected {FORMAT_VERSION}")
+            self.header = json.loads(f.read(header_length))
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        base = _align(_PREFIX.size + header_length)
+        count = self.header["rows"]
+
+        self._columns = {}
+        for name, info in self.header["columns"].items():
+            starts = [base + offset for offset in info["offsets"]]
+            if info["type"] == "str":
+                offsets = np.frombuffer(self._map, np.uint64, count + 1, starts[0])
+                nulls = np.frombuffer(self._map, np.uint8, count, starts[1])
+                self._columns[name] = ("str", (offsets, nulls, starts[2]))
+            else:
+                dtype = np.int64 if info["type"] == "int" else np.float64
+                self._columns[name] = (info["type"], np.frombuffer(self._map, dtype, count, starts[0]))
+        self.ids = self._columns.pop("id")[1]
+
+    def column(self, name: str):
+        """Whole numeric column as a zero-copy array (INT_NULL / NaN for missing values)."""
+        kind, data = self._columns[name]
+        if kind == "str":
+            raise TypeError(f"{name} is a string column")
+        return data
+
+    def _position(self, doc_id):
+        pos = int(np.searchsorted(self.ids, doc_id))
+        if pos < len(self.ids) and self.ids[pos] == doc_id:
+            return pos
+        return None
+
+    def _value(self, name: str, pos: int):
+        kind, data = self._columns[name]
+        if kind == "str":
+            offsets, nulls, blob = data
+            if nulls.item(pos):
+                return None
+            return self._map[blob + offsets.item(pos):blob + offsets.item(pos + 1)].decode("utf-8")
+        value = data.item(pos)
+        if kind == "int":
+            return None if value == INT_NULL else value
+        return None if value != value else value  # NaN
+
+    def _row(self, pos: int) -> dict:
+        return {name: self._value(name, pos) for name in self._columns}
+
+    def field(self, doc_id, name: str):
+        """One column of one row, without decoding the rest of it."""
+        pos = self._position(doc_id)
+        if pos is None:
+            raise KeyError(doc_id)
+        return self._value(name, pos) if name in self._columns else None
+
+    def __getitem__(self, doc_id):
+        pos = self._position(doc_id)
+        if pos is None:
+            raise KeyError(doc_id)
+        return self._row(pos)
+
+    def __contains__(self, doc_id):
+        return self._position(doc_id) is not None
+
+    def __iter__(self):
+        return iter(self.ids.tolist())
+
+    def __len__(self):
+        return len(self.ids)
+
+    def values(self):
+        return (self._row(pos) for pos in range(len(self.ids)))
+
+    def items(self):
+        return ((doc_id, self._row(pos)) for pos, doc_id in enumerate(self.ids.tolist()))
+
+
+class RowStore(MutableMapping):
+    """
+    Copy-on-write {id: row dict}: a read-only RowFile (or nothing) plus in-memory
+    changes and removals. copy() is O(changes), so syncs never materialise the
+    whole catalog just to edit a few rows.
+    """
+
+    def __init__(self, base: Mapping = None, changes: dict = None, removed: set = None, shadowed: int = 0):
+        self.base = base if base is not None else {}
+        self._changes = changes if changes is not None else {}
+        self._removed = removed if removed is not None else set()  # base ids deleted
+        self._shadowed = shadowed  # base ids overridden by _changes
+
+    def copy(self):
+        return RowStore(self.base, dict(self._changes), set(self._removed), self._shadowed)
+
+    def field(self, doc_id, name: str):
+        if doc_id in self._changes:
+            return self._changes[doc_id].get(name)
+        if doc_id in self._removed or doc_id not in self.base:
+            raise KeyError(doc_id)
+        if isinstance(self.base, RowFile):
+            return self.base.field(doc_id, name)
+        return self.base[doc_id].get(name)
+
+    def __getitem__(self, doc_id):
+        if doc_id in self._changes:
+            return self._changes[doc_id]
+        if doc_id in self._removed:
+            raise KeyError(doc_id)
+        return self.base[doc_id]
+
+    def __setitem__(self, doc_id, row):
+        if doc_id not in self._changes and doc_id in self.base:
+            self._removed.discard(doc_id)
+            self._shadowed += 1
+        self._changes[doc_id] = row
+
+    def __delitem__(self, doc_id):
+        if doc_id in self._changes:
+            del self._changes[doc_id]
+            if doc_id in self.base:
+                self._shadowed -= 1
+                self._removed.add(doc_id)
+        elif doc_id in self.base and doc_id not in self._removed:
+            self._removed.add(doc_id)
+        else:
+            raise KeyError(doc_id)
+
+    def __contains__(self, doc_id):
+        if doc_id in self._changes:
+            return True
+        return doc_id not in self._removed and doc_id in self.base
+
+    def __iter__(self):
+        for doc_id in self.base:
+            if doc_id not in self._removed and doc_id not in self._changes:
+                yield doc_id
+        yield from self._changes
+
+    def __len__(self):
+        return len(self.base) - len(self._removed) - self._shadowed + len(self._changes)
+
+    def items(self):
+        # Same order as __iter__, but walks the base file positionally instead of by id lookups
+        for doc_id, row in self.base.items():
+            if doc_id not in self._removed and doc_id not in self._changes:
+                yield doc_id, row
+        yield from self._changes.items()
+
+    def values(self):
+        return (row for _, row in self.items())
@@ -0,0 +1,343 @@
+# ----------------------------
+# ID-mapped FAISS index with atomic, generation-based persistence
+# ----------------------------
+# On-disk layout (FAISS_INDEX_PATH):
+#
+#   CURRENT               name of the active generation, swapped with os.replace
+#   gen-000042/
+#     index.faiss         IndexIDMap2 keyed by doctors.id
+#     rows.bin            columnar, memory-mapped row metadata (see app.core.row_store):
+#                         content hash, updated_at, card fields and keyword text
+#
+# A new generation is fully written to a temp directory and renamed into place
+# before CURRENT is switched, so readers never see a half-written index.
+#
+# INDEX_TYPE selects the FAISS structure: flat (exact), hnsw, ivf-flat or ivf-pq.
+# IVF kinds are trained on the vectors being indexed; HNSW cannot delete, so a
+# removal rebuilds it from its own stored vectors.
+import json
+import math
+import os
+import shutil
+
+import faiss
+import numpy as np
+
+from app.core.observability import get_logger
+from app.core.row_store import RowFile, RowStore, write_rows
+
+log = get_logger(__name__)
+
+CURRENT_FILE = "CURRENT"
+INDEX_FILE = "index.faiss"
+ROWS_FILE = "rows.bin"
+LEGACY_MANIFEST_FILE = "manifest.json"  # generations written before rows.bin; read-only
+KEEP_GENERATIONS = int(os.getenv("INDEX_KEEP_GENERATIONS", "2"))
+# Memory-map index.faiss instead of reading it onto the heap. Needs IO_FLAG_MMAP_IFC
+# (faiss >= 1.11): flat and HNSW vectors then stay file-backed pages, so loading is
+# near-instant and workers mapping the same generation share them; IVF inverted lists
+# are still copied onto the heap. Plain IO_FLAG_MMAP is never used: it turns IVF lists
+# into OnDiskInvertedLists, which copy() cannot clone. Without IFC indexes load onto the heap.
+FAISS_MMAP = os.getenv("FAISS_MMAP", "1") == "1"
+MMAP_SUPPORTED = hasattr(faiss, "IO_FLAG_MMAP_IFC")
+
+INDEX_TYPE = os.getenv("INDEX_TYPE", "flat")
+INDEX_TYPES = ("flat", "hnsw", "ivf-flat", "ivf-pq")
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "80"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))  # 0 = about 4 * sqrt(rows), retrained as the catalog grows
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+PQ_M = int(os.getenv("PQ_M", "16"))  # sub-quantizers, must divide the dimension (384 for MiniLM)
+PQ_NBITS = int(os.getenv("PQ_NBITS", "8"))
+INDEX_TRAIN_SIZE = int(os.getenv("INDEX_TRAIN_SIZE", "100000"))  # max vectors sampled for training
+
+
+def _generation_name(number: int) -> str:
+    return f"gen-{number:06d}"
+
+
+def _generation_number(name: str) -> int:
+    try:
+        return int(name.split("-", 1)[1])
+    except (IndexError, ValueError):
+        return 0
+
+
+def auto_nlist(rows: int) -> int:
+    # faiss wants >= 39 training points per centroid
+    return max(1, min(int(4 * math.sqrt(rows)), rows // 39))
+
+
+def min_rows(kind: str) -> int:
+    """Fewest vectors `kind` can be trained on; smaller catalogs fall back to flat."""
+    if kind == "ivf-pq":
+        return max(IVF_NLIST, 2 ** PQ_NBITS)
+    if kind == "ivf-flat":
+        return max(IVF_NLIST, 1)
+    return 1
+
+
+def index_kind(index) -> str:
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIDMap2):
+        index = faiss.downcast_index(index.index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf-pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf-flat"
+    return "flat"
+
+
+def create_index(kind: str, dim: int, train_vectors=None):
+    """
+    Empty index of `kind` that accepts add_with_ids. IVF kinds are trained on
+    (a sample of) `train_vectors` and stay untrained without them.
+    """
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown INDEX_TYPE {kind!r}, expected one of {', '.join(INDEX_TYPES)}")
+    rows = 0 if train_vectors is None else len(train_vectors)
+    if rows and rows < min_rows(kind):
+        log.warning("too few vectors to train, using a flat index", extra={"rows": rows, "index_type": kind})
+        kind = "flat"
+
+    if kind == "flat":
+        return faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+    if kind == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, HNSW_M)
+        hnsw.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        hnsw.hnsw.efSearch = HNSW_EF_SEARCH
+        return faiss.IndexIDMap2(hnsw)
+
+    nlist = IVF_NLIST or auto_nlist(rows)
+    quantizer = faiss.IndexFlatL2(dim)
+    if kind == "ivf-flat":
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    else:
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, PQ_M, PQ_NBITS)
+    index.nprobe = IVF_NPROBE
+    if rows:
+        sample = np.asarray(train_vectors, dtype=np.float32)
+        if rows > INDEX_TRAIN_SIZE:
+            sample = sample[np.random.default_rng(0).choice(rows, INDEX_TRAIN_SIZE, replace=False)]
+        index.train(sample)
+    return index
+
+
+def read_current_generation(root: str):
+    """Return the active generation name, or None if nothing has been persisted."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+class VectorIndex:
+    """FAISS vectors keyed by doctor id plus the bookkeeping needed for incremental sync."""
+
+    def __init__(self, index, rows, version: str = None, model: str = None):
+        self.index = index
+        # doctor id -> {"hash", "updated_at", card metadata, searchable text}
+        self.rows = rows if isinstance(rows, RowStore) else RowStore(changes=dict(rows))
+        self.version = version
+        self.model = model  # embedding model/backend that produced the vectors
+        # Search-time knobs, tunable per instance without rebuilding
+        self.ef_search = HNSW_EF_SEARCH
+        self.nprobe = IVF_NPROBE
+
+    @classmethod
+    def empty(cls, dim: int, model: str = None, kind: str = "flat"):
+        """Empty index; IVF kinds are trained on the first batch of vectors upserted."""
+        return cls(create_index(kind, dim), {}, model=model)
+
+    @property
+    def dim(self) -> int:
+        return self.index.d
+
+    @property
+    def kind(self) -> str:
+        return index_kind(self.index)
+
+    def needs_retrain(self) -> bool:
+        """True once an auto-sized IVF index has far too few lists for the current row count."""
+        if IVF_NLIST or not self.kind.startswith("ivf"):
+            return False
+        return auto_nlist(len(self)) >= 2 * faiss.downcast_index(self.index).nlist
+
+    def __len__(self):
+        return self.index.ntotal
+
+    def copy(self):
+        """Copy-on-write clone so searches never race an in-progress sync."""
+        # Always a heap copy, whatever backs self.index, so the clone is writable
+        index = faiss.deserialize_index(faiss.serialize_index(self.index))
+        return VectorIndex(index, self.rows.copy(), self.version, self.model)
+
+    # ----------------------------
+    # Mutation
+    # ----------------------------
+    def remove(self, ids):
+        ids = [int(i) for i in ids if int(i) in self.rows]
+        if not ids:
+            return
+        if self.kind == "hnsw":
+            self.rebuild("hnsw", drop=ids)  # HNSW graphs do not support deletion
+            return
+        self.index.remove_ids(np.asarray(ids, dtype=np.int64))
+        for doc_id in ids:
+            self.rows.pop(doc_id, None)
+
+    def upsert(self, ids, vectors, rows: list):
+        ids = [int(i) for i in ids]
+        if not ids:
+            return
+        self.remove(ids)
+        if not self.index.is_trained:
+            self.index = create_index(self.kind, self.dim, np.asarray(vectors, dtype=np.float32))
+        self.index.add_with_ids(
+            np.asarray(vectors, dtype=np.float32), np.asarray(ids, dtype=np.int64)
+        )
+        for doc_id, row in zip(ids, rows):
+            self.rows[doc_id] = row
+
+    def vectors(self, ids):
+        """Exact vectors stored for `ids`, or None when the index only keeps PQ codes."""
+        if self.kind == "ivf-pq":
+            return None
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return np.empty((0, self.dim), dtype=np.float32)
+        index = faiss.downcast_index(self.index)
+        if isinstance(index, faiss.IndexIVF):
+            index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return index.reconstruct_batch(ids)
+
+    def stored_vectors(self):
+        """(ids, exact vectors) held by the index, or None when it only keeps PQ codes."""
+        ids = np.fromiter(self.rows, dtype=np.int64, count=len(self.rows))
+        vectors = self.vectors(ids)
+        return None if vectors is None else (ids, vectors)
+
+    def rebuild(self, kind: str, drop=()) -> bool:
+        """
+        Re-create the index as `kind` (retraining IVF kinds) from its own vectors,
+        minus `drop`. Returns False when the vectors cannot be recovered exactly.
+        """
+        stored = self.stored_vectors()
+        if stored is None:
+            return False
+        ids, vectors = stored
+        if len(drop):
+            keep = ~np.isin(ids, np.asarray(list(drop), dtype=np.int64))
+            ids, vectors = ids[keep], vectors[keep]
+        index = create_index(kind, self.dim, vectors if len(vectors) else None)
+        if len(ids):
+            index.add_with_ids(vectors, ids)
+        self.index = index
+        for doc_id in drop:
+            self.rows.pop(int(doc_id), None)
+        return True
+
+    # ----------------------------
+    # Search
+    # ----------------------------
+    def _search_params(self, selector=None):
+        kind = self.kind
+        if kind == "hnsw":
+            return faiss.SearchParametersHNSW(efSearch=self.ef_search, sel=selector)
+        if kind.startswith("ivf"):
+            return faiss.SearchParametersIVF(nprobe=self.nprobe, sel=selector)
+        return faiss.SearchParameters(sel=selector) if selector is not None else None
+
+    def search(self, vector, k: int = 5, allowed_ids=None):
+        """
+        Return [(doctor_id, distance)] nearest first. `allowed_ids` restricts the
+        search inside FAISS (IDSelector) instead of filtering afterwards.
+        """
+        if self.index.ntotal == 0:
+            return []
+        query = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        if allowed_ids is None:
+            distances, ids = self.index.search(query, min(k, self.index.ntotal), params=self._search_params())
+        else:
+            if len(allowed_ids) == 0:
+                return []
+            selector = faiss.IDSelectorBatch(np.asarray(allowed_ids, dtype=np.int64))
+            params = self._search_params(selector)
+            distances, ids = self.index.search(query, min(k, len(allowed_ids)), params=params)
+        return [(int(i), float(d)) for i, d in zip(ids[0], distances[0]) if i != -1]
+
+    # ----------------------------
+    # Persistence
+    # ----------------------------
+    def save(self, root: str) -> str:
+        """Write a new generation atomically and make it current. Returns its name."""
+        os.makedirs(root, exist_ok=True)
+        current = read_current_generation(root)
+        existing = [_generation_number(n) for n in os.listdir(root) if n.startswith("gen-")]
+        name = _generation_name(max(existing + [_generation_number(current or "")]) + 1)
+
+        tmp_dir = os.path.join(root, f".{name}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        faiss.write_index(self.index, os.path.join(tmp_dir, INDEX_FILE))
+        header = {"version": name, "dim": self.dim, "model": self.model, "index_type": self.kind}
+        write_rows(os.path.join(tmp_dir, ROWS_FILE), self.rows, header)
+        os.rename(tmp_dir, os.path.join(root, name))
+        # Serve from the files just written: drops the heap copies made during the sync. rows.bin,
+        # and index.faiss where it can be mapped (see FAISS_MMAP), then share pages with other workers
+        self.rows = RowStore(RowFile(os.path.join(root, name, ROWS_FILE)))
+        if FAISS_MMAP and MMAP_SUPPORTED:
+            self.index = _read_index(os.path.join(root, name, INDEX_FILE), mmap=True)
+
+        pointer_tmp = os.path.join(root, f".{CURRENT_FILE}.tmp")
+        with open(pointer_tmp, "w") as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer_tmp, os.path.join(root, CURRENT_FILE))
+
+        self.version = name
+        _prune_generations(root, keep=name)
+        return name
+
+    @classmethod
+    def load(cls, root: str, mmap: bool = FAISS_MMAP):
+        """Load the current generation, or return None if there is none."""
+        name = read_current_generation(root)
+        if name is None:
+            return None
+
+        directory = os.path.join(root, name)
+        index = _read_index(os.path.join(directory, INDEX_FILE), mmap)
+        if os.path.exists(os.path.join(directory, ROWS_FILE)):
+            row_file = RowFile(os.path.join(directory, ROWS_FILE))
+            rows, model = RowStore(row_file), row_file.header.get("model")
+        else:
+            with open(os.path.join(directory, LEGACY_MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+            rows = {int(doc_id): row for doc_id, row in manifest["rows"].items()}
+            model = manifest.get("model")
+
+        if index.ntotal != len(rows):
+            raise ValueError(f"index has {index.ntotal} vectors but the metadata lists {len(rows)} rows")
+        return cls(index, rows, name, model)
+
+
+def _read_index(path: str, mmap: bool):
+    flags = 0
+    if mmap and MMAP_SUPPORTED:
+        flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+    return faiss.read_index(path, flags)
+
+
+def _prune_generations(root: str, keep: str):
+    generations = sorted(
+        (n for n in os.listdir(root) if n.startswith("gen-")), key=_generation_number
+    )
+    for name in generations[:-KEEP_GENERATIONS] if KEEP_GENERATIONS > 0 else []:
+        if name != keep:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
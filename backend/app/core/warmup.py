@@ -0,0 +1,190 @@
+# ----------------------------
+# Startup warm-up, run off the request path
+# ----------------------------
+# Liveness (/health) answers as soon as uvicorn is up. Readiness (/ready) flips
+# once the required steps (catalog, index, embeddings) have succeeded: until then
+# chat still works, degraded to the catalog / memory-mapped index with
+# keyword-only ranking and template replies. An empty doctors table counts as
+# an index (there is nothing to embed yet). Failed required steps are retried
+# with backoff ("degraded"). If the catalog or embeddings still fail after
+# WARMUP_RETRIES the status is "failed" and /health turns 503 too, so the
+# orchestrator restarts the process. A missing index alone never does: the
+# process stays "degraded" (keyword fallback) and turns ready once a
+# generation is published.
+import os
+import threading
+import time
+
+from app.core.observability import get_logger
+from app.db.database import SessionLocal
+
+log = get_logger(__name__)
+
+WARMUP_RETRIES = int(os.getenv("WARMUP_RETRIES", "10"))
+WARMUP_RETRY_DELAY = float(os.getenv("WARMUP_RETRY_DELAY", "5"))  # seconds, doubled per retry up to 60
+REQUIRED_STEPS = ("catalog", "index", "embeddings")
+RESTART_STEPS = ("catalog", "embeddings")  # failures a process restart may fix
+
+_lock = threading.Lock()
+_thread: threading.Thread = None
+_ready = threading.Event()
+state = {"status": "pending", "started_at": None, "finished_at": None, "attempts": 0, "failed": [], "steps": {}}
+
+
+def _step(name: str, fn, *args):
+    """Run one warm-up step, recording its duration and any error. Never raises."""
+    started = time.perf_counter()
+    try:
+        fn(*args)
+        state["steps"][name] = {"ok": True, "ms": round((time.perf_counter() - started) * 1000, 1)}
+    except Exception as e:
+        state["steps"][name] = {
+            "ok": False, "ms": round((time.perf_counter() - started) * 1000, 1), "error": str(e),
+        }
+        log.warning("warm-up step failed", extra={"step": name, "error": str(e)})
+
+
+def _load_catalog():
+    from app.core import catalog, intent
+
+    db = SessionLocal()
+    try:
+        intent.rebuild_extractor(catalog.load_catalog(db))
+    finally:
+        db.close()
+
+
+def _load_index():
+    from app.api import rag
+    from app.core import catalog
+
+    if rag.load_vectorstore() is not None:
+        return
+    if catalog.catalog is not None and len(catalog.catalog) == 0:
+        log.info("no doctors yet, serving without a vector index")
+        return
+    raise RuntimeError("no persisted vector index yet")
+
+
+def _load_embeddings():
+    from app.core.embeddings import get_embeddings
+
+    embeddings = get_embeddings()
+    if embeddings is None:
+        raise RuntimeError("embedding model failed to load")
+    embeddings.embed_query("warm up")  # first forward pass allocates; keep it off user requests
+
+
+def _sync_index():
+    from app.api import rag
+    from app.core import generations
+
+    if not generations.is_writer():
+        return  # readers pick up whatever the writer worker publishes
+    db = SessionLocal()
+    try:
+        rag.build_vectorstore(db)
+        rag.build_blog_index(db)
+    finally:
+        db.close()
+
+
+def _create_llm():
+    from app.core.llm import get_llm
+
+    get_llm()
+
+
+def _failed(names) -> list:
+    return [name for name in names if not state["steps"].get(name, {}).get("ok")]
+
+
+def warm_up() -> bool:
+    """
+    Run every step in order (cheapest first, so degraded serving starts early),
+    then retry the failed ones until the required steps pass. Returns whether
+    the process became ready.
+    """
+    from app.api import rag
+
+    steps = (
+        ("catalog", _load_catalog),
+        ("index", _load_index),
+        ("article_index", rag.load_blog_index),
+        ("llm", _create_llm),
+        ("embeddings", _load_embeddings),
+        ("sync", _sync_index),
+    )
+    state.update(status="warming", started_at=time.time())
+    log.info("warming up: catalog, index, embeddings, LLM client")
+    pending = [name for name, _ in steps]
+    delay = WARMUP_RETRY_DELAY
+    for attempt in range(1, WARMUP_RETRIES + 2):
+        state["attempts"] = attempt
+        for name, fn in steps:
+            if name in pending:
+                _step(name, fn)
+        if _failed(["index"]):
+            _step("index", _load_index)  # on first boot the writer has only just built it in "sync"
+        failed = _failed(REQUIRED_STEPS)
+        state["failed"] = failed
+        if not failed or attempt > WARMUP_RETRIES:
+            break
+        state["status"] = "degraded"
+        log.warning("warm-up incomplete, retrying", extra={"failed": failed, "attempt": attempt, "retry_in_s": delay})
+        time.sleep(delay)
+        delay = min(delay * 2, 60)
+        # sync again too: it skips embedding while the model or database is unavailable
+        pending = _failed(name for name, _ in steps) + ["sync"]
+
+    total = sum(step["ms"] for step in state["steps"].values())
+    if failed:
+        status = "failed" if set(failed) & set(RESTART_STEPS) else "degraded"
+        state.update(status=status, finished_at=time.time())
+        log.error("warm-up incomplete", extra={
+            "status": status, "failed": failed, "attempts": state["attempts"], "steps": state["steps"],
+        })
+        return False
+    state.update(status="ready", finished_at=time.time())
+    _ready.set()
+    log.info("warm-up finished", extra={"ms": round(total), "steps": state["steps"]})
+    return True
+
+
+def start_background(on_ready=None) -> threading.Thread:
+    """Start warm_up() on a daemon thread (once); `on_ready` runs after it finishes."""
+    global _thread
+
+    def run():
+        warm_up()
+        if on_ready is not None:
+            on_ready()
+
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=run, name="warm-up", daemon=True)
+            _thread.start()
+    return _thread
+
+
+def is_ready() -> bool:
+    if not _ready.is_set() and state["status"] == "degraded" and state["failed"] == ["index"] and _index_published():
+        # Warm-up gave up waiting for the index; the writer (or a reader's watcher) has published one since
+        state["steps"]["index"] = {"ok": True, "ms": 0.0, "late": True}
+        state.update(status="ready", failed=[])
+        _ready.set()
+    return _ready.is_set()
+
+
+def _index_published() -> bool:
+    from app.api import rag
+
+    return rag.vectorstore is not None
+
+
+def has_failed() -> bool:
+    return state["status"] == "failed"
+
+
+def status() -> dict:
+    return {**state, "steps": dict(state["steps"])}
@@ -1,11 +1,160 @@
+import re
+from sqlalchemy import func, inspect, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Session
 from .models import Doctor
 
-def get_doctors_by_keyword(db: Session, keyword: str):
-    return db.query(Doctor).filter(Doctor.keywords.ilike(f"%{keyword}%")).all()
+# Generated by migration 0002; deliberately not mapped on Doctor so other dialects still work
+search_vector = literal_column("doctors.search_vector", type_=TSVECTOR)
+
+
+_full_text_support = {}
+
+
+def supports_full_text(db: Session) -> bool:
+    """True on Postgres once migration 0002 has added doctors.search_vector."""
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _full_text_support:
+        _full_text_support[key] = bind.dialect.name == "postgresql" and any(
+            c["name"] == "search_vector" for c in inspect(bind).get_columns("doctors")
+        )
+    return _full_text_support[key]
+
+
+def _or_tsquery(text: str):
+    """to_tsquery matching any of the words, so ranking rewards rows that match more of them."""
+    words = re.findall(r"[a-z0-9]+", (text or "").lower())
+    if not words:
+        return None
+    return func.to_tsquery("english", " | ".join(words))
+
+
+# ----------------------------
+# Statements (shared by the sync and async functions below)
+# ----------------------------
+def search_doctors_stmt(
+    text: str = None,
+    speciality: str = None,
+    location: str = None,
+    limit: int = 20,
+    offset: int = 0,
+    full_text: bool = False,
+):
+    stmt = select(Doctor)
+    if speciality:
+        stmt = stmt.where(Doctor.speciality.ilike(f"%{speciality}%"))
+    if location:
+        stmt = stmt.where(Doctor.location.ilike(f"%{location}%"))
+
+    if text and full_text:
+        tsquery = _or_tsquery(text)
+        if tsquery is not None:
+            stmt = stmt.where(search_vector.op("@@")(tsquery)).order_by(
+                func.ts_rank(search_vector, tsquery).desc(), Doctor.id
+            )
+    elif text:
+        pattern = f"%{text}%"
+        stmt = stmt.where(
+            or_(Doctor.keywords.ilike(pattern), Doctor.speciality.ilike(pattern))
+        ).order_by(Doctor.id)
+    else:
+        stmt = stmt.order_by(Doctor.id)
+
+    return stmt.offset(offset).limit(limit)
+
+
+def doctors_by_ids_stmt(ids: list):
+    return select(Doctor).where(Doctor.id.in_(ids))
+
+
+def list_doctors_stmt(columns, after: int = None, limit: int = None, speciality: str = None, location: str = None):
+    """Projected columns in id order; `after` is the keyset cursor (last id of the previous page)."""
+    stmt = select(*columns).order_by(Doctor.id)
+    if after is not None:
+        stmt = stmt.where(Doctor.id > after)
+    if speciality:
+        stmt = stmt.where(Doctor.speciality.ilike(f"%{speciality}%"))
+    if location:
+        stmt = stmt.where(Doctor.location.ilike(f"%{location}%"))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+# ----------------------------
+# Sync (threadpool) API
+# ----------------------------
+def search_doctors(
+    db: Session,
+    text: str = None,
+    speciality: str = None,
+    location: str = None,
+    limit: int = 20,
+    offset: int = 0,
+):
+    """
+    Ranked doctor search with pagination. On Postgres `text` uses the weighted
+    tsvector (ts_rank) and speciality/location use trigram-indexed ILIKE.
+    """
+    full_text = bool(text) and supports_full_text(db)
+    return db.scalars(search_doctors_stmt(text, speciality, location, limit, offset, full_text)).all()
+
+
+def get_doctors_by_keyword(db: Session, keyword: str, limit: int = 20, offset: int = 0):
+    return search_doctors(db, text=keyword, limit=limit, offset=offset)
 
 def get_doctor_by_id(db: Session, doctor_id: int):
-    return db.query(Doctor).filter(Doctor.id == doctor_id).first()
+    return db.get(Doctor, doctor_id)
 
 def get_doctors_by_ids(db: Session, ids: list):
-    return db.query(Doctor).filter(Doctor.id.in_(ids)).all()
+    return db.scalars(doctors_by_ids_stmt(ids)).all()
+
+def list_doctors(db: Session, columns, after: int = None, limit: int = 50, speciality: str = None, location: str = None):
+    return db.execute(list_doctors_stmt(columns, after, limit, speciality, location)).mappings().all()
+
+def stream_doctors(db: Session, columns, batch_size: int = 1000, speciality: str = None, location: str = None):
+    """Yield batches of row mappings from a server-side cursor (psycopg2 named cursor)."""
+    stmt = list_doctors_stmt(columns, speciality=speciality, location=location).execution_options(yield_per=batch_size)
+    yield from db.execute(stmt).mappings().partitions()
+
+
+# ----------------------------
+# Async API (AsyncSession from database.async_session)
+# ----------------------------
+async def asupports_full_text(db) -> bool:
+    return await db.run_sync(supports_full_text)
+
+
+async def asearch_doctors(
+    db,
+    text: str = None,
+    speciality: str = None,
+    location: str = None,
+    limit: int = 20,
+    offset: int = 0,
+):
+    full_text = bool(text) and await asupports_full_text(db)
+    result = await db.scalars(search_doctors_stmt(text, speciality, location, limit, offset, full_text))
+    return result.all()
+
+
+async def aget_doctors_by_keyword(db, keyword: str, limit: int = 20, offset: int = 0):
+    return await asearch_doctors(db, text=keyword, limit=limit, offset=offset)
+
+async def aget_doctor_by_id(db, doctor_id: int):
+    return await db.get(Doctor, doctor_id)
+
+async def aget_doctors_by_ids(db, ids: list):
+    return (await db.scalars(doctors_by_ids_stmt(ids))).all()
+
+async def alist_doctors(db, columns, after: int = None, limit: int = 50, speciality: str = None, location: str = None):
+    result = await db.execute(list_doctors_stmt(columns, after, limit, speciality, location))
+    return result.mappings().all()
+
+async def astream_doctors(db, columns, batch_size: int = 1000, speciality: str = None, location: str = None):
+    """Yield batches of row mappings from a server-side cursor (asyncpg), never the whole table at once."""
+    stmt = list_doctors_stmt(columns, speciality=speciality, location=location).execution_options(yield_per=batch_size)
+    result = await db.stream(stmt)
+    async for batch in result.mappings().partitions():
+        yield batch
@@ -1,12 +1,50 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from contextlib import asynccontextmanager
 import os
+import time
 from dotenv import load_dotenv
+from app.core.observability import get_logger
 
 load_dotenv()
+log = get_logger(__name__)
 
-DATABASE_URL = os.getenv("DATABASE_URL") 
-engine = create_engine(DATABASE_URL)
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# ----------------------------
+# Connection pool settings (shared by the sync and async engines)
+# ----------------------------
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))  # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))  # Postgres only, 0 = off
+# Async engine for request handlers; "0" keeps every query on the sync engine in worker threads
+DB_ASYNC = os.getenv("DB_ASYNC", "1") == "1"
+
+
+def _pool_options(url) -> dict:
+    if url.get_backend_name() == "sqlite":
+        return {}  # SQLite keeps SQLAlchemy's default pool
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def _sync_connect_args(url) -> dict:
+    if url.get_backend_name() == "postgresql" and DB_STATEMENT_TIMEOUT_MS:
+        return {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return {}
+
+
+_url = make_url(DATABASE_URL)
+engine = create_engine(DATABASE_URL, connect_args=_sync_connect_args(_url), **_pool_options(_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -16,3 +54,97 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ----------------------------
+# Async engine (asyncpg on Postgres, aiosqlite for local SQLite if installed)
+# ----------------------------
+ASYNC_DRIVERS = {"postgresql": ("asyncpg", "asyncpg"), "sqlite": ("aiosqlite", "aiosqlite")}
+
+async_engine = None
+AsyncSessionLocal = None
+_acquire_stats = {"waiting": 0, "acquired": 0, "wait_total": 0.0, "wait_max": 0.0, "timeouts": 0}
+
+
+def async_enabled() -> bool:
+    """Create the async engine on first use. False when disabled or the async driver is missing."""
+    global async_engine, AsyncSessionLocal
+    if async_engine is not None:
+        return True
+    driver = ASYNC_DRIVERS.get(_url.get_backend_name())
+    if not DB_ASYNC or driver is None:
+        return False
+    try:
+        __import__(driver[1])
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    except ImportError:
+        return False
+
+    connect_args = {}
+    if _url.get_backend_name() == "postgresql" and DB_STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+    async_engine = create_async_engine(
+        _url.set(drivername=f"{_url.get_backend_name()}+{driver[0]}"),
+        connect_args=connect_args,
+        **_pool_options(_url),
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+    log.info("async database engine ready", extra={"driver": driver[0]})
+    return True
+
+
+@asynccontextmanager
+async def async_session():
+    """AsyncSession with its connection checked out up front, so pool waits are measured."""
+    if not async_enabled():
+        raise RuntimeError("async database driver not available (install asyncpg / aiosqlite)")
+    async with AsyncSessionLocal() as session:
+        _acquire_stats["waiting"] += 1
+        started = time.perf_counter()
+        try:
+            await session.connection()
+        except Exception:
+            _acquire_stats["timeouts"] += 1
+            raise
+        finally:
+            _acquire_stats["waiting"] -= 1
+        waited = time.perf_counter() - started
+        _acquire_stats["acquired"] += 1
+        _acquire_stats["wait_total"] += waited
+        _acquire_stats["wait_max"] = max(_acquire_stats["wait_max"], waited)
+        yield session
+
+
+async def get_async_db():
+    async with async_session() as session:
+        yield session
+
+
+def _pool_status(pool) -> dict:
+    stats = {"pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if method is not None:
+            stats[name] = method()
+    return stats
+
+
+def pool_stats() -> dict:
+    """Pool occupancy for both engines plus async acquisition waits."""
+    stats = {"sync": _pool_status(engine.pool)}
+    if async_engine is not None:
+        acquired = _acquire_stats["acquired"]
+        stats["async"] = {
+            **_pool_status(async_engine.pool),
+            "waiting": _acquire_stats["waiting"],
+            "acquired": acquired,
+            "timeouts": _acquire_stats["timeouts"],
+            "wait_avg_ms": round(_acquire_stats["wait_total"] / acquired * 1000, 2) if acquired else 0.0,
+            "wait_max_ms": round(_acquire_stats["wait_max"] * 1000, 2),
+        }
+    return stats
+
+
+async def dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, Integer, String, Text, DateTime, func
 from .database import Base
 
 class Doctor(Base):
@@ -12,3 +12,29 @@ class Doctor(Base):
     keywords = Column(Text)  # comma-separated for search
     symptom_to_speciality = Column(Text)  # added
     disease_examples = Column(Text)        # added
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())  # drives index sync
+
+
+class Blog(Base):
+    __tablename__ = "blogs"
+    id = Column(Integer, primary_key=True)
+    url_hash = Column(String(64), nullable=False, unique=True)  # sha256 of the normalized URL, the dedupe key
+    url = Column(Text, nullable=False)
+    specialty = Column(String)  # keyword the article was fetched for
+    title = Column(Text, nullable=False)
+    description = Column(Text)
+    published_at = Column(DateTime)
+    source = Column(String)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class BlogFetchState(Base):
+    """Validators from the last fetch of each keyword, sent back as If-None-Match / If-Modified-Since."""
+    __tablename__ = "blog_fetch_state"
+    query = Column(String, primary_key=True)
+    etag = Column(String)
+    last_modified = Column(String)
+    status = Column(Integer)
+    fetched_at = Column(DateTime, server_default=func.now())
@@ -0,0 +1,444 @@
+# ----------------------------
+# Blog ingestion: NewsAPI articles -> blogs
+# ----------------------------
+# Keywords are fetched concurrently over one pooled httpx.AsyncClient, with at
+# most INGEST_CONCURRENCY requests in flight and INGEST_RATE requests/second
+# (token bucket). Timeouts, 429 and 5xx are retried with full-jitter exponential
+# backoff, honouring Retry-After. Each keyword's ETag / Last-Modified is kept in
+# blog_fetch_state and sent back next run, so unchanged results cost a 304.
+#
+# Articles are deduplicated by a hash of the normalized URL (within the run in
+# memory, across runs by the unique url_hash key) and upserted INGEST_BATCH_SIZE
+# rows per statement: psycopg2 execute_values on Postgres, executemany on SQLite.
+# A keyword's fetch state is committed in the same transaction as its articles.
+#
+#   NEWS_API_KEY=... python -m app.ingest.blogs
+#   python -m app.ingest.blogs --record fixtures/news.json      # save responses for replay
+#   python -m benchmarks.stub_news --fixture fixtures/news.json &
+#   python -m app.ingest.blogs --base-url http://127.0.0.1:9200/v2/everything
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import httpx
+from dotenv import load_dotenv
+
+from app.core.observability import get_logger, span
+
+load_dotenv()
+log = get_logger("app.ingest.blogs")  # not __name__: that is "__main__" under python -m
+
+NEWS_API_URL = os.getenv("NEWS_API_URL", "https://newsapi.org/v2/everything")
+NEWS_API_KEY = os.getenv("NEWS_API_KEY", "")
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "8"))
+INGEST_RATE = float(os.getenv("INGEST_RATE", "5"))  # requests per second, 0 = unlimited
+INGEST_RETRIES = int(os.getenv("INGEST_RETRIES", "4"))
+INGEST_BACKOFF_BASE = float(os.getenv("INGEST_BACKOFF_BASE", "0.5"))  # seconds
+INGEST_BACKOFF_MAX = float(os.getenv("INGEST_BACKOFF_MAX", "30"))
+INGEST_TIMEOUT = float(os.getenv("INGEST_TIMEOUT", "10"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+INGEST_PAGE_SIZE = int(os.getenv("INGEST_PAGE_SIZE", "3"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref"}
+
+SPECIALTY_KEYWORDS = [
+    ["depression", "anxiety", "stress", "mood swings", "hallucinations"],
+    ["ear pain", "throat pain", "sinus", "hearing loss", "blocked nose"],
+    ["sexual dysfunction", "infertility", "libido issues"],
+    ["toothache", "cavity", "gum bleeding", "dental pain"],
+    ["acne", "rash", "itching", "hair fall", "skin infection"],
+    ["swelling", "fatigue", "blood in urine", "high blood pressure"],
+    ["frequent urination", "thirst", "weight loss", "fatigue"],
+    ["fever in kids", "child sick", "cough in children", "growth issues"],
+    ["fever", "cough", "diarrhea", "vomiting", "rashes"],
+    ["urinary tract infection", "blood in urine", "frequent urination", "kidney stones"],
+    ["chest pain", "shortness of breath", "palpitations"],
+    ["abdominal pain", "nausea", "vomiting", "constipation", "diarrhea"],
+    ["pregnancy care", "menstrual problems", "infertility", "menopause"],
+    ["back pain", "neck pain", "joint pain", "chronic pain"],
+    ["general health issues", "preventive care", "vaccinations"],
+    ["seizures", "developmental delay", "muscle weakness"],
+    ["blurred vision", "red eyes", "eye pain", "cataract"],
+    ["morbid obesity", "weight gain", "diabetes due to obesity"],
+    ["chronic pain", "allergies", "stress"],
+    ["surgery preparation", "anesthesia consultation"],
+    ["cancer lump", "tumor pain", "weight loss"],
+]
+
+UPSERT_COLUMNS = ("url_hash", "url", "specialty", "title", "description", "published_at", "source")
+# The first keyword an article was found under keeps it; content changes are picked up
+UPDATE_COLUMNS = ("title", "description", "published_at", "source")
+
+
+def default_topics() -> list:
+    """Every keyword once, in list order."""
+    return list(dict.fromkeys(word for words in SPECIALTY_KEYWORDS for word in words))
+
+
+# ----------------------------
+# Normalization
+# ----------------------------
+def normalize_url(url: str) -> str:
+    """Host + path + query without scheme, www., fragment, trailing slash or tracking parameters."""
+    parts = urlsplit((url or "").strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ))
+    path = parts.path.rstrip("/")
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
+
+
+def url_hash(url: str) -> str:
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+def _published_at(value):
+    """NewsAPI's ISO-8601 timestamp ("2024-05-01T10:00:00Z") as naive UTC text, or None."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def article_row(topic: str, article: dict):
+    """Column tuple for one article, or None when it has no title or URL."""
+    title, url = (article.get("title") or "").strip(), (article.get("url") or "").strip()
+    if not title or not url or title == "[Removed]":
+        return None
+    return (
+        url_hash(url),
+        url,
+        topic,
+        title,
+        article.get("description"),
+        _published_at(article.get("publishedAt")),
+        (article.get("source") or {}).get("name"),
+    )
+
+
+# ----------------------------
+# HTTP: rate limit, retries, conditional fetch
+# ----------------------------
+class RateLimiter:
+    """Token bucket: `rate` acquisitions per second on average, bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate, self.burst = rate, max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def backoff_delay(attempt: int, retry_after: float = None) -> float:
+    """Full-jitter exponential backoff; a longer Retry-After from the server wins."""
+    delay = random.uniform(0, min(INGEST_BACKOFF_MAX, INGEST_BACKOFF_BASE * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, INGEST_BACKOFF_MAX))
+    return delay
+
+
+def _retry_after(response):
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None  # HTTP-date form; fall back to our own backoff
+
+
+class IngestStats:
+    def __init__(self):
+        self.topics = 0
+        self.fetched = 0
+        self.not_modified = 0
+        self.failed = 0
+        self.requests = 0
+        self.retries = 0
+        self.articles = 0
+        self.duplicates = 0
+        self.skipped = 0
+        self.upserted = 0
+        self.batches = 0
+        self.elapsed = 0.0
+
+    def to_dict(self) -> dict:
+        stats = dict(vars(self))
+        stats["elapsed"] = round(self.elapsed, 3)
+        stats["topics_per_sec"] = round(self.topics / self.elapsed, 1) if self.elapsed else 0.0
+        return stats
+
+
+async def fetch_topic(client, limiter, url: str, topic: str, validators, stats: IngestStats, retries: int = INGEST_RETRIES):
+    """
+    GET one keyword. Returns (status, articles, validators): status 304 means
+    unchanged since `validators` (etag, last_modified); None means every attempt failed.
+    """
+    params = {"q": topic, "language": "en", "pageSize": INGEST_PAGE_SIZE}
+    headers = {}
+    if validators:
+        etag, last_modified = validators
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    error = None
+    for attempt in range(retries + 1):
+        await limiter.acquire()
+        stats.requests += 1
+        retry_after = None
+        try:
+            response = await client.get(url, params=params, headers=headers)
+        except httpx.TransportError as exc:  # connect/read timeouts, resets
+            error = type(exc).__name__
+        else:
+            if response.status_code == 304:
+                return 304, [], validators
+            if response.status_code == 200:
+                fresh = (response.headers.get("etag"), response.headers.get("last-modified"))
+                return 200, response.json().get("articles") or [], fresh
+            if response.status_code not in RETRY_STATUSES:
+                log.warning("blog fetch rejected", extra={"topic": topic, "status": response.status_code})
+                return response.status_code, [], None
+            error = f"HTTP {response.status_code}"
+            retry_after = _retry_after(response)
+        if attempt == retries:
+            break
+        stats.retries += 1
+        await asyncio.sleep(backoff_delay(attempt, retry_after))
+    log.warning("blog fetch failed", extra={"topic": topic, "attempts": retries + 1, "error": error})
+    return None, [], None
+
+
+# ----------------------------
+# Database: batched upserts over one raw DB-API connection
+# ----------------------------
+class BlogWriter:
+    """Writes blogs and blog_fetch_state. Blocking; the pipeline calls it from a worker thread."""
+
+    def __init__(self, engine):
+        self.dialect = engine.dialect.name
+        if self.dialect not in ("postgresql", "sqlite"):
+            raise ValueError(f"blog ingestion supports Postgres and SQLite, not {self.dialect}")
+        self.conn = engine.raw_connection()
+
+    def load_state(self) -> dict:
+        cur = self.conn.cursor()
+        cur.execute("SELECT query, etag, last_modified FROM blog_fetch_state WHERE status = 200")
+        state = {query: (etag, last_modified) for query, etag, last_modified in cur.fetchall()}
+        cur.close()
+        return state
+
+    def write(self, rows: list, states: dict) -> int:
+        """Upsert `rows` and record `states` ({topic: (status, etag, last_modified)}) in one transaction."""
+        cur = self.conn.cursor()
+        try:
+            written = self._upsert_rows(cur, rows) if rows else 0
+            if states:
+                self._save_states(cur, states)
+            self.conn.commit()
+            return written
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    def _upsert_rows(self, cur, rows) -> int:
+        columns = ", ".join(UPSERT_COLUMNS)
+        updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in UPDATE_COLUMNS)
+        if self.dialect == "postgresql":
+            from psycopg2.extras import execute_values
+
+            changed = " OR ".join(f"blogs.{c} IS DISTINCT FROM EXCLUDED.{c}" for c in UPDATE_COLUMNS)
+            execute_values(
+                cur,
+                f"INSERT INTO blogs ({columns}) VALUES %s "
+                f"ON CONFLICT (url_hash) DO UPDATE SET {updates} WHERE {changed}",
+                rows,
+                page_size=len(rows),  # one statement, so rowcount covers the whole batch
+            )
+            return cur.rowcount
+        changed = " OR ".join(f"blogs.{c} IS NOT excluded.{c}" for c in UPDATE_COLUMNS)
+        placeholders = ", ".join("?" for _ in UPSERT_COLUMNS)
+        cur.executemany(
+            f"INSERT INTO blogs ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT (url_hash) DO UPDATE SET {updates}, updated_at = CURRENT_TIMESTAMP WHERE {changed}",
+            rows,
+        )
+        return cur.rowcount
+
+    def _save_states(self, cur, states):
+        values = [(topic, etag, last_modified, status) for topic, (status, etag, last_modified) in states.items()]
+        sql = (
+            "INSERT INTO blog_fetch_state (query, etag, last_modified, status, fetched_at) VALUES {values} "
+            "ON CONFLICT (query) DO UPDATE SET etag = EXCLUDED.etag, last_modified = EXCLUDED.last_modified, "
+            "status = EXCLUDED.status, fetched_at = EXCLUDED.fetched_at"
+        )
+        if self.dialect == "postgresql":
+            from psycopg2.extras import execute_values
+
+            execute_values(cur, sql.format(values="%s"), values, template="(%s, %s, %s, %s, CURRENT_TIMESTAMP)")
+        else:
+            cur.executemany(sql.format(values="(?, ?, ?, ?, CURRENT_TIMESTAMP)"), values)
+
+    def close(self):
+        self.conn.close()
+
+
+# ----------------------------
+# Pipeline
+# ----------------------------
+async def ingest(
+    topics=None,
+    engine=None,
+    url: str = NEWS_API_URL,
+    api_key: str = NEWS_API_KEY,
+    concurrency: int = INGEST_CONCURRENCY,
+    rate: float = INGEST_RATE,
+    batch_size: int = INGEST_BATCH_SIZE,
+    retries: int = INGEST_RETRIES,
+    conditional: bool = True,
+    record: dict = None,
+) -> IngestStats:
+    """
+    Fetch every topic and upsert its articles. With `record`, the raw article
+    lists of fresh responses are also collected there ({topic: articles}) for replay.
+    """
+    if engine is None:
+        from app.db.database import engine
+    if not api_key and url == NEWS_API_URL:
+        raise RuntimeError("NEWS_API_KEY is not set")
+    topics = list(dict.fromkeys(topics or default_topics()))
+    stats = IngestStats()
+    stats.topics = len(topics)
+    started = time.perf_counter()
+
+    writer = BlogWriter(engine)
+    try:
+        validators = await asyncio.to_thread(writer.load_state) if conditional else {}
+        results = asyncio.Queue(maxsize=concurrency * 4)  # backpressure when the writer falls behind
+        limiter = RateLimiter(rate, burst=concurrency)
+        slots = asyncio.Semaphore(concurrency)
+
+        async def fetch(client, topic):
+            async with slots:
+                await results.put((topic, *await fetch_topic(client, limiter, url, topic, validators.get(topic), stats, retries)))
+
+        async def fetch_all():
+            limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+            headers = {"X-Api-Key": api_key, "User-Agent": "medbot-ingest"} if api_key else {"User-Agent": "medbot-ingest"}
+            async with httpx.AsyncClient(limits=limits, timeout=INGEST_TIMEOUT, headers=headers) as client:
+                try:
+                    await asyncio.gather(*(fetch(client, topic) for topic in topics))
+                finally:
+                    await results.put(None)
+
+        async def flush(rows, states):
+            with span("ingest.upsert"):
+                stats.upserted += await asyncio.to_thread(writer.write, rows, states)
+            stats.batches += 1
+
+        producer = asyncio.create_task(fetch_all())
+        try:
+            seen, rows, states = set(), [], {}
+            while True:
+                item = await results.get()
+                if item is None:
+                    break
+                topic, status, articles, fresh = item
+                if status == 304:
+                    stats.not_modified += 1
+                    continue
+                if status != 200:
+                    stats.failed += 1
+                    continue
+                stats.fetched += 1
+                if record is not None:
+                    record[topic] = articles
+                for article in articles:
+                    stats.articles += 1
+                    row = article_row(topic, article)
+                    if row is None:
+                        stats.skipped += 1
+                    elif row[0] in seen:
+                        stats.duplicates += 1
+                    else:
+                        seen.add(row[0])
+                        rows.append(row)
+                states[topic] = (200, *fresh)
+                if len(rows) >= batch_size:
+                    await flush(rows, states)
+                    rows, states = [], {}
+            if rows or states:
+                await flush(rows, states)
+            await producer  # surfaces anything fetch_all raised
+        finally:
+            # A failed write must not leave the fetches running; drain the queue so the
+            # producer's final put (and any fetch blocked on backpressure) can't hang
+            producer.cancel()
+            while not results.empty():
+                results.get_nowait()
+            await asyncio.gather(producer, return_exceptions=True)
+    finally:
+        writer.close()
+
+    stats.elapsed = time.perf_counter() - started
+    log.info("blog ingest finished", extra=stats.to_dict())
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch health articles from NewsAPI into the blogs table")
+    parser.add_argument("--base-url", default=NEWS_API_URL, help="everything endpoint (point at benchmarks.stub_news offline)")
+    parser.add_argument("--topics", help="comma-separated keywords (default: the built-in specialty keyword list)")
+    parser.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=INGEST_RATE, help="requests per second, 0 = unlimited")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--retries", type=int, default=INGEST_RETRIES)
+    parser.add_argument("--no-conditional", action="store_true", help="ignore stored ETags and refetch everything")
+    parser.add_argument("--record", help="also write the fetched articles to this JSON fixture (implies --no-conditional)")
+    args = parser.parse_args()
+
+    topics = [t.strip() for t in args.topics.split(",") if t.strip()] if args.topics else None
+    record = {} if args.record else None
+    asyncio.run(ingest(
+        topics, url=args.base_url, concurrency=args.concurrency, rate=args.rate,
+        batch_size=args.batch_size, retries=args.retries, conditional=not (args.no_conditional or args.record), record=record,
+    ))
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=1)
+        log.info("fixture written", extra={"path": args.record, "topics": len(record)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,520 @@
+# ----------------------------
+# Bulk doctor import: CSV / NDJSON -> doctors (+ the persisted FAISS index)
+# ----------------------------
+# The input is streamed row by row and validated against the doctors columns
+# (name and speciality required, fee a non-negative integer); rejected rows are
+# counted and, with --rejects, written out with their errors. Valid rows are
+# loaded IMPORT_CHUNK_SIZE at a time into a temporary staging table (COPY on
+# Postgres, executemany on SQLite) and merged in the same transaction: the last
+# row per key wins, changed doctors are updated, new ones inserted, identical
+# ones left alone so their updated_at (and vector) stays put. The key is
+# (name, location) by default; with --key id, rows carrying the id of an
+# existing doctor update it and every other row is inserted under a fresh id.
+#
+# Inserted and updated doctors are embedded in IMPORT_EMBED_BATCH batches while
+# the next chunk loads, in process or across IMPORT_EMBED_WORKERS spawned
+# processes that each load the local embedding backend, and appended to the
+# persisted index as one new generation that every worker then follows. That
+# needs the index writer lock: with a backend writer running (it holds the lock
+# for life) the import only loads the database and the writer embeds the rows
+# through its own catalog sync.
+#
+#   python -m app.ingest.doctors doctors.csv
+#   python -m app.ingest.doctors providers.ndjson --key id --workers 4 --rejects rejects.ndjson
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Optional
+
+import numpy as np
+from dotenv import load_dotenv
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+from app.core.observability import get_logger, span
+
+load_dotenv()
+log = get_logger("app.ingest.doctors")  # not __name__: that is "__main__" under python -m
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "50000"))  # rows per staging load + merge transaction
+IMPORT_EMBED_BATCH = int(os.getenv("IMPORT_EMBED_BATCH", "256"))
+# 0 = embed in this process with the configured embeddings (local model or EMBEDDING_SOCKET);
+# N = N spawned processes, each loading the local backend with its share of the cores
+IMPORT_EMBED_WORKERS = int(os.getenv("IMPORT_EMBED_WORKERS", "0"))
+IMPORT_LOGGED_REJECTS = 20  # the rest only go to --rejects
+
+IMPORT_COLUMNS = (
+    "name", "designation", "speciality", "location", "fee", "keywords", "symptom_to_speciality", "disease_examples",
+)
+RETURNED_COLUMNS = ("id",) + IMPORT_COLUMNS + ("updated_at",)
+MERGE_KEYS = ("name_location", "id", "none")
+STAGING_TABLE = "doctors_import"
+
+
+class DoctorRecord(BaseModel):
+    """One input row, checked against the doctors table (app.db.models.Doctor)."""
+
+    model_config = ConfigDict(str_strip_whitespace=True, extra="ignore")
+
+    id: Optional[int] = Field(default=None, gt=0)
+    name: str = Field(min_length=1)
+    designation: Optional[str] = None
+    speciality: str = Field(min_length=1)
+    location: Optional[str] = None
+    fee: Optional[int] = Field(default=None, ge=0)
+    keywords: Optional[str] = None
+    symptom_to_speciality: Optional[str] = None
+    disease_examples: Optional[str] = None
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def _blank_is_null(cls, value):
+        if isinstance(value, str) and not value.strip():
+            return None
+        return value
+
+    @field_validator("fee", mode="before")
+    @classmethod
+    def _plain_fee(cls, value):
+        # "Rs. 1,500" / "1500 PKR" -> 1500
+        if isinstance(value, str):
+            value = value.lower().replace(",", "").replace("pkr", "").replace("rs.", "").replace("rs", "").strip()
+            return value or None
+        return value
+
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.valid = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.chunks = 0
+        self.embedded = 0
+        self.index_version = None
+        self.embedding_deferred = None  # why the changed doctors were left for the backend to embed
+        self.load_seconds = 0.0
+        self.embed_seconds = 0.0
+        self.index_seconds = 0.0
+        self.elapsed = 0.0
+
+    def to_dict(self) -> dict:
+        stats = dict(vars(self))
+        for name in ("load_seconds", "embed_seconds", "index_seconds", "elapsed"):
+            stats[name] = round(stats[name], 3)
+        stats["rows_per_sec"] = round(self.read / self.elapsed, 1) if self.elapsed else 0.0
+        stats["embedded_per_sec"] = round(self.embedded / self.embed_seconds, 1) if self.embed_seconds else 0.0
+        return stats
+
+
+# ----------------------------
+# Input: streamed, validated rows
+# ----------------------------
+def detect_format(path: str) -> str:
+    return "ndjson" if path.lower().endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def read_rows(path: str, fmt: str):
+    """Yield (line number, dict) per record, or (line number, error message) for unparsable NDJSON lines."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                row.pop(None, None)  # cells beyond the header
+                yield reader.line_num, row  # physical line: quoted fields may span several
+            return
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, f"invalid JSON: {e}"
+                continue
+            yield number, row if isinstance(row, dict) else "expected a JSON object"
+
+
+def validated_rows(path: str, fmt: str, stats: ImportStats, rejects=None):
+    """Yield (line, id, *IMPORT_COLUMNS) for every valid row; count, log and record the rest."""
+    for line, row in read_rows(path, fmt):
+        stats.read += 1
+        if isinstance(row, str):
+            errors, row = [row], None
+        else:
+            try:
+                record = DoctorRecord.model_validate(row)
+            except ValidationError as e:
+                errors = [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()]
+            else:
+                stats.valid += 1
+                yield (line, record.id) + tuple(getattr(record, c) for c in IMPORT_COLUMNS)
+                continue
+        stats.rejected += 1
+        if stats.rejected <= IMPORT_LOGGED_REJECTS:
+            log.warning("rejected doctor row", extra={"line": line, "errors": errors})
+        if rejects is not None:
+            rejects.write(json.dumps({"line": line, "errors": errors, "row": row}, default=str) + "\n")
+
+
+def chunked(rows, size: int):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ----------------------------
+# Database: staging table + merge over one raw DB-API connection
+# ----------------------------
+class DoctorLoader:
+    """Loads validated rows through a staging table. Blocking; one transaction per chunk."""
+
+    def __init__(self, engine, key: str = "name_location"):
+        self.dialect = engine.dialect.name
+        if self.dialect not in ("postgresql", "sqlite"):
+            raise ValueError(f"doctor import supports Postgres and SQLite, not {self.dialect}")
+        if key not in MERGE_KEYS:
+            raise ValueError(f"unknown merge key {key!r}, expected one of {', '.join(MERGE_KEYS)}")
+        self.key = key
+        self.conn = engine.raw_connection()
+        columns = ", ".join(f"{c} {'INTEGER' if c == 'fee' else 'TEXT'}" for c in IMPORT_COLUMNS)
+        cur = self.conn.cursor()
+        if self.dialect == "postgresql":
+            # The app engine caps statements at DB_STATEMENT_TIMEOUT_MS; a chunk's COPY and merge
+            # (tsvector, GIN/trigram indexes, notify trigger) run far longer. RESET on close.
+            cur.execute("SET statement_timeout = 0")
+        cur.execute(f"CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} (line BIGINT, id INTEGER, {columns})")
+        if self.dialect == "sqlite":
+            # SQLite only nested-loop joins: without these every merge step rescans the staged chunk
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {STAGING_TABLE}_name ON {STAGING_TABLE} (name)")
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {STAGING_TABLE}_id ON {STAGING_TABLE} (id)")
+        cur.close()
+        self.conn.commit()
+
+    def _match(self) -> str:
+        if self.key == "id":
+            return "d.id = s.id"
+        return "d.name = s.name AND coalesce(d.location, '') = coalesce(s.location, '')"
+
+    def _stage(self, cur, rows):
+        columns = ", ".join(("line", "id") + IMPORT_COLUMNS)
+        if self.dialect == "postgresql":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)  # None -> unquoted empty field -> NULL
+            buffer.seek(0)
+            cur.copy_expert(f"COPY {STAGING_TABLE} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+            cur.execute(f"ANALYZE {STAGING_TABLE}")  # temp tables are never auto-analyzed; the joins need row counts
+        else:
+            placeholders = ", ".join("?" for _ in range(len(IMPORT_COLUMNS) + 2))
+            cur.executemany(f"INSERT INTO {STAGING_TABLE} ({columns}) VALUES ({placeholders})", rows)
+
+    def _dedupe(self, cur) -> int:
+        """Keep the last staged row per key. Rows without an id never match on id, so they all stay."""
+        if self.key == "none":
+            return 0
+        key = "id" if self.key == "id" else "name, coalesce(location, '')"
+        cur.execute(
+            f"DELETE FROM {STAGING_TABLE} WHERE line NOT IN "
+            f"(SELECT max(line) FROM {STAGING_TABLE} GROUP BY {key})"
+            + (" AND id IS NOT NULL" if self.key == "id" else "")
+        )
+        return max(cur.rowcount, 0)
+
+    def _update(self, cur) -> list:
+        if self.key == "none":
+            return []
+        distinct = "IS DISTINCT FROM" if self.dialect == "postgresql" else "IS NOT"
+        # Postgres needs the target's columns qualified in RETURNING; SQLite rejects the alias there
+        prefix = "d." if self.dialect == "postgresql" else ""
+        cur.execute(
+            f"UPDATE doctors AS d SET {', '.join(f'{c} = s.{c}' for c in IMPORT_COLUMNS)}, "
+            f"updated_at = CURRENT_TIMESTAMP FROM {STAGING_TABLE} AS s WHERE {self._match()} "
+            f"AND ({', '.join('d.' + c for c in IMPORT_COLUMNS)}) {distinct} "
+            f"({', '.join('s.' + c for c in IMPORT_COLUMNS)}) "
+            f"RETURNING {', '.join(prefix + c for c in RETURNED_COLUMNS)}"
+        )
+        return cur.fetchall()
+
+    def _drop_existing(self, cur):
+        """Unstage rows matching a doctor (just updated, or unchanged): whatever is left is new."""
+        if self.key == "none":
+            return
+        # A join rather than NOT EXISTS: doctors has no index on name, and the join can scan it once
+        cur.execute(
+            f"DELETE FROM {STAGING_TABLE} WHERE line IN "
+            f"(SELECT s.line FROM doctors AS d JOIN {STAGING_TABLE} AS s ON {self._match()})"
+        )
+
+    def _insert(self, cur) -> list:
+        columns = ", ".join(IMPORT_COLUMNS)
+        cur.execute(
+            f"INSERT INTO doctors ({columns}) SELECT {columns} FROM {STAGING_TABLE} "
+            f"ORDER BY line RETURNING {', '.join(RETURNED_COLUMNS)}"
+        )
+        return cur.fetchall()
+
+    def load(self, rows: list, stats: ImportStats) -> list:
+        """Stage and merge one chunk. Returns the updated and inserted doctors as RETURNED_COLUMNS tuples."""
+        cur = self.conn.cursor()
+        try:
+            cur.execute(f"DELETE FROM {STAGING_TABLE}")
+            self._stage(cur, rows)
+            duplicates = self._dedupe(cur)
+            updated = self._update(cur)
+            self._drop_existing(cur)
+            inserted = self._insert(cur)
+            cur.execute(f"DELETE FROM {STAGING_TABLE}")
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+        stats.duplicates += duplicates
+        stats.updated += len(updated)
+        stats.inserted += len(inserted)
+        stats.unchanged += len(rows) - duplicates - len(updated) - len(inserted)
+        return updated + inserted
+
+    def close(self):
+        try:
+            if self.dialect == "postgresql":
+                # back to the engine's connect-time timeout before the connection returns to the pool
+                cur = self.conn.cursor()
+                cur.execute("RESET statement_timeout")
+                cur.close()
+                self.conn.commit()
+        finally:
+            self.conn.close()
+
+
+def returned_doctor(values):
+    """A RETURNING tuple as the attribute object rag.doctor_text / doctor_row expect."""
+    doctor = SimpleNamespace(**dict(zip(RETURNED_COLUMNS, values)))
+    if isinstance(doctor.updated_at, str):  # sqlite3 hands back CURRENT_TIMESTAMP as text
+        doctor.updated_at = datetime.fromisoformat(doctor.updated_at)
+    return doctor
+
+
+# ----------------------------
+# Embedding: in process or across spawned workers
+# ----------------------------
+_worker_embedder = None
+
+
+def _local_backend():
+    from app.core import embeddings
+
+    return embeddings.load_backend(embeddings.EMBEDDING_BACKEND)
+
+
+def _init_worker(factory, threads: int):
+    """Process pool initializer: split the cores between the workers, then load the model once."""
+    global _worker_embedder
+    from app.core import embeddings
+
+    embeddings.EMBEDDING_THREADS = threads  # ONNX Runtime intra-op threads
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_embedder = factory()
+
+
+def _embed_in_worker(texts):
+    return np.asarray(_worker_embedder.embed_documents(texts), dtype=np.float32)
+
+
+class BatchEmbedder:
+    """Embeds texts in batches on a background executor; results come back in submission order."""
+
+    def __init__(self, workers: int = IMPORT_EMBED_WORKERS, factory=None):
+        if workers > 0:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            self._executor = ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=(factory or _local_backend, threads),
+            )
+            self._embed = _embed_in_worker
+        else:
+            if factory is None:
+                from app.core.embeddings import get_base_embeddings
+
+                model = get_base_embeddings()
+                if model is None:
+                    raise RuntimeError("embeddings not available")
+            else:
+                model = factory()
+            # One thread: embedding overlaps with validating and loading the next chunk
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix="import-embed")
+            self._embed = lambda texts: np.asarray(model.embed_documents(texts), dtype=np.float32)
+        self._pending = []
+        self.started = None
+
+    def submit(self, ids: list, texts: list, rows: list, batch_size: int = IMPORT_EMBED_BATCH):
+        self.started = self.started or time.perf_counter()
+        for start in range(0, len(texts), batch_size):
+            end = start + batch_size
+            self._pending.append((ids[start:end], rows[start:end], self._executor.submit(self._embed, texts[start:end])))
+
+    def results(self):
+        """Yield (ids, vectors, rows) per batch, waiting for each in turn."""
+        for ids, rows, future in self._pending:
+            yield ids, future.result(), rows
+        self._pending = []
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+
+# ----------------------------
+# Pipeline
+# ----------------------------
+def _index_target(lock, model_id: str):
+    """(persisted index the import may append to, None) or (None, why embedding is left to the backend)."""
+    from app.api import rag
+    from app.core.vector_index import VectorIndex
+
+    if not lock.try_acquire():
+        return None, "an index writer is running; it embeds the imported doctors through its catalog sync"
+    store = VectorIndex.load(rag.FAISS_INDEX_PATH)
+    if store is None:
+        return None, "no persisted index; the backend builds one from the doctors table at startup"
+    if store.model not in (None, model_id):
+        return None, f"the persisted index uses {store.model}, not {model_id}; the backend re-embeds it"
+    return store, None
+
+
+def import_doctors(
+    path: str,
+    engine=None,
+    fmt: str = None,
+    key: str = "name_location",
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    embed_batch: int = IMPORT_EMBED_BATCH,
+    workers: int = IMPORT_EMBED_WORKERS,
+    index: bool = True,
+    rejects_path: str = None,
+    embedder_factory=None,
+    model_id: str = None,
+) -> ImportStats:
+    """
+    Load `path` into the doctors table and, with `index`, append the changed
+    doctors to the persisted FAISS index. `embedder_factory` (a picklable
+    callable returning an object with embed_documents) and `model_id` replace the
+    configured embedding backend, e.g. for benchmarks.
+    """
+    from app.api import rag
+    from app.core.generations import WriterLock
+
+    if engine is None:
+        from app.db.database import engine
+    fmt = fmt or detect_format(path)
+    stats = ImportStats()
+    started = time.perf_counter()
+
+    lock, store, embedder = WriterLock(rag.FAISS_INDEX_PATH, role="auto"), None, None
+    rejects = open(rejects_path, "w", encoding="utf-8") if rejects_path else None
+    loader = DoctorLoader(engine, key)
+    try:
+        if index:
+            if model_id is None:
+                from app.core.embeddings import EMBEDDING_SOCKET, embedding_model_id
+
+                if workers and EMBEDDING_SOCKET:
+                    log.warning("EMBEDDING_SOCKET is set; embedding through the server instead of worker processes")
+                    workers = 0
+                model_id = embedding_model_id()
+            store, stats.embedding_deferred = _index_target(lock, model_id)
+            if store is not None:
+                embedder = BatchEmbedder(workers, embedder_factory)
+
+        for chunk in chunked(validated_rows(path, fmt, stats, rejects), chunk_size):
+            t0 = time.perf_counter()
+            with span("import.load"):
+                changed = loader.load(chunk, stats)
+            stats.load_seconds += time.perf_counter() - t0
+            stats.chunks += 1
+            if embedder is not None and changed:
+                doctors = [returned_doctor(values) for values in changed]
+                texts = [rag.doctor_text(d) for d in doctors]
+                embedder.submit(
+                    [d.id for d in doctors], texts, [rag.doctor_row(d, t) for d, t in zip(doctors, texts)], embed_batch,
+                )
+            log.info("doctor chunk loaded", extra={"chunk": stats.chunks, "rows": stats.read, "changed": len(changed)})
+
+        if embedder is not None and embedder.started is not None:
+            ids, vectors, rows = [], [], []
+            with span("import.embed"):
+                for batch_ids, batch_vectors, batch_rows in embedder.results():
+                    ids += batch_ids
+                    vectors.append(batch_vectors)
+                    rows += batch_rows
+            stats.embedded = len(ids)
+            stats.embed_seconds = time.perf_counter() - embedder.started
+            t0 = time.perf_counter()
+            with span("import.save"):
+                # One upsert: replacing vectors rebuilds an HNSW graph, so it should happen once
+                updated = store.copy()
+                updated.upsert(ids, np.concatenate(vectors), rows)
+                updated.model = model_id
+                stats.index_version = updated.save(rag.FAISS_INDEX_PATH)
+            stats.index_seconds = time.perf_counter() - t0
+    finally:
+        if embedder is not None:
+            embedder.close()
+        loader.close()
+        lock.release()
+        if rejects is not None:
+            rejects.close()
+
+    stats.elapsed = time.perf_counter() - started
+    log.info("doctor import finished", extra=stats.to_dict())
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import doctors from CSV or NDJSON")
+    parser.add_argument("path", help="CSV with a header row, or NDJSON (.ndjson / .jsonl), one doctor per line")
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="default: from the file extension")
+    parser.add_argument("--key", choices=MERGE_KEYS, default="name_location",
+                        help="what identifies an existing doctor (none = insert every row)")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    parser.add_argument("--batch-size", type=int, default=IMPORT_EMBED_BATCH, help="texts per embedding call")
+    parser.add_argument("--workers", type=int, default=IMPORT_EMBED_WORKERS,
+                        help="embedding processes, 0 = embed in this process")
+    parser.add_argument("--no-index", action="store_true", help="only load the database; the backend embeds on its next sync")
+    parser.add_argument("--rejects", help="write rejected rows and their errors here (NDJSON)")
+    args = parser.parse_args()
+
+    stats = import_doctors(
+        args.path, fmt=args.format, key=args.key, chunk_size=args.chunk_size, embed_batch=args.batch_size,
+        workers=args.workers, index=not args.no_index, rejects_path=args.rejects,
+    )
+    if stats.rejected:
+        log.warning("some rows were rejected", extra={"rejected": stats.rejected, "rejects": args.rejects})
+    changed = stats.inserted + stats.updated
+    if changed and not stats.embedded:
+        # The backend writer embeds these one sync at a time, without --workers
+        log.warning("embedding deferred to the backend", extra={
+            "doctors": changed, "reason": stats.embedding_deferred or "--no-index",
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,19 @@
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy.orm import Session
-from app.api.chat import router as chat_router
-from app.db.database import SessionLocal
+from app.api.chat import router as chat_router, cache_stats as response_cache_stats
+from app.api.doctors import router as doctors_router
 from app.api import rag
+from app.db.database import SessionLocal, dispose_async_engine, pool_stats
+from app.core.embeddings import EMBEDDING_SOCKET, get_embeddings
+from app.core.llm import close_llm
+from app.core import catalog, generations, intent, warmup
+from app.core.observability import Gauge, get_logger, render_metrics
 
 app = FastAPI(title="Med-Bot API")
+log = get_logger(__name__)
 
 # Add CORS middleware
 app.add_middleware(
@@ -17,30 +25,149 @@ app.add_middleware(
 )
 
 app.include_router(chat_router, prefix="/api")
+app.include_router(doctors_router, prefix="/api")
 
 # ----------------------------
-# Build/load FAISS vectorstore on startup (with error handling)
+# Warm-up: catalog, memory-mapped index, embedding model, LLM client
 # ----------------------------
+# LAZY_STARTUP=1 (default) serves /health immediately and warms up in the background;
+# /ready reports when that has finished. LAZY_STARTUP=0 blocks startup until warm.
+LAZY_STARTUP = os.getenv("LAZY_STARTUP", "1") == "1"
+
 @app.on_event("startup")
 def startup_event():
-    print("Starting up: building/loading FAISS vectorstore...")
-    db: Session = SessionLocal()
+    # With `uvicorn --workers N` one worker wins the writer lock and embeds/saves
+    # generations; the others only map what it publishes (see app.core.generations)
+    generations.writer_lock = generations.WriterLock(rag.FAISS_INDEX_PATH)
+    role = "writer" if generations.writer_lock.try_acquire() else "reader"
+    log.info("worker started", extra={"pid": os.getpid(), "index_role": role})
+
+    app.state.generation_watcher = generations.GenerationWatcher(
+        rag.FAISS_INDEX_PATH, _current_version, lambda _: rag.reload_vectorstore(), _on_promoted
+    )
+    app.state.generation_watcher.install_signal_handler()
+    app.state.blog_generation_watcher = generations.GenerationWatcher(
+        rag.BLOG_INDEX_PATH, _current_blog_version, lambda _: rag.reload_blog_index()
+    )
+
+    if LAZY_STARTUP:
+        warmup.start_background(on_ready=start_watchers)
+    else:
+        if not warmup.warm_up() and warmup.has_failed():
+            raise RuntimeError(f"warm-up failed: {', '.join(warmup.state['failed'])}")
+        start_watchers()
+
+# ----------------------------
+# Refresh catalog + index when the doctors table changes, without restarts
+# ----------------------------
+def _on_doctors_changed(db: Session):
+    intent.rebuild_extractor(catalog.load_catalog(db))
+    if generations.is_writer() and get_embeddings() is not None:
+        rag.sync_vectorstore(db)
+
+def _on_blogs_changed(db: Session):
+    if generations.is_writer() and get_embeddings() is not None:
+        rag.sync_blog_index(db)
+
+def _current_version():
+    store = rag.vectorstore
+    return store.version if store is not None else None
+
+def _current_blog_version():
+    store = rag.blogstore
+    return store.version if store is not None else None
+
+def _on_promoted():
+    db = SessionLocal()
     try:
-        vectorstore = rag.build_vectorstore(db)
-        if vectorstore:
-            print("Vectorstore ready!")
-        else:
-            print("Vectorstore not available, using keyword search fallback")
-    except Exception as e:
-        print(f"Error building vectorstore: {e}")
-        print("App will continue with keyword search fallback")
+        rag.build_vectorstore(db)
+        rag.build_blog_index(db)
     finally:
         db.close()
 
+def start_watchers():
+    if catalog.CATALOG_POLL_INTERVAL > 0:
+        app.state.catalog_watcher = catalog.CatalogWatcher(_on_doctors_changed)
+        app.state.catalog_watcher.start()
+    if rag.BLOG_POLL_INTERVAL > 0:
+        # New articles arrive from the ingestion job; no NOTIFY for blogs, so poll
+        app.state.blog_watcher = catalog.CatalogWatcher(
+            _on_blogs_changed, rag.BLOG_POLL_INTERVAL, listen=False, is_stale=rag.blog_index_stale, name="blog-watcher"
+        )
+        app.state.blog_watcher.start()
+    app.state.generation_watcher.start()
+    app.state.blog_generation_watcher.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for name in ("catalog_watcher", "blog_watcher", "generation_watcher", "blog_generation_watcher"):
+        watcher = getattr(app.state, name, None)
+        if watcher is not None:
+            watcher.stop()
+    if generations.writer_lock is not None:
+        generations.writer_lock.release()
+    await close_llm()
+    await dispose_async_engine()
+
 @app.get("/")
 def read_root():
     return {"message": "Med-Bot API is running"}
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    """Liveness: the process is up. Never waits on models or the database; 503 once warm-up gave up."""
+    if warmup.has_failed():
+        return JSONResponse({"status": "unhealthy", "failed": warmup.state["failed"]}, status_code=503)
+    return {"status": "healthy"}
+
+@app.get("/ready")
+def readiness_check():
+    """Readiness: 503 until the required warm-up steps have succeeded."""
+    return JSONResponse(warmup.status(), status_code=200 if warmup.is_ready() else 503)
+
+@app.get("/stats/cache")
+def cache_stats():
+    return {**rag.cache_stats(), "responses": response_cache_stats()}
+
+# ----------------------------
+# Prometheus metrics: stage/request histograms (app.core.observability) plus scrape-time gauges
+# ----------------------------
+def _pool_gauges():
+    # QueuePool reports overflow as negative until pool_size connections exist
+    return {
+        (engine_name, state): max(stats[state], 0)
+        for engine_name, stats in pool_stats().items()
+        for state in ("checkedout", "checkedin", "overflow", "waiting") if state in stats
+    }
+
+Gauge("medbot_db_pool_connections", "Database pool connections by state", ("engine", "state"), _pool_gauges)
+Gauge("medbot_index_rows", "Doctors in the served vector index", (), lambda: {(): len(rag.vectorstore)})
+Gauge("medbot_article_index_rows", "Articles in the served article index", (), lambda: {(): len(rag.blogstore)})
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/db")
+def db_stats():
+    """Connection pool occupancy: checked out, overflow, and async callers waiting for a connection."""
+    return pool_stats()
+
+@app.get("/stats/index")
+def index_stats():
+    """Which generation this worker serves; compare across workers to check they agree."""
+    store, articles = rag.vectorstore, rag.blogstore
+    return {
+        "pid": os.getpid(),
+        "role": "writer" if generations.is_writer() else "reader",
+        "version": store.version if store is not None else None,
+        "rows": len(store) if store is not None else 0,
+        "index_type": store.kind if store is not None else None,
+        "model": store.model if store is not None else None,
+        "embeddings": "server" if EMBEDDING_SOCKET else "local",
+        "city_partitions": rag.city_partitions.stats() if rag.city_partitions is not None else None,
+        "articles": {
+            "version": articles.version if articles is not None else None,
+            "rows": len(articles) if articles is not None else 0,
+        },
+    }
\ No newline at end of file
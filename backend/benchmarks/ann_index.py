@@ -0,0 +1,127 @@
+# ----------------------------
+# ANN index types: recall@k vs latency vs memory against the flat baseline
+# ----------------------------
+# Vectors are either a clustered synthetic set (fast, any size) or synthetic
+# doctors embedded with the configured backend (cached as .npy). Queries are
+# held-out points from the same distribution; exact flat search is ground truth.
+#
+#   python -m benchmarks.ann_index --rows 300000
+#   python -m benchmarks.ann_index --source embed --rows 50000 --cache /tmp/doctors50k.npy
+#   python -m benchmarks.ann_index --types hnsw --ef 16,32,64,128 --hnsw-m 16
+import argparse
+import os
+import time
+
+import faiss
+import numpy as np
+
+from app.core import vector_index
+from app.core.vector_index import VectorIndex
+
+from .common import percentile
+
+
+def synthetic_vectors(count: int, dim: int, clusters: int, seed: int):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, count)] + 0.35 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def embedded_vectors(count: int, cache: str = None):
+    if cache and os.path.exists(cache):
+        vectors = np.load(cache)
+        if len(vectors) >= count:
+            return vectors[:count]
+
+    from app.api.rag import doctor_text
+    from app.core.embeddings import get_base_embeddings
+    from types import SimpleNamespace
+
+    from .synthetic import generate_doctors
+
+    model = get_base_embeddings()
+    if model is None:
+        raise SystemExit("Embedding model failed to load")
+    texts = [doctor_text(SimpleNamespace(**d)) for d in generate_doctors(count)]
+    started = time.perf_counter()
+    vectors = np.asarray(model.embed_documents(texts), dtype=np.float32)
+    print(f"Embedded {count} doctors in {time.perf_counter() - started:.1f}s")
+    if cache:
+        np.save(cache, vectors)
+    return vectors
+
+
+def build(kind: str, ids, vectors):
+    started = time.perf_counter()
+    store = VectorIndex.empty(vectors.shape[1], kind=kind)
+    store.upsert(ids, vectors, [{} for _ in range(len(ids))])
+    return store, time.perf_counter() - started
+
+
+def evaluate(label, store, queries, truth, k, build_s):
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        found = store.search(query, k)
+        latencies.append(time.perf_counter() - started)
+        hits += len({doc_id for doc_id, _ in found} & set(expected.tolist()))
+    memory_mb = len(faiss.serialize_index(store.index)) / 1024 / 1024
+    print(
+        f"{label:<22} recall@{k}={hits / truth.size:6.3f}  "
+        f"p50={percentile(latencies, 50) * 1000:7.3f}ms  p99={percentile(latencies, 99) * 1000:7.3f}ms  "
+        f"index={memory_mb:8.1f}MB  build={build_s:6.1f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index types")
+    parser.add_argument("--source", choices=("synthetic", "embed"), default="synthetic")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=384, help="synthetic source only")
+    parser.add_argument("--clusters", type=int, default=1500, help="synthetic source only")
+    parser.add_argument("--cache", help=".npy file for embedded vectors")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", default="flat,hnsw,ivf-flat,ivf-pq")
+    parser.add_argument("--ef", default="16,32,64,128", help="HNSW efSearch values")
+    parser.add_argument("--nprobe", default="1,4,16,64", help="IVF nprobe values")
+    parser.add_argument("--hnsw-m", type=int, default=vector_index.HNSW_M)
+    parser.add_argument("--nlist", type=int, default=vector_index.IVF_NLIST, help="0 = auto")
+    parser.add_argument("--pq-m", type=int, default=vector_index.PQ_M)
+    parser.add_argument("--threads", type=int, default=1, help="FAISS OpenMP threads (1 = per-request cost)")
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+    vector_index.HNSW_M, vector_index.IVF_NLIST, vector_index.PQ_M = args.hnsw_m, args.nlist, args.pq_m
+
+    total = args.rows + args.queries
+    if args.source == "embed":
+        data = embedded_vectors(total, args.cache)
+    else:
+        data = synthetic_vectors(total, args.dim, args.clusters, seed=0)
+    vectors, queries = data[:args.rows], data[args.rows:]
+    ids = np.arange(1, args.rows + 1, dtype=np.int64)
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    truth = exact.search(queries, args.k)[1] + 1  # row i holds id i + 1
+    print(f"{args.rows} vectors (dim {vectors.shape[1]}), {len(queries)} queries, k={args.k}")
+
+    for kind in args.types.split(","):
+        store, build_s = build(kind, ids, vectors)
+        if kind == "hnsw":
+            for ef in map(int, args.ef.split(",")):
+                store.ef_search = ef
+                evaluate(f"hnsw M={args.hnsw_m} ef={ef}", store, queries, truth, args.k, build_s)
+        elif kind.startswith("ivf"):
+            nlist = faiss.downcast_index(store.index).nlist
+            for nprobe in map(int, args.nprobe.split(",")):
+                store.nprobe = nprobe
+                evaluate(f"{kind} {nlist}/{nprobe}", store, queries, truth, args.k, build_s)
+        else:
+            evaluate(kind, store, queries, truth, args.k, build_s)
+
+
+if __name__ == "__main__":
+    main()
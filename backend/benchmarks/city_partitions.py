@@ -0,0 +1,145 @@
+# ----------------------------
+# City-scoped queries: national index vs IDSelector filter vs per-city partitions
+# ----------------------------
+# Builds a city-skewed synthetic catalog (benchmarks/synthetic.py) in memory,
+# embedded with the hashing stand-in from benchmarks/common.py, and runs
+# "<speciality> in <city>" queries through rag.search_doctor_ids three ways:
+#
+#   national   the city is not used as a filter (similarity over the whole catalog)
+#   selector   the city filters the national index through a FAISS IDSelector
+#   partition  the city's own exact sub-index (app.core.partitions)
+#
+# precision@k counts results in the named city with the asked-for speciality;
+# in_city counts the city alone. Query vectors are computed up front, so the
+# latencies are ranking only.
+#
+#   python -m benchmarks.city_partitions --rows 50000 --index-types flat,hnsw
+#   python -m benchmarks.city_partitions --rows 200000 --weights 40,30,10,8,5,3,2,2
+import argparse
+import os
+import re
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # nothing is queried; app.db needs a URL to import
+os.environ["QUERY_CACHE_BACKEND"] = "memory"
+os.environ["QUERY_CACHE_TTL"] = "0"
+
+from app.api import rag
+from app.core import partitions as city_partitions
+from app.core.intent import IntentExtractor
+from app.core.vector_index import VectorIndex
+
+from .common import HashingEmbeddings, percentile
+from .synthetic import CITIES, generate_doctors
+
+QUERIES = [
+    ("cardiologist in {city}", r"cardio"),
+    ("skin specialist {city}", r"derma|skin"),
+    ("child specialist in {city}", r"pediatr|paediatr|child"),
+    ("dentist in {city}", r"dent"),
+    ("gynecologist in {city}", r"gyn"),
+    ("ent specialist in {city}", r"\bent\b"),
+    ("urologist {city}", r"urolog"),
+    ("psychiatrist in {city}", r"psychiatr"),
+    ("diabetes doctor in {city}", r"diabet|endocrin"),
+    ("eye specialist in {city}", r"ophthal"),
+    ("neurosurgeon {city}", r"neuro"),
+    ("oncologist in {city}", r"oncolog"),
+    # Symptoms only infer a speciality (a ranking hint, not a filter): the city is the only filter
+    ("chest pain and palpitations {city}", r"cardio"),
+    ("skin rash and itching in {city}", r"derma|skin"),
+    ("child has fever and cough {city}", r"pediatr|paediatr|child"),
+    ("tooth pain {city}", r"dent"),
+    ("anxiety and depression {city}", r"psychiatr|psycholog"),
+    ("kidney stones {city}", r"urolog|nephro"),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark per-city vector partitions on a city-skewed catalog")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--weights", default="40,30,10,8,5,3,2,2", help=f"relative share of {', '.join(CITIES)}")
+    parser.add_argument("--index-types", default="flat,hnsw")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def build_catalog(args):
+    weights = [float(w) for w in args.weights.split(",")]
+    if len(weights) != len(CITIES):
+        raise SystemExit(f"--weights needs {len(CITIES)} values")
+    started = time.perf_counter()
+    doctors = [SimpleNamespace(**d, updated_at=None) for d in generate_doctors(args.rows, args.seed, weights)]
+    texts = [rag.doctor_text(d) for d in doctors]
+    vectors = HashingEmbeddings().embed_documents(texts)
+    rows = [rag.doctor_row(d, text) for d, text in zip(doctors, texts)]
+    print(f"Generated and embedded {args.rows} doctors in {time.perf_counter() - started:.1f}s")
+    return doctors, vectors, rows
+
+
+def publish(kind, vectors, rows):
+    store = VectorIndex.empty(len(vectors[0]), "hashing-384", kind)
+    store.upsert(range(1, len(rows) + 1), vectors, rows)
+    started = time.perf_counter()
+    rag._publish(store)
+    built = time.perf_counter() - started
+    stats = rag.city_partitions.stats() if rag.city_partitions is not None else {}
+    print(f"[{kind}] published {len(store)} vectors; partitions {stats} built in {built:.2f}s")
+
+
+def run(label, queries, rows, k, repeat, use_city):
+    rag._result_cache.clear()
+    latencies, relevant, in_city, returned = [], 0, 0, 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text, vector, extraction, city, pattern in queries:
+            if not use_city:
+                extraction.city = None
+            t0 = time.perf_counter()
+            ids = rag.search_doctor_ids(text, k, extraction, vector)
+            latencies.append(time.perf_counter() - t0)
+            extraction.city = city
+            for doc_id in ids:
+                row = rows[doc_id - 1]
+                local = city in row["location"].lower()
+                in_city += local
+                relevant += local and bool(pattern.search((row["speciality"] or "").lower()))
+            returned += len(ids)
+    elapsed = time.perf_counter() - started
+    count = len(queries) * repeat
+    print(
+        f"  {label:<10} precision@{k}={relevant / (count * k):.3f}  in_city={in_city / max(returned, 1):.3f}  "
+        f"p50={percentile(latencies, 50) * 1000:6.2f}ms  p99={percentile(latencies, 99) * 1000:6.2f}ms  "
+        f"qps={count / elapsed:8.1f}"
+    )
+
+
+def main():
+    args = parse_args()
+    doctors, vectors, rows = build_catalog(args)
+    extractor = IntentExtractor(doctors)
+    embedder = HashingEmbeddings()
+    queries = []
+    for city in CITIES:
+        for template, pattern in QUERIES:
+            text = template.format(city=city)
+            extraction = extractor.extract(text)
+            queries.append((text, embedder.embed_query(text), extraction, extraction.city, re.compile(pattern)))
+    print(f"{len(queries)} queries x {args.repeat}, k={args.k}, city weights {args.weights}")
+
+    for kind in [t.strip() for t in args.index_types.split(",") if t.strip()]:
+        city_partitions.CITY_PARTITIONS = False
+        publish(kind, vectors, rows)
+        run("national", queries, rows, args.k, args.repeat, use_city=False)
+        run("selector", queries, rows, args.k, args.repeat, use_city=True)
+        city_partitions.CITY_PARTITIONS = True
+        publish(kind, vectors, rows)
+        run("partition", queries, rows, args.k, args.repeat, use_city=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# ----------------------------
+# Shared helpers for the benchmark scripts
+# ----------------------------
+import resource
+import statistics
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label, latencies, elapsed, errors=0):
+    """Print one aligned latency/throughput line and return the QPS."""
+    count = len(latencies)
+    qps = count / elapsed if elapsed else 0.0
+    print(
+        f"{label:<10} n={count:<5} errors={errors:<4} "
+        f"qps={qps:8.1f}  "
+        f"p50={percentile(latencies, 50) * 1000:7.1f}ms  "
+        f"p95={percentile(latencies, 95) * 1000:7.1f}ms  "
+        f"p99={percentile(latencies, 99) * 1000:7.1f}ms  "
+        f"mean={statistics.mean(latencies) * 1000 if latencies else 0:7.1f}ms"
+    )
+    return qps
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (Linux reports KB)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (Linux)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 1024 / 1024
+
+
+class HashingEmbeddings:
+    """
+    Deterministic, model-free stand-in for the sentence embedder: signed feature
+    hashing of stemmed unigrams and bigrams, L2-normalized. Lexical only, so
+    quality numbers measured with it are a floor, but runs need no model files.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _vector(self, text: str):
+        import zlib
+
+        import numpy as np
+
+        from app.core.intent import normalize_tokens
+
+        tokens = normalize_tokens(text)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_query(self, text: str):
+        return self._vector(text)
+
+    def embed_documents(self, texts):
+        return [self._vector(t) for t in texts]
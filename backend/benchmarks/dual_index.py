@@ -0,0 +1,126 @@
+# ----------------------------
+# Per-request overhead of searching the article index next to the doctor index
+# ----------------------------
+# Both indexes are filled with clustered synthetic vectors; the query "embedder"
+# hands back precomputed vectors after --embed-ms (a stand-in for MiniLM on CPU)
+# and counts its calls. Each query string is unique, so neither query cache helps.
+#
+#   doctors  rag.rank(..., articles=0)      doctor search only
+#   dual     rag.rank(..., articles=N)      one embedding, both indexes
+#   naive    doctor search, then a second embedding for the article search
+#
+#   python -m benchmarks.dual_index --doctors 20000 --articles 5000 --queries 2000
+import argparse
+import os
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # nothing is queried; app.db needs a URL to import
+
+from app.api import rag
+from app.core.vector_index import VectorIndex
+
+from .ann_index import synthetic_vectors
+from .common import percentile
+from .synthetic import generate_doctors
+
+QUERY_PHRASES = [
+    "chest pain and shortness of breath", "skin rash itching", "child with fever and cough",
+    "back pain specialist", "anxiety and stress", "blurred vision", "tooth pain", "kidney stones",
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure the cost of dual-index (doctors + articles) search")
+    parser.add_argument("--doctors", type=int, default=20_000)
+    parser.add_argument("--articles", type=int, default=5_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--n-articles", type=int, default=3)
+    parser.add_argument("--embed-ms", type=float, default=5.0, help="simulated query embedding time")
+    return parser.parse_args()
+
+
+class QueryEmbedder:
+    def __init__(self, vectors: dict, delay: float):
+        self.vectors, self.delay, self.calls = vectors, delay, 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return self.vectors[text]
+
+
+def build_indexes(args):
+    started = time.perf_counter()
+    vectors = synthetic_vectors(args.doctors + args.articles, args.dim, clusters=64, seed=1)
+    doctors = VectorIndex.empty(args.dim)
+    rows = [
+        rag.doctor_row(SimpleNamespace(**d, updated_at=None))
+        for d in generate_doctors(args.doctors)
+    ]
+    doctors.upsert(range(1, args.doctors + 1), vectors[:args.doctors], rows)
+    rag._publish(doctors)
+
+    articles = VectorIndex.empty(args.dim)
+    article_rows = [
+        {"hash": str(i), "updated_at": None, "title": f"Article {i}", "url": f"https://example.com/{i}",
+         "source": "Example Health", "published_at": None}
+        for i in range(args.articles)
+    ]
+    articles.upsert(range(1, args.articles + 1), vectors[args.doctors:], article_rows)
+    rag.blogstore = articles
+    rag.BLOG_MAX_DISTANCE = float("inf")  # measure the search itself, not the relevance cut
+    print(f"Built {args.doctors} doctor and {args.articles} article vectors in {time.perf_counter() - started:.1f}s")
+
+
+def run(label, queries, embedder, search):
+    rag._vector_cache.clear()
+    rag._result_cache.clear()
+    embedder.calls = 0
+    latencies, found = [], 0
+    started = time.perf_counter()
+    for text in queries:
+        t0 = time.perf_counter()
+        found += len(search(text))
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<8} p50={percentile(latencies, 50) * 1000:6.2f}ms  p99={percentile(latencies, 99) * 1000:6.2f}ms  "
+        f"qps={len(queries) / elapsed:7.1f}  embeds/request={embedder.calls / len(queries):.2f}  "
+        f"articles/request={found / len(queries):.2f}"
+    )
+    return percentile(latencies, 50)
+
+
+def main():
+    args = parse_args()
+    build_indexes(args)
+    query_vectors = synthetic_vectors(args.queries, args.dim, clusters=64, seed=2)
+    queries = [f"{QUERY_PHRASES[i % len(QUERY_PHRASES)]} {i}" for i in range(args.queries)]
+    embedder = QueryEmbedder(dict(zip(queries, query_vectors.tolist())), args.embed_ms / 1000)
+    rag.peek_embeddings = lambda: embedder
+
+    def doctors_only(text):
+        rag.rank(text, args.k, None, 0)
+        return []
+
+    def dual(text):
+        return rag.rank(text, args.k, None, args.n_articles)[1]
+
+    def naive(text):
+        rag.search_doctor_ids(text, args.k)
+        rag._vector_cache.clear()  # an independent article search embeds the query itself
+        return rag.search_articles(embedder.embed_query(text), args.n_articles)
+
+    base = run("doctors", queries, embedder, doctors_only)
+    with_articles = run("dual", queries, embedder, dual)
+    run("naive", queries, embedder, naive)
+    print(f"dual-index overhead at p50: {(with_articles - base) * 1000:+.2f}ms per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# ----------------------------
+# Embedding backends: top-k parity with torch, per-query latency and RSS
+# ----------------------------
+# Each backend runs in its own subprocess so RSS numbers are not polluted by the
+# others. Doctors from doctors_med_bot.csv and the query set are embedded by
+# every backend; top-k doctors per query are compared against the reference
+# backend (torch by default).
+#
+#   python -m benchmarks.embed_backends
+#   python -m benchmarks.embed_backends --backends torch,onnx-int8 --k 5 --min-overlap 0.8
+import argparse
+import csv
+import json
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from .common import percentile, peak_rss_mb
+from .load_chat import QUERIES
+from .synthetic import DEFAULT_CSV
+
+PARITY_QUERIES = QUERIES + [
+    "chest pain and shortness of breath",
+    "my child keeps vomiting",
+    "migraine that will not go away",
+    "pain while urinating",
+    "anxiety and trouble sleeping",
+    "blurry vision in one eye",
+    "knee pain after running",
+    "irregular periods",
+    "toothache and swollen gums",
+    "hair loss and dandruff",
+    "ear infection with discharge",
+    "high blood sugar",
+]
+
+
+def load_corpus(csv_path: str = DEFAULT_CSV):
+    from app.api.rag import doctor_text
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        return [doctor_text(SimpleNamespace(**row)) for row in csv.DictReader(f)]
+
+
+def run_backend(name: str, k: int, repeat: int) -> dict:
+    """Worker: load one backend, embed corpus + queries, return rankings and timings."""
+    from app.core.embeddings import load_backend
+
+    started = time.perf_counter()
+    model = load_backend(name)
+    model.embed_query("warm up")
+    load_s = time.perf_counter() - started
+
+    corpus = load_corpus()
+    started = time.perf_counter()
+    docs = np.asarray(model.embed_documents(corpus), dtype=np.float32)
+    corpus_s = time.perf_counter() - started
+
+    latencies = []
+    for _ in range(repeat):
+        for query in PARITY_QUERIES:
+            started = time.perf_counter()
+            model.embed_query(query)
+            latencies.append(time.perf_counter() - started)
+    queries = np.asarray([model.embed_query(q) for q in PARITY_QUERIES], dtype=np.float32)
+    top_k = np.argsort(-(queries @ docs.T), axis=1)[:, :k]
+
+    return {
+        "backend": name,
+        "load_s": load_s,
+        "corpus_s": corpus_s,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "rss_mb": peak_rss_mb(),
+        "top_k": top_k.tolist(),
+        "queries": queries.tolist(),
+    }
+
+
+def spawn(name: str, k: int, repeat: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.embed_backends", "--worker", name, "--k", str(k), "--repeat", str(repeat)],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        return {"backend": name, "error": result.stderr.strip().splitlines()[-1:] or ["failed"]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding backends (parity, latency, RSS)")
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--reference", default="torch", help="backend the others are compared against")
+    parser.add_argument("--min-overlap", type=float, default=0.8, help="fail below this mean top-k overlap")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.k, args.repeat)))
+        return
+
+    backends = args.backends.split(",")
+    results = [spawn(name, args.k, args.repeat) for name in backends]
+    reference = next((r for r in results if r["backend"] == args.reference and "error" not in r), None)
+
+    print(f"{len(PARITY_QUERIES)} queries x {args.repeat}, top-{args.k} parity vs {args.reference}")
+    print(f"{'backend':<10} {'load s':>7} {'corpus s':>9} {'p50 ms':>7} {'p99 ms':>7} {'rss MB':>7} {'overlap':>8} {'cosine':>7}")
+    failed = False
+    for r in results:
+        if "error" in r:
+            print(f"{r['backend']:<10} failed: {r['error'][0]}")
+            failed = True
+            continue
+        overlap = cosine = float("nan")
+        if reference is not None:
+            overlap = float(np.mean([
+                len(set(a) & set(b)) / args.k for a, b in zip(r["top_k"], reference["top_k"])
+            ]))
+            cosine = float(np.mean(np.sum(np.asarray(r["queries"]) * np.asarray(reference["queries"]), axis=1)))
+            failed |= overlap < args.min_overlap
+        print(
+            f"{r['backend']:<10} {r['load_s']:7.2f} {r['corpus_s']:9.2f} {r['p50_ms']:7.2f} "
+            f"{r['p99_ms']:7.2f} {r['rss_mb']:7.0f} {overlap:8.3f} {cosine:7.4f}"
+        )
+
+    if failed:
+        print(f"❌ A backend failed or its top-{args.k} overlap is below {args.min_overlap}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
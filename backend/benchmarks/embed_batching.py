@@ -0,0 +1,55 @@
+# ----------------------------
+# Query embedding throughput: one encode() per call vs micro-batching
+# ----------------------------
+#   python -m benchmarks.embed_batching --concurrency 32 --requests 2000
+#   python -m benchmarks.embed_batching --max-batch-size 64 --max-wait-ms 5
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.embeddings import BatchingEmbeddings, get_base_embeddings
+
+from .common import report
+from .load_chat import QUERIES
+
+
+def run(embed, total, concurrency):
+    latencies = []
+
+    def one(i):
+        started = time.perf_counter()
+        # Suffix keeps texts distinct so nothing upstream can short-circuit repeats
+        embed(f"{QUERIES[i % len(QUERIES)]} #{i}")
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched query embedding")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=3)
+    args = parser.parse_args()
+
+    base_embeddings = get_base_embeddings()
+    if base_embeddings is None:
+        raise SystemExit("Embedding model failed to load")
+
+    batching = BatchingEmbeddings(base_embeddings, args.max_batch_size, args.max_wait_ms)
+    base_embeddings.embed_query("warm up")  # exclude model warm-up from both runs
+
+    print(f"{args.requests} queries, concurrency {args.concurrency}")
+    plain_qps = report("unbatched", *run(base_embeddings.embed_query, args.requests, args.concurrency))
+    batched_qps = report("batched", *run(batching.embed_query, args.requests, args.concurrency))
+    print(f"Batches: {batching.stats()}")
+    if plain_qps:
+        print(f"Throughput gain: {batched_qps / plain_qps:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
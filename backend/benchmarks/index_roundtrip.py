@@ -0,0 +1,106 @@
+# ----------------------------
+# Index lifecycle check: load -> copy -> upsert -> save for every INDEX_TYPE
+# ----------------------------
+# Drives VectorIndex through the same steps as sync_vectorstore and the bulk
+# import append: build and save a generation, load it back (memory-mapped and
+# onto the heap), take the copy-on-write clone, upsert new and changed rows,
+# remove some, save, and repeat once more from the re-read generation. Checks
+# row counts, that the changed vectors are found by their own queries, that
+# exact vectors read back unchanged, and that the loaded index really is
+# file-backed when memory mapping is on. Exits non-zero if any type fails.
+#
+#   python -m benchmarks.index_roundtrip
+#   python -m benchmarks.index_roundtrip --types ivf-flat,ivf-pq --rows 20000
+import argparse
+import shutil
+import sys
+import tempfile
+
+import faiss
+import numpy as np
+
+from app.core import vector_index
+from app.core.vector_index import INDEX_FILE, VectorIndex, read_current_generation
+
+
+def row(doc_id: int) -> dict:
+    return {"hash": f"{doc_id:040x}", "updated_at": None, "name": f"Dr {doc_id}", "speciality": "General Physician"}
+
+
+def mapped(path: str) -> bool:
+    with open("/proc/self/maps") as f:
+        return any(path in line for line in f)
+
+
+def check_found(store: VectorIndex, ids, vectors, k: int = 10, min_recall: float = 0.95):
+    """HNSW and PQ are approximate, so a few misses are allowed."""
+    missing = [int(i) for i, v in zip(ids, vectors) if int(i) not in {d for d, _ in store.search(v, k)}]
+    if len(missing) > (1 - min_recall) * len(ids):
+        raise AssertionError(f"{len(missing)} upserted ids not found by their own vector, e.g. {missing[:5]}")
+
+
+def roundtrip(kind: str, mmap: bool, rows: int, dim: int, root: str):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((rows, dim)).astype(np.float32)
+    ids = np.arange(1, rows + 1, dtype=np.int64)
+
+    store = VectorIndex.empty(dim, model="check", kind=kind)
+    store.upsert(ids, vectors, [row(i) for i in ids])
+    store.save(root)
+    expected = rows
+
+    for step in range(2):
+        loaded = VectorIndex.load(root, mmap=mmap)
+        if loaded.kind != kind or len(loaded) != expected:
+            raise AssertionError(f"loaded {loaded.kind} with {len(loaded)} rows, expected {kind} with {expected}")
+        path = f"{root}/{read_current_generation(root)}/{INDEX_FILE}"
+        if mmap and vector_index.MMAP_SUPPORTED and not mapped(path):
+            raise AssertionError(f"{path} is not memory-mapped")
+        # City partitions read exact vectors straight from the published (mapped) index
+        untouched = ids[200:300]
+        stored = loaded.vectors(untouched)
+        if stored is not None and not np.allclose(stored, vectors[untouched - 1], atol=1e-5):
+            raise AssertionError("stored vectors differ from the ones indexed")
+
+        draft = loaded.copy()
+        new_ids = np.arange(expected + 1, expected + 101, dtype=np.int64) + step * 1000
+        changed_ids = ids[step * 50:step * 50 + 50]
+        upsert_ids = np.concatenate([new_ids, changed_ids])
+        upsert_vectors = rng.standard_normal((len(upsert_ids), dim)).astype(np.float32)
+        draft.upsert(upsert_ids, upsert_vectors, [row(i) for i in upsert_ids])
+        draft.remove(ids[-(step + 1) * 10:-step * 10 or None])
+        expected += len(new_ids) - 10
+        draft.save(root)
+        if len(draft) != expected:
+            raise AssertionError(f"saved {len(draft)} rows, expected {expected}")
+        check_found(draft, upsert_ids, upsert_vectors)
+        if len(loaded) != expected - len(new_ids) + 10:
+            raise AssertionError("the published index changed while its copy was updated")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check VectorIndex load/copy/upsert/save for each index type")
+    parser.add_argument("--types", default=",".join(vector_index.INDEX_TYPES))
+    parser.add_argument("--rows", type=int, default=10000, help="ivf-pq trains 2**PQ_NBITS centroids per sub-quantizer")
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    print(f"faiss {faiss.__version__}, memory mapping {'supported' if vector_index.MMAP_SUPPORTED else 'unavailable'}")
+    failures = 0
+    for kind in args.types.split(","):
+        for mmap in (True, False):
+            root = tempfile.mkdtemp(prefix="medbot_roundtrip_")
+            label = f"{kind:<9} {'mmap' if mmap else 'heap'}"
+            try:
+                roundtrip(kind, mmap, args.rows, args.dim, root)
+                print(f"{label}  ok")
+            except Exception as e:
+                failures += 1
+                print(f"{label}  FAILED: {type(e).__name__}: {str(e).splitlines()[0][:160]}")
+            finally:
+                shutil.rmtree(root, ignore_errors=True)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
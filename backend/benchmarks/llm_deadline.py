@@ -0,0 +1,145 @@
+# ----------------------------
+# Chat latency with a slow-tailed LLM: deadlines, hedging and the template fast path
+# ----------------------------
+# Runs golden queries (benchmarks/golden_queries.json) through chat._answer
+# against benchmarks/stub_llm.py started in-process, with a latency tail injected
+# (--slow-rate of the requests take --slow-ms). Each mode adds one feature:
+#
+#   before     every answer waits for the LLM (up to LLM_REQUEST_TIMEOUT)
+#   skip       unambiguous doctor searches are answered from templates (INTENT_SKIP_LLM)
+#   deadline   + CHAT_DEADLINE: a late LLM answer is cancelled, the template is sent
+#   hedge      + LLM_HEDGE: a second request after the recent p95 LLM latency
+#
+# Reported per mode: p50/p95/p99 request latency, answers by source, upstream calls,
+# and the deadline / hedge / skip counters. Needs langchain_groq (the real client).
+#
+#   python -m benchmarks.llm_deadline --latency-ms 300 --jitter-ms 100 --slow-rate 0.05 --slow-ms 4000 --deadline 1.0
+import argparse
+import asyncio
+import os
+import threading
+import time
+
+from .common import percentile
+
+MODES = ("before", "skip", "deadline", "hedge")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark chat deadlines and LLM hedging against a stub LLM")
+    parser.add_argument("--url", help="database URL (default: a SQLite file per row count under /tmp)")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reseed", action="store_true")
+    parser.add_argument("--embedder", choices=("hashing", "model"), default="hashing")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-ms", type=float, default=4000)
+    parser.add_argument("--deadline", type=float, default=1.0, help="CHAT_DEADLINE for the deadline and hedge modes")
+    parser.add_argument("--stub-port", type=int, default=9101)
+    return parser.parse_args()
+
+
+def start_stub(args):
+    import uvicorn
+
+    from .stub_llm import create_app
+
+    app = create_app(args.latency_ms, args.jitter_ms, slow_rate=args.slow_rate, slow_ms=args.slow_ms, seed=args.seed)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.stub_port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return app
+
+
+def counter_total(counter, **labels) -> float:
+    return sum(
+        value for key, value in counter._values.items()
+        if all(key[counter.labels.index(n)] == v for n, v in labels.items())
+    )
+
+
+def configure(mode: str, args):
+    from app.api import chat
+
+    chat.INTENT_SKIP_LLM = mode != "before"
+    chat.CHAT_DEADLINE = args.deadline if mode in ("deadline", "hedge") else 0.0
+    chat.LLM_HEDGE = mode == "hedge"
+
+
+async def run_mode(mode, queries, args, stub):
+    from app.api import chat
+    from app.core import llm
+
+    configure(mode, args)
+    llm.llm_latency = chat.llm_latency = llm.LatencyWindow()  # each mode learns its own p95
+    counters = {
+        "deadline": lambda: counter_total(chat.LLM_DEADLINE_HITS),
+        "hedges": lambda: counter_total(chat.LLM_HEDGES),
+        "hedge_wins": lambda: counter_total(chat.LLM_HEDGES, winner="hedge"),
+        "skipped": lambda: counter_total(chat.LLM_SKIPPED),
+    }
+    before = {name: read() for name, read in counters.items()}
+    calls_before = stub.state.calls
+    latencies, sources = [], {}
+
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def one(i):
+        # A unique suffix keeps the response cache and single-flight out of the measurement
+        text = f"{queries[i % len(queries)]['query']} ({i})"
+        async with slots:
+            t0 = time.perf_counter()
+            _, _, source = await chat._answer(text)
+            latencies.append(time.perf_counter() - t0)
+        sources[source] = sources.get(source, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    deltas = {name: int(read() - before[name]) for name, read in counters.items()}
+    print(
+        f"{mode:<9} p50={percentile(latencies, 50) * 1000:7.1f}ms  p95={percentile(latencies, 95) * 1000:7.1f}ms  "
+        f"p99={percentile(latencies, 99) * 1000:7.1f}ms  qps={len(latencies) / elapsed:6.1f}  "
+        f"llm_calls={stub.state.calls - calls_before}"
+    )
+    print(f"{'':<9} answers={dict(sorted(sources.items()))}  counters={deltas}")
+
+
+def main():
+    args = parse_args()
+    from . import retrieval
+
+    args.url = args.url or f"sqlite:////tmp/medbot_bench_{args.rows}.db"
+    retrieval.configure_environment(args)
+    os.environ["LLM_REQUEST_TIMEOUT"] = str(max(10.0, args.slow_ms / 1000 + 1))  # "before" waits out the tail
+
+    retrieval.prepare_database(args)
+    retrieval.use_embedder(args.embedder)
+    retrieval.build_index()
+    queries = retrieval.load_golden(retrieval.GOLDEN_PATH)
+    stub = start_stub(args)
+    print(
+        f"{args.requests} requests, concurrency {args.concurrency}; stub LLM {args.latency_ms:.0f}±{args.jitter_ms:.0f}ms "
+        f"with {args.slow_rate:.0%} at {args.slow_ms:.0f}ms; deadline {args.deadline}s"
+    )
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        raise SystemExit(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    async def run_all():
+        # One event loop for every mode: the pooled LLM client is bound to it
+        for mode in modes:
+            await run_mode(mode, queries, args, stub)
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
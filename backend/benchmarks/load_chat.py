@@ -0,0 +1,165 @@
+# ----------------------------
+# Load-test harness for the /api/chat pipeline
+# ----------------------------
+# Two modes, both run offline against benchmarks/stub_llm.py instead of Groq:
+#
+#   llm   Compares the old request pattern (new ChatGroq per call + blocking invoke
+#         on a 40-thread pool, FastAPI's default) with the shared async client.
+#           python -m benchmarks.load_chat llm --requests 400 --concurrency 200
+#
+#   http  Drives a running backend end to end.
+#           python -m benchmarks.stub_llm --port 9100 &
+#           GROQ_API_KEY=stub GROQ_API_BASE=http://127.0.0.1:9100 uvicorn app.main:app &
+#           python -m benchmarks.load_chat http --url http://127.0.0.1:8000 [--stream]
+import argparse
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import uvicorn
+
+from .common import report
+
+QUERIES = [
+    "need a cardiologist in lahore",
+    "skin rash and itching",
+    "child has fever and cough",
+    "looking for a dentist in karachi",
+    "back pain specialist islamabad",
+    "what are the symptoms of diabetes",
+]
+
+DEFAULT_THREADPOOL_SIZE = 40  # anyio's default worker limit used by sync FastAPI endpoints
+
+
+async def run_concurrent(call, total, concurrency):
+    """Run `call` `total` times with at most `concurrency` in flight, returning latencies."""
+    latencies, errors = [], 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors
+        async with slots:
+            started = time.perf_counter()
+            try:
+                await call(i)
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return latencies, time.perf_counter() - started, errors
+
+
+def start_stub(port, latency_ms):
+    from .stub_llm import create_app
+
+    server = uvicorn.Server(
+        uvicorn.Config(create_app(latency_ms), host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+# ----------------------------
+# 1️⃣ LLM client comparison
+# ----------------------------
+async def compare_llm(args):
+    base_url = f"http://127.0.0.1:{args.stub_port}"
+    os.environ["GROQ_API_KEY"] = os.environ.get("GROQ_API_KEY") or "stub"
+    os.environ["GROQ_API_BASE"] = base_url
+    server = start_stub(args.stub_port, args.latency_ms)
+
+    from langchain_groq import ChatGroq
+    from app.core import llm as shared
+
+    messages = shared.build_messages("need a cardiologist in lahore")
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=DEFAULT_THREADPOOL_SIZE)
+
+    def legacy_call():
+        client = ChatGroq(
+            groq_api_key="stub", base_url=base_url, model=shared.GROQ_MODEL,
+            temperature=0.3, max_tokens=200, max_retries=0,
+        )
+        return client.invoke(messages)
+
+    async def legacy(_):
+        await loop.run_in_executor(pool, legacy_call)
+
+    async def pooled(_):
+        await shared.get_llm().ainvoke(messages)
+
+    print(f"Stub latency {args.latency_ms:.0f}ms, {args.requests} requests, concurrency {args.concurrency}")
+    legacy_qps = report("legacy", *await run_concurrent(legacy, args.requests, args.concurrency))
+    shared_qps = report("shared", *await run_concurrent(pooled, args.requests, args.concurrency))
+    if legacy_qps:
+        print(f"Throughput gain: {shared_qps / legacy_qps:.1f}x")
+
+    pool.shutdown(wait=False)
+    await shared.close_llm()
+    server.should_exit = True
+
+
+# ----------------------------
+# 2️⃣ End-to-end HTTP load
+# ----------------------------
+async def drive_http(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        first_byte = []
+
+        async def call(i):
+            response = await client.post("/api/chat", json={"message": QUERIES[i % len(QUERIES)]})
+            response.raise_for_status()
+
+        async def call_stream(i):
+            started = time.perf_counter()
+            payload = {"message": QUERIES[i % len(QUERIES)]}
+            async with client.stream("POST", "/api/chat/stream", json=payload) as response:
+                response.raise_for_status()
+                seen_first = False
+                async for _ in response.aiter_bytes():
+                    if not seen_first:
+                        first_byte.append(time.perf_counter() - started)
+                        seen_first = True
+
+        print(f"{args.url}: {args.requests} requests, concurrency {args.concurrency}")
+        if args.stream:
+            latencies, elapsed, errors = await run_concurrent(call_stream, args.requests, args.concurrency)
+            report("ttfb", first_byte, elapsed)
+            report("stream", latencies, elapsed, errors)
+        else:
+            report("chat", *await run_concurrent(call, args.requests, args.concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Med-Bot chat pipeline")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    llm_parser = sub.add_parser("llm", help="compare per-request vs shared LLM clients")
+    llm_parser.add_argument("--stub-port", type=int, default=9100)
+    llm_parser.add_argument("--latency-ms", type=float, default=400)
+
+    http_parser = sub.add_parser("http", help="load a running backend")
+    http_parser.add_argument("--url", default="http://127.0.0.1:8000")
+    http_parser.add_argument("--timeout", type=float, default=60)
+    http_parser.add_argument("--stream", action="store_true", help="use /api/chat/stream and report TTFB")
+
+    for p in (llm_parser, http_parser):
+        p.add_argument("--requests", type=int, default=400)
+        p.add_argument("--concurrency", type=int, default=200)
+
+    args = parser.parse_args()
+    asyncio.run(compare_llm(args) if args.mode == "llm" else drive_http(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# ----------------------------
+# Index metadata: JSON manifest vs memory-mapped columnar rows.bin
+# ----------------------------
+#   python -m benchmarks.metadata_store --rows 500000
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+from types import SimpleNamespace
+
+from app.api.rag import doctor_row
+from app.core.row_store import RowFile, write_rows
+
+from .common import rss_mb
+from .synthetic import generate_doctors
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def measure(label, path, write, open_, ids, lookups):
+    _, write_s = timed(write)
+    gc.collect()
+    before = rss_mb()
+    rows, open_s = timed(open_)
+    opened_mb = rss_mb() - before
+    sample = random.Random(0).sample(ids, min(lookups, len(ids)))
+    _, lookup_s = timed(lambda: [rows[i]["name"] for i in sample])
+    _, scan_s = timed(lambda: sum(1 for row in rows.values() if row["fee"] and row["fee"] > 1000))
+    print(
+        f"{label:<9} size={os.path.getsize(path) / 1024 / 1024:7.1f}MB  write={write_s:6.2f}s  "
+        f"open={open_s * 1000:9.2f}ms  rss+={opened_mb:7.1f}MB  "
+        f"lookup={lookup_s / len(sample) * 1e6:6.2f}us  scan={scan_s:6.2f}s"
+    )
+    del rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare index metadata formats")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rows = {
+        i: doctor_row(SimpleNamespace(id=i, updated_at=None, **d))
+        for i, d in enumerate(generate_doctors(args.rows), start=1)
+    }
+    ids = list(rows)
+    print(f"{args.rows} rows")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path, bin_path = os.path.join(tmp, "manifest.json"), os.path.join(tmp, "rows.bin")
+
+        def write_json():
+            with open(json_path, "w") as f:
+                json.dump({"rows": rows}, f, separators=(",", ":"))
+
+        def open_json():
+            with open(json_path) as f:
+                return {int(k): v for k, v in json.load(f)["rows"].items()}
+
+        measure("json", json_path, write_json, open_json, ids, args.lookups)
+        measure("rows.bin", bin_path, lambda: write_rows(bin_path, rows), lambda: RowFile(bin_path), ids, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# ----------------------------
+# Multi-worker deployment check: shared index memory and generation consistency
+# ----------------------------
+# Boots `uvicorn --workers N` (optionally behind one embedding server), waits
+# until every worker serves an index, reports per-worker RSS, PSS (shared pages
+# split between the processes mapping them) and USS (pages only this worker
+# holds), plus the Rss/Pss of the mapped generation files alone. A shared index
+# shows up as index PSS well below index RSS; an index read onto each worker's
+# heap shows up in USS instead. Then edits one doctor and checks that every
+# worker converges on the writer's new generation.
+#
+#   python -m benchmarks.multiworker --workers 4 --embedding-server
+#   python -m benchmarks.multiworker --workers 8 --max-pss-mb 300
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import text
+
+from app.db.database import SessionLocal
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+
+INDEX_FILES = ("index.faiss", "rows.bin")
+
+
+def memory_mb(pid: int) -> dict:
+    """Rss, Pss and Uss (private clean + dirty) of a process from /proc/<pid>/smaps_rollup."""
+    values = {"uss": 0.0}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key.lower()] = int(rest.split()[0]) / 1024
+            elif key in ("Private_Clean", "Private_Dirty"):
+                values["uss"] += int(rest.split()[0]) / 1024
+    return values
+
+
+def index_mapping_mb(pid: int) -> dict:
+    """Rss and Pss of the generation files (index.faiss, rows.bin) this process maps."""
+    values, counting = {"rss": 0.0, "pss": 0.0}, False
+    with open(f"/proc/{pid}/smaps") as f:
+        for line in f:
+            fields = line.split()
+            if not fields[0].endswith(":"):
+                # mapping header: "start-end perms offset dev inode [path]"
+                counting = len(fields) > 5 and fields[5].endswith(INDEX_FILES)
+            elif counting and fields[0] in ("Rss:", "Pss:"):
+                values[fields[0][:-1].lower()] += int(fields[1]) / 1024
+    return values
+
+
+def poll_workers(url: str, workers: int, timeout: float, want=lambda s: s["version"] is not None):
+    """Hit /stats/index on fresh connections until `workers` distinct pids satisfy `want`."""
+    seen, deadline = {}, time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            stats = httpx.get(f"{url}/stats/index", timeout=2).json()
+            seen[stats["pid"]] = stats
+        except httpx.HTTPError:
+            time.sleep(0.2)
+            continue
+        if len(seen) >= workers and all(want(s) for s in seen.values()):
+            return seen
+        time.sleep(0.02)
+    return seen
+
+
+def touch_doctor(suffix: str):
+    """Change one doctor's keywords (content hash changes, so the writer re-embeds it)."""
+    db = SessionLocal()
+    try:
+        doctor_id = db.execute(text("SELECT min(id) FROM doctors")).scalar()
+        original = db.execute(text("SELECT keywords FROM doctors WHERE id = :i"), {"i": doctor_id}).scalar()
+        db.execute(
+            text("UPDATE doctors SET keywords = :k, updated_at = CURRENT_TIMESTAMP WHERE id = :i"),
+            {"k": f"{original or ''}{suffix}", "i": doctor_id},
+        )
+        db.commit()
+        return doctor_id, original
+    finally:
+        db.close()
+
+
+def restore_doctor(doctor_id: int, keywords: str):
+    db = SessionLocal()
+    try:
+        db.execute(
+            text("UPDATE doctors SET keywords = :k, updated_at = CURRENT_TIMESTAMP WHERE id = :i"),
+            {"k": keywords, "i": doctor_id},
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check memory sharing and consistency across uvicorn workers")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--embedding-server", action="store_true", help="run one shared embedding process")
+    parser.add_argument("--timeout", type=float, default=180)
+    parser.add_argument("--max-pss-mb", type=float, default=0, help="fail if any worker's PSS exceeds this")
+    parser.add_argument("--skip-update", action="store_true", help="do not edit a doctor to test propagation")
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.port}"
+    env = dict(os.environ, CATALOG_POLL_INTERVAL=os.getenv("CATALOG_POLL_INTERVAL", "1"))
+    procs = []
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            if args.embedding_server:
+                env["EMBEDDING_SOCKET"] = os.path.join(tmp, "embed.sock")
+                procs.append(subprocess.Popen(
+                    [sys.executable, "-m", "app.core.embedding_server", "--socket", env["EMBEDDING_SOCKET"]],
+                    cwd=BACKEND_DIR, env=env,
+                ))
+                deadline = time.monotonic() + args.timeout
+                while not os.path.exists(env["EMBEDDING_SOCKET"]) and time.monotonic() < deadline:
+                    time.sleep(0.2)
+
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+                 "--workers", str(args.workers), "--log-level", "warning"],
+                cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+            )
+            procs.append(server)
+
+            started = time.monotonic()
+            seen = poll_workers(url, args.workers, args.timeout)
+            if len(seen) < args.workers or any(s["version"] is None for s in seen.values()):
+                raise SystemExit(f"❌ Only {len(seen)} of {args.workers} workers came up with an index")
+            print(f"{args.workers} workers serving an index after {time.monotonic() - started:.1f}s")
+
+            print(f"{'pid':>8} {'role':<7} {'version':<11} {'type':<8} {'rows':>7} {'rss MB':>8} {'pss MB':>8} "
+                  f"{'uss MB':>8} {'idx rss':>8} {'idx pss':>8}")
+            totals = {"rss": 0.0, "pss": 0.0, "uss": 0.0, "idx_rss": 0.0, "idx_pss": 0.0}
+            for pid, stats in sorted(seen.items()):
+                mem, idx = memory_mb(pid), index_mapping_mb(pid)
+                for key in ("rss", "pss", "uss"):
+                    totals[key] += mem[key]
+                totals["idx_rss"] += idx["rss"]
+                totals["idx_pss"] += idx["pss"]
+                print(f"{pid:>8} {stats['role']:<7} {stats['version']:<11} {stats['index_type'] or '':<8} "
+                      f"{stats['rows']:>7} {mem['rss']:8.1f} {mem['pss']:8.1f} {mem['uss']:8.1f} "
+                      f"{idx['rss']:8.1f} {idx['pss']:8.1f}")
+                if args.max_pss_mb and mem["pss"] > args.max_pss_mb:
+                    failures.append(f"worker {pid} PSS {mem['pss']:.0f} MB > {args.max_pss_mb:.0f} MB")
+            print(f"{'total':>8} {'':<7} {'':<11} {'':<8} {'':>7} {totals['rss']:8.1f} {totals['pss']:8.1f} "
+                  f"{totals['uss']:8.1f} {totals['idx_rss']:8.1f} {totals['idx_pss']:8.1f}")
+            if args.embedding_server:
+                mem = memory_mb(procs[0].pid)
+                print(f"embedding server rss={mem['rss']:.1f} MB pss={mem['pss']:.1f} MB uss={mem['uss']:.1f} MB")
+
+            writers = [pid for pid, s in seen.items() if s["role"] == "writer"]
+            if len(writers) != 1:
+                failures.append(f"expected exactly one writer, found {len(writers)}")
+            if len({s["version"] for s in seen.values()}) != 1:
+                failures.append(f"workers disagree on version: {sorted({s['version'] for s in seen.values()})}")
+
+            if not args.skip_update:
+                before = next(iter(seen.values()))["version"]
+                doctor_id, original = touch_doctor(" multiworker-check")
+                try:
+                    started = time.monotonic()
+                    seen = poll_workers(url, args.workers, args.timeout, want=lambda s: s["version"] != before)
+                    versions = {s["version"] for s in seen.values()}
+                    if len(seen) < args.workers or before in versions or len(versions) != 1:
+                        failures.append(f"workers did not converge after an edit: {sorted(versions)}")
+                    else:
+                        print(f"Edit propagated to all workers ({before} -> {versions.pop()}) "
+                              f"in {time.monotonic() - started:.1f}s")
+                finally:
+                    restore_doctor(doctor_id, original)
+        finally:
+            for proc in reversed(procs):
+                proc.terminate()
+                proc.wait()
+
+    if failures:
+        print("❌ " + "\n❌ ".join(failures))
+        sys.exit(1)
+    print("✅ Workers share one index and agree on its version")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# ----------------------------
+# Startup budget: import time of app.main and time to /health and /ready
+# ----------------------------
+#   python -m benchmarks.startup_profile --top 20 --budget-ms 1500
+#   python -m benchmarks.startup_profile --serve      # also boot uvicorn and poll the probes
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+
+def import_profile(module: str):
+    """Run `python -X importtime -c "import <module>"` and return [(cumulative_us, self_us, name)]."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return entries
+
+
+def direct_imports(entries, module: str):
+    """Entries imported directly by `module` (importtime lists children before their parent)."""
+    names = [name for _, _, name in entries]
+    end = next((i for i, n in enumerate(names) if n == f" {module}"), len(entries))
+    start = end
+    while start > 0 and names[start - 1].startswith("  "):
+        start -= 1
+    return [e for e in entries[start:end] if e[2].startswith("   ") and not e[2].startswith("    ")]
+
+
+def time_probes(port: int, timeout: float):
+    """Boot uvicorn and return seconds until /health and /ready first answer 200."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL,
+    )
+    started = time.perf_counter()
+    seen = {}
+    try:
+        while len(seen) < 2 and time.perf_counter() - started < timeout:
+            for probe in ("health", "ready"):
+                if probe in seen:
+                    continue
+                try:
+                    if httpx.get(f"http://127.0.0.1:{port}/{probe}", timeout=1).status_code == 200:
+                        seen[probe] = time.perf_counter() - started
+                except httpx.HTTPError:
+                    pass
+            time.sleep(0.05)
+        if "ready" in seen:
+            steps = httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1).json()["steps"]
+            for name, step in steps.items():
+                print(f"  warm-up {name:<11} {step['ms']:>9.1f} ms {'' if step['ok'] else 'FAILED'}")
+    finally:
+        proc.terminate()
+        proc.wait()
+    return seen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile app import time and probe latency")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=0, help="exit 1 if the import exceeds this")
+    parser.add_argument("--serve", action="store_true")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    entries = import_profile(args.module)
+    total_ms = next((c for c, _, n in entries if n.strip() == args.module), 0) / 1000
+    print(f"import {args.module}: {total_ms:.0f} ms")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative, self_us, name in sorted(direct_imports(entries, args.module), reverse=True)[:args.top]:
+        print(f"{cumulative / 1000:>14.1f} {self_us / 1000:>9.1f}  {name.strip()}")
+
+    if args.serve:
+        seen = time_probes(args.port, args.timeout)
+        for probe in ("health", "ready"):
+            print(f"/{probe}: " + (f"{seen[probe]:.2f}s" if probe in seen else "not ready before timeout"))
+
+    if args.budget_ms and total_ms > args.budget_ms:
+        print(f"❌ Import budget exceeded: {total_ms:.0f} ms > {args.budget_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
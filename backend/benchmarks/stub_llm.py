@@ -0,0 +1,118 @@
+# ----------------------------
+# Local stand-in for the Groq chat completions API
+# ----------------------------
+# Speaks the OpenAI-compatible wire format the Groq SDK uses, with a configurable
+# artificial time-to-first-token (and per-token delay when `stream` is requested),
+# so load tests never touch the real upstream. --slow-rate sends that fraction of
+# requests to a --slow-ms tail, the kind of straggler deadlines and hedging are for.
+#
+#   python -m benchmarks.stub_llm --port 9100 --latency-ms 400
+#   python -m benchmarks.stub_llm --port 9100 --latency-ms 300 --jitter-ms 100 --slow-rate 0.05 --slow-ms 4000
+#   GROQ_API_KEY=stub GROQ_API_BASE=http://127.0.0.1:9100 uvicorn app.main:app
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+STUB_REPLY = (
+    "I've found some healthcare providers that match your request. "
+    "Please review their profiles below and contact them directly for appointments."
+)
+
+
+def _stream_chunks(completion_id: str, model: str, token_delay: float):
+    async def chunks():
+        created = int(time.time())
+        for i, word in enumerate(STUB_REPLY.split(" ")):
+            await asyncio.sleep(token_delay)
+            delta = {"content": word if i == 0 else f" {word}"}
+            if i == 0:
+                delta["role"] = "assistant"
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return chunks()
+
+
+def create_app(latency_ms: float = 400, jitter_ms: float = 0, token_delay_ms: float = 20,
+               slow_rate: float = 0.0, slow_ms: float = 0.0, seed: int = None):
+    app = FastAPI(title="Stub LLM")
+    app.state.calls = 0
+    app.state.slow = 0
+    rng = random.Random(seed)
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        delay = max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000
+        if slow_rate and rng.random() < slow_rate:
+            app.state.slow += 1
+            delay = slow_ms / 1000
+        await asyncio.sleep(delay)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        if body.get("stream"):
+            return StreamingResponse(
+                _stream_chunks(completion_id, body.get("model", "stub"), token_delay_ms / 1000),
+                media_type="text/event-stream",
+            )
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": STUB_REPLY},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.get("/stats")
+    def stats():
+        return {"calls": app.state.calls, "slow": app.state.slow}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a stub Groq-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=400)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--token-delay-ms", type=float, default=20)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of requests that take --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=4000)
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.jitter_ms, args.token_delay_ms, args.slow_rate, args.slow_ms)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
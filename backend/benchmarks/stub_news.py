@@ -0,0 +1,109 @@
+# ----------------------------
+# Local stand-in for the NewsAPI /v2/everything endpoint
+# ----------------------------
+# Replays a fixture recorded with `python -m app.ingest.blogs --record` (topics
+# it does not contain, or every topic without --fixture, get deterministic
+# synthetic articles, some shared between topics and some with tracking
+# parameters, to exercise URL dedupe). Responses carry an ETag and honour
+# If-None-Match; --error-rate injects 429/503 replies to exercise retries.
+#
+#   python -m benchmarks.stub_news --port 9200 --latency-ms 80 --error-rate 0.05
+#   python -m app.ingest.blogs --base-url http://127.0.0.1:9200/v2/everything
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+
+import uvicorn
+from fastapi import FastAPI, Query, Request, Response
+
+
+def synthetic_articles(topic: str, count: int, seed: int = 0, shared_pool: int = 50, overlap: float = 0.3):
+    rng = random.Random(f"{seed}:{topic}")
+    slug = "-".join(topic.lower().split())
+    articles = []
+    for i in range(count):
+        if rng.random() < overlap:
+            n = rng.randrange(shared_pool)
+            url = f"https://www.health.example.com/shared/{n}/"
+            if rng.random() < 0.5:
+                url += "?utm_source=newsapi"
+            title = f"Shared health story {n}"
+        else:
+            url = f"https://news.example.com/{slug}/{i}"
+            title = f"{topic.title()}: what to know ({i})"
+        articles.append({
+            "source": {"id": None, "name": "Example Health"},
+            "title": title,
+            "description": f"Synthetic article {i} about {topic}.",
+            "url": url,
+            "publishedAt": f"2026-0{1 + i % 9}-1{i % 10}T08:30:00Z",
+        })
+    return articles
+
+
+def create_app(fixture: dict = None, latency_ms: float = 50, jitter_ms: float = 0, error_rate: float = 0.0, seed: int = 0):
+    app = FastAPI(title="Stub NewsAPI")
+    app.state.stats = {"requests": 0, "ok": 0, "not_modified": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+    rng = random.Random(seed)
+
+    @app.get("/v2/everything")
+    async def everything(request: Request, q: str = Query(...), pageSize: int = Query(20)):
+        stats = app.state.stats
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            await asyncio.sleep(max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000)
+            if rng.random() < error_rate:
+                stats["errors"] += 1
+                if rng.random() < 0.5:
+                    return Response(status_code=429, headers={"Retry-After": "0"})
+                return Response(status_code=503)
+
+            if fixture is not None and q in fixture:
+                articles = fixture[q][:pageSize]
+            else:
+                articles = synthetic_articles(q, pageSize, seed)
+            body = json.dumps({"status": "ok", "totalResults": len(articles), "articles": articles})
+            etag = '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+            if request.headers.get("if-none-match") == etag:
+                stats["not_modified"] += 1
+                return Response(status_code=304, headers={"ETag": etag})
+            stats["ok"] += 1
+            return Response(body, media_type="application/json", headers={"ETag": etag})
+        finally:
+            stats["in_flight"] -= 1
+
+    @app.get("/stats")
+    def stats():
+        return app.state.stats
+
+    return app
+
+
+def load_fixture(path: str):
+    if not path:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a stub NewsAPI server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--fixture", help="JSON {topic: [articles]} written by app.ingest.blogs --record")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_app(load_fixture(args.fixture), args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# ----------------------------
+# Synthetic doctors that follow the `doctors` schema
+# ----------------------------
+# Speciality / keyword / symptom / disease combinations are sampled from the real
+# catalog (doctors_med_bot.csv) so text statistics stay realistic at any scale.
+import csv
+import os
+import random
+
+DEFAULT_CSV = os.path.join(os.path.dirname(__file__), "..", "..", "doctors_med_bot.csv")
+
+CITIES = ["Karachi", "Lahore", "Rawalpindi", "Islamabad", "Peshawar", "Quetta", "Hyderabad", "Multan"]
+FIRST_NAMES = [
+    "Ahmed", "Ayesha", "Bilal", "Fatima", "Hamza", "Hina", "Imran", "Kiran", "Usman", "Sana",
+    "Zain", "Maryam", "Omar", "Nadia", "Faisal", "Saima", "Tariq", "Rabia", "Asad", "Amna",
+]
+LAST_NAMES = [
+    "Khan", "Malik", "Qureshi", "Siddiqui", "Butt", "Chaudhry", "Sheikh", "Raza", "Hussain",
+    "Iqbal", "Aslam", "Javed", "Mirza", "Abbasi", "Baig", "Shah",
+]
+FACILITIES = ["Medical Centre", "Hospital", "Clinic", "Health Complex", "Consulting Clinics"]
+AREAS = ["Gulberg", "DHA Phase 5", "Saddar", "Clifton", "Model Town", "Satellite Town", "Blue Area", "Johar Town"]
+FEES = [500, 700, 1000, 1200, 1500, 2000, 2500, 3000, 5000]
+
+TEMPLATE_FIELDS = ("designation", "speciality", "keywords", "symptom_to_speciality", "disease_examples")
+COLUMNS = ("name",) + TEMPLATE_FIELDS[:2] + ("location", "fee") + TEMPLATE_FIELDS[2:]
+
+
+def load_templates(csv_path: str = DEFAULT_CSV):
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        return [{field: row[field] for field in TEMPLATE_FIELDS} for row in csv.DictReader(f)]
+
+
+def generate_doctors(count: int, seed: int = 0, city_weights=None, templates=None):
+    """Yield `count` doctor dicts with the columns in COLUMNS. Deterministic for a seed."""
+    rng = random.Random(seed)
+    templates = templates or load_templates()
+    weights = city_weights or [1] * len(CITIES)
+    for i in range(count):
+        template = rng.choice(templates)
+        city = rng.choices(CITIES, weights=weights)[0]
+        yield {
+            "name": f"Dr {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+            "designation": template["designation"],
+            "speciality": template["speciality"],
+            "location": f"{rng.choice(LAST_NAMES)} {rng.choice(FACILITIES)} {rng.choice(AREAS)}, {city}",
+            "fee": rng.choice(FEES),
+            "keywords": template["keywords"],
+            "symptom_to_speciality": template["symptom_to_speciality"],
+            "disease_examples": template["disease_examples"],
+        }
+
+
+def seed_doctors(engine, rows: int, seed: int = 0, city_weights=None, chunk: int = 5000):
+    """Replace the doctors table's contents with `rows` synthetic doctors (COPY on Postgres)."""
+    doctors = generate_doctors(rows, seed, city_weights)
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        if engine.dialect.name == "postgresql":
+            import io
+
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for doctor in doctors:
+                writer.writerow([doctor[c] for c in COLUMNS])
+            buffer.seek(0)
+            cur.execute("TRUNCATE doctors RESTART IDENTITY")
+            cur.copy_expert(f"COPY doctors ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+            cur.execute("ANALYZE doctors")
+        else:
+            cur.execute("DELETE FROM doctors")
+            sql = f"INSERT INTO doctors ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})"
+            batch = []
+            for doctor in doctors:
+                batch.append([doctor[c] for c in COLUMNS])
+                if len(batch) >= chunk:
+                    cur.executemany(sql, batch)
+                    batch = []
+            if batch:
+                cur.executemany(sql, batch)
+        raw.commit()
+    finally:
+        raw.close()
@@ -0,0 +1,59 @@
+"""doctors baseline
+
+Matches database/postgresql/init.sql so databases created by the docker
+init script and empty databases converge on the same schema.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS doctors (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            designation TEXT,
+            speciality TEXT NOT NULL,
+            location TEXT,
+            fee INTEGER,
+            keywords TEXT,
+            symptom_to_speciality TEXT,
+            disease_examples TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION set_updated_at() RETURNS TRIGGER AS $$
+        BEGIN
+            NEW.updated_at = CURRENT_TIMESTAMP;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute("DROP TRIGGER IF EXISTS doctors_set_updated_at ON doctors")
+    op.execute(
+        """
+        CREATE TRIGGER doctors_set_updated_at
+            BEFORE UPDATE ON doctors
+            FOR EACH ROW EXECUTE FUNCTION set_updated_at()
+        """
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS doctors_set_updated_at ON doctors")
+    op.execute("DROP FUNCTION IF EXISTS set_updated_at()")
+    op.execute("DROP TABLE IF EXISTS doctors")
@@ -0,0 +1,46 @@
+"""full-text and trigram search indexes on doctors
+
+Adds a weighted, generated tsvector column (speciality > keywords >
+symptoms/diseases) with a GIN index for ranked full-text search, and
+pg_trgm GIN indexes so ILIKE '%...%' on speciality, location and name can
+use an index instead of a sequential scan.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        """
+        ALTER TABLE doctors ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(speciality, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(keywords, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(symptom_to_speciality, '')), 'C') ||
+            setweight(to_tsvector('english', coalesce(disease_examples, '')), 'C')
+        ) STORED
+        """
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_doctors_search_vector ON doctors USING gin (search_vector)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_doctors_speciality_trgm ON doctors USING gin (speciality gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_doctors_location_trgm ON doctors USING gin (location gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_doctors_name_trgm ON doctors USING gin (name gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_doctors_updated_at ON doctors (updated_at)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_doctors_updated_at")
+    op.execute("DROP INDEX IF EXISTS ix_doctors_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_doctors_location_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_doctors_speciality_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_doctors_search_vector")
+    op.execute("ALTER TABLE doctors DROP COLUMN IF EXISTS search_vector")
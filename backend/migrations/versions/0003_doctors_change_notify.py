@@ -0,0 +1,42 @@
+"""notify listeners when doctors change
+
+Statement-level trigger that sends NOTIFY doctors_changed after any insert,
+update or delete, so backend processes refresh their in-memory catalog and
+FAISS index immediately instead of waiting for the next poll.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_doctors_changed() RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM pg_notify('doctors_changed', TG_OP);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute("DROP TRIGGER IF EXISTS doctors_notify_changed ON doctors")
+    op.execute(
+        """
+        CREATE TRIGGER doctors_notify_changed
+            AFTER INSERT OR UPDATE OR DELETE ON doctors
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_doctors_changed()
+        """
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS doctors_notify_changed ON doctors")
+    op.execute("DROP FUNCTION IF EXISTS notify_doctors_changed()")
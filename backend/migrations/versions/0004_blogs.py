@@ -0,0 +1,105 @@
+"""blogs table keyed by URL hash, plus per-keyword fetch state
+
+The old fetch script wrote into a hand-made `blogs` table with no unique key.
+This creates the table when it is missing and otherwise brings an existing one
+up to date: missing columns are added, url_hash is backfilled with a frozen
+copy of the ingester's URL normalization (as of this revision), duplicate URLs are collapsed onto the oldest
+row and a unique index makes url_hash the upsert target.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.ingest.blogs.normalize_url / url_hash: replaying this revision
+# must produce the same hashes however the ingester's normalization changes later
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref"}
+
+
+def url_hash(url: str) -> str:
+    parts = urlsplit((url or "").strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ))
+    path = parts.path.rstrip("/")
+    normalized = f"{host}{path}?{query}" if query else f"{host}{path}"
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def upgrade():
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS blogs (
+            id SERIAL PRIMARY KEY,
+            url TEXT NOT NULL,
+            specialty TEXT,
+            title TEXT NOT NULL,
+            description TEXT,
+            published_at TIMESTAMP,
+            source TEXT
+        )
+        """
+    )
+    op.execute("ALTER TABLE blogs ADD COLUMN IF NOT EXISTS url_hash VARCHAR(64)")
+    op.execute("ALTER TABLE blogs ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
+    op.execute("ALTER TABLE blogs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
+
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, url FROM blogs WHERE url_hash IS NULL")).fetchall()
+    if rows:
+        bind.execute(
+            sa.text("UPDATE blogs SET url_hash = :hash WHERE id = :id"),
+            [{"id": row.id, "hash": url_hash(row.url)} for row in rows],
+        )
+    op.execute(
+        """
+        DELETE FROM blogs b USING blogs keep
+        WHERE b.url_hash = keep.url_hash AND b.id > keep.id
+        """
+    )
+    op.execute("ALTER TABLE blogs ALTER COLUMN url_hash SET NOT NULL")
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS blogs_url_hash_key ON blogs (url_hash)")
+
+    op.execute("DROP TRIGGER IF EXISTS blogs_set_updated_at ON blogs")
+    op.execute(
+        """
+        CREATE TRIGGER blogs_set_updated_at
+            BEFORE UPDATE ON blogs
+            FOR EACH ROW EXECUTE FUNCTION set_updated_at()
+        """
+    )
+
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS blog_fetch_state (
+            query TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            status INTEGER,
+            fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS blog_fetch_state")
+    op.execute("DROP TRIGGER IF EXISTS blogs_set_updated_at ON blogs")
+    op.execute("DROP INDEX IF EXISTS blogs_url_hash_key")
+    # The table itself may predate this revision, so it stays; everything upgrade() added goes
+    for column in ("url_hash", "created_at", "updated_at"):
+        op.execute(f"ALTER TABLE blogs DROP COLUMN IF EXISTS {column}")
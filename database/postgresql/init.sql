@@ -12,3 +12,57 @@ CREATE TABLE IF NOT EXISTS doctors (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+
+-- Keep updated_at current on every change; the backend's FAISS sync relies on it
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS doctors_set_updated_at ON doctors;
+CREATE TRIGGER doctors_set_updated_at
+    BEFORE UPDATE ON doctors
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- Wake backend catalog watchers (LISTEN doctors_changed) after any write
+CREATE OR REPLACE FUNCTION notify_doctors_changed() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('doctors_changed', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS doctors_notify_changed ON doctors;
+CREATE TRIGGER doctors_notify_changed
+    AFTER INSERT OR UPDATE OR DELETE ON doctors
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_doctors_changed();
+
+-- Health articles ingested by app.ingest.blogs; url_hash (sha256 of the normalized URL) is the dedupe key
+CREATE TABLE IF NOT EXISTS blogs (
+    id SERIAL PRIMARY KEY,
+    url_hash VARCHAR(64) NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    specialty TEXT,
+    title TEXT NOT NULL,
+    description TEXT,
+    published_at TIMESTAMP,
+    source TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+DROP TRIGGER IF EXISTS blogs_set_updated_at ON blogs;
+CREATE TRIGGER blogs_set_updated_at
+    BEFORE UPDATE ON blogs
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+
+-- ETag / Last-Modified of the last fetch per keyword, for conditional requests
+CREATE TABLE IF NOT EXISTS blog_fetch_state (
+    query TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    status INTEGER,
+    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -1,9 +1,12 @@
 // frontend/src/app/api/chat/route.js
 import { NextResponse } from 'next/server';
 
+// Streaming responses must never be cached or statically optimised
+export const dynamic = 'force-dynamic';
+
 export async function POST(request) {
   try {
-    const { message } = await request.json();
+    const { message, stream } = await request.json();
 
     if (!message || !message.trim()) {
       return NextResponse.json(
@@ -14,29 +17,41 @@ export async function POST(request) {
 
     // Call your FastAPI backend
     const backendUrl = process.env.NEXT_PUBLIC_BACKEND_URL || 'http://127.0.0.1:8000';
-    
-    const response = await fetch(`${backendUrl}/api/chat`, {
+
+    const response = await fetch(`${backendUrl}/api/chat${stream ? '/stream' : ''}`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
       },
       body: JSON.stringify({ message: message.trim() }),
+      cache: 'no-store',
     });
 
     if (!response.ok) {
       throw new Error(`Backend responded with status: ${response.status}`);
     }
 
+    // ✅ Pass server-sent events straight through without buffering
+    if (stream && response.body) {
+      return new Response(response.body, {
+        headers: {
+          'Content-Type': 'text/event-stream',
+          'Cache-Control': 'no-cache, no-transform',
+          Connection: 'keep-alive',
+        },
+      });
+    }
+
     const data = await response.json();
     return NextResponse.json(data);
 
   } catch (error) {
     console.error('API Route Error:', error);
-    
+
     return NextResponse.json(
-      { 
+      {
         response: 'I apologize, but I\'m currently experiencing technical difficulties. Please try again later or contact your healthcare provider directly for urgent medical concerns.',
-        error: error.message 
+        error: error.message
       },
       { status: 500 }
     );
@@ -49,4 +64,4 @@ export async function GET() {
     { message: 'Med-Bot Chat API is running' },
     { status: 200 }
   );
-}
\ No newline at end of file
+}
@@ -74,49 +74,96 @@ export default function ChatInterface() {
     setIsLoading(true);
     setIsTyping(true);
 
-    try {
-      // Simulate typing delay
-      await new Promise((resolve) => setTimeout(resolve, 1500));
+    const botMessageId = Date.now() + 1;
+    const updateBotMessage = (patch) =>
+      setMessages((prev) =>
+        prev.map((m) => (m.id === botMessageId ? { ...m, ...patch(m) } : m))
+      );
 
+    try {
       const response = await fetch("/api/chat", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
         },
-        body: JSON.stringify({ message: userMessage.content }),
+        body: JSON.stringify({ message: userMessage.content, stream: true }),
       });
 
-      let botResponse, doctors = [];
-      if (response.ok) {
-        const data = await response.json();
-        console.log("🔍 Full API Response:", data); // ✅ Debug log
-        
-        botResponse = data.response || "I apologize, but I couldn't generate a proper response at this time.";
-        doctors = data.doctors || []; // ✅ Extract doctors array
-        
-        console.log("👥 Doctors found:", doctors.length); // ✅ Debug log
-      } else {
+      if (!response.ok) {
         throw new Error("API request failed");
       }
 
-      setIsTyping(false);
+      // ✅ Non-streaming fallback (e.g. proxy errors return plain JSON)
+      const contentType = response.headers.get("content-type") || "";
+      if (!contentType.includes("text/event-stream") || !response.body) {
+        const data = await response.json();
+        setIsTyping(false);
+        setMessages((prev) => [
+          ...prev,
+          {
+            id: botMessageId,
+            type: "bot",
+            content: data.response || "I apologize, but I couldn't generate a proper response at this time.",
+            doctors: data.doctors || [],
+            timestamp: new Date(),
+          },
+        ]);
+        return;
+      }
 
-      const botMessage = {
-        id: Date.now() + 1,
-        type: "bot",
-        content: botResponse,
-        doctors: doctors, // ✅ Include doctors in the message
-        timestamp: new Date(),
+      // ✅ Server-sent events: doctor cards first, then LLM tokens
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let started = false;
+
+      const handleEvent = (event, data) => {
+        if (!started) {
+          started = true;
+          setIsTyping(false);
+          setMessages((prev) => [
+            ...prev,
+            { id: botMessageId, type: "bot", content: "", doctors: [], timestamp: new Date() },
+          ]);
+        }
+        if (event === "doctors") {
+          updateBotMessage(() => ({ doctors: data.doctors || [] }));
+        } else if (event === "token") {
+          updateBotMessage((m) => ({ content: m.content + data.text }));
+        } else if (event === "done") {
+          updateBotMessage(() => ({ content: data.response, doctors: data.doctors || [] }));
+        }
       };
 
-      console.log("💬 Bot message with doctors:", botMessage); // ✅ Debug log
-      setMessages((prev) => [...prev, botMessage]);
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+          const rawEvent = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+
+          let event = "message";
+          let data = "";
+          for (const line of rawEvent.split("\n")) {
+            if (line.startsWith("event:")) event = line.slice(6).trim();
+            else if (line.startsWith("data:")) data += line.slice(5).trim();
+          }
+          if (data) handleEvent(event, JSON.parse(data));
+        }
+      }
+
+      if (!started) {
+        throw new Error("Empty response stream");
+      }
 
     } catch (error) {
       console.error("❌ Error in handleSendMessage:", error); // ✅ Debug log
       setIsTyping(false);
       const fallbackMessage = {
-        id: Date.now() + 1,
+        id: Date.now() + 2,
         type: "bot",
         content:
           "I'm currently experiencing technical difficulties. Please try again later or contact your healthcare provider directly for urgent medical concerns.",